@@ -6,6 +6,8 @@ from streamlit.components.v1 import html
 from streamlit_navigation_bar import st_navbar
 
 import pages as pg
+from src import instrumentation, metrics, profiling
+from src.assets import svg_markup, use_cached_navbar_logo
 
 # ------------------------------------------------------------
 # Main Page Configuration
@@ -17,6 +19,9 @@ import pages as pg
 
 st.set_page_config(initial_sidebar_state="collapsed", page_title="Yemen Energy Analytics Portal", layout="wide", page_icon=":earth_asia:")
 
+# Starts the opt-in Prometheus exports (APP_METRICS_PORT / APP_METRICS_FILE) once per process
+metrics.install()
+
 # ------------------------------------------------------------
 # Password Protection
 # ------------------------------------------------------------
@@ -121,12 +126,8 @@ if not st.session_state.authenticated:
     # Center the login form
     st.markdown("<br><br><br>", unsafe_allow_html=True)
     
-    # Read logo file
-    logo_path = os.path.join(os.path.dirname(__file__), "assets", "wb_logo.svg")
-    logo_svg = ""
-    if os.path.exists(logo_path):
-        with open(logo_path, "r", encoding="utf-8") as f:
-            logo_svg = f.read()
+    # Logo markup is read from disk once per process by the asset pipeline
+    logo_svg = svg_markup("wb_logo.svg")
     
     # Render login card with logo using html component
     html(
@@ -237,6 +238,8 @@ styles = {
 }
 options = {"show_menu": True, "show_sidebar": False, "use_padding": True}
 
+# The navbar logo is encoded once per process rather than re-read from disk on every rerun
+use_cached_navbar_logo()
 page = st_navbar(
     pages,
     styles=styles,
@@ -245,13 +248,19 @@ page = st_navbar(
     logo_page="Home",  # Make logo clickable to navigate to Home
 )
 
+# Pages are resolved lazily: a page module (and its dependencies) is imported on first navigation
 PAGES_MAP: Dict[str, Callable[[], None]] = {
-    "Home": pg.home,
-    "YEEAP II Monitoring Dashboard": pg.yeeap,
-    "RESET Geospatial Data Explorer": pg.data_explorer,
+    "Home": pg.lazy_page("home"),
+    "YEEAP II Monitoring Dashboard": pg.lazy_page("yeeap"),
+    "RESET Geospatial Data Explorer": pg.lazy_page("data_explorer"),
 }
 
-PAGES_MAP.get(page, pg.home)()
+# Each page render is timed as a "rerun" span; nested loader spans are listed in the opt-in panel.
+# With APP_PROFILE_DIR set, ?profile=cprofile|sample profiles this one rerun to a file.
+instrumentation.start_run()
+with profiling.maybe_profile(page or "Home"), instrumentation.span("rerun", page=page or "Home"):
+    PAGES_MAP.get(page, PAGES_MAP["Home"])()
+instrumentation.render_panel()
 
 
 
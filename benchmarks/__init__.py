@@ -0,0 +1 @@
+"""Developer tooling for measuring the explorer's data path; not imported by the app."""
@@ -0,0 +1,251 @@
+"""Cold-start benchmarks for the explorer's data loaders and payload preparation.
+
+Each case runs with every ``st.cache_data`` cache cleared, so the numbers reflect what the first
+session after a deploy (or after the one-hour TTL) pays. Timings come from passes without
+``tracemalloc``; peak memory is measured in a separate traced pass because tracing slows
+allocation-heavy code several-fold.
+
+Usage (from the repository root)::
+
+    python -m benchmarks.bench_loaders                       # writes benchmarks/results/<stamp>.json
+    python -m benchmarks.bench_loaders --compare benchmarks/results/baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = PROJECT_ROOT / "benchmarks" / "results"
+
+# Relative regressions (current / baseline - 1) above these are reported as failures by --compare
+DEFAULT_TIME_THRESHOLD = 0.15
+DEFAULT_BYTES_THRESHOLD = 0.01
+# Timing differences smaller than this are treated as noise whatever their relative size
+MIN_TIME_DELTA_SECONDS = 0.005
+
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+
+def _quiet_streamlit() -> None:
+    # Outside ``streamlit run`` every cached call logs "No runtime found", and the first one also
+    # prints a hint to use ``streamlit run``.
+    from streamlit import config as streamlit_config
+    from streamlit import logger as streamlit_logger
+
+    streamlit_config.set_option("global.showWarningOnDirectExecution", False)
+    streamlit_logger.set_log_level("error")
+
+
+def _clear_caches(module: Any) -> None:
+    module._load_dataset_features.clear()
+    module._load_grid_datasets.clear()
+    module._prepare_site_selector_data.clear()
+
+
+def _measure(func: Callable[[], Any], reset: Callable[[], None], repeat: int) -> Dict[str, Any]:
+    """Time ``func`` ``repeat`` times after ``reset`` and measure its peak traced memory once."""
+    durations: List[float] = []
+    result: Any = None
+    for _ in range(repeat):
+        reset()
+        gc.collect()
+        started = time.perf_counter()
+        result = func()
+        durations.append(time.perf_counter() - started)
+
+    reset()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "seconds": {
+            "min": min(durations),
+            "median": statistics.median(durations),
+            "max": max(durations),
+            "runs": durations,
+        },
+        "peak_memory_bytes": peak,
+        "_result": result,
+    }
+
+
+def run_benchmarks(repeat: int = 5, data_root: Optional[Path] = None) -> Dict[str, Any]:
+    """Run every benchmark case and return a JSON-serialisable report.
+
+    ``data_root`` is a directory containing a ``data/`` tree laid out like the repository's; the
+    loaders resolve their paths relative to the working directory, so the run happens from there.
+    """
+    _quiet_streamlit()
+    from src.components import site_selector_v2 as selector
+
+    root = (data_root or PROJECT_ROOT).resolve()
+    previous_cwd = Path.cwd()
+    os.chdir(root)
+    try:
+        reset = lambda: _clear_caches(selector)  # noqa: E731
+        cases: Dict[str, Dict[str, Any]] = {}
+
+        for dataset_id in selector.SITE_DATASETS:
+            loader = selector._load_dataset_features.__wrapped__
+            case = _measure(lambda: loader(dataset_id), reset, repeat)
+            features = case.pop("_result")
+            case["records"] = features["count"]
+            shipped = selector._encode_site_columns(features, selector._site_fields(selector.SITE_DATASETS[dataset_id]))
+            case["payload_bytes"] = len(json.dumps(shipped).encode("utf-8"))
+            cases[f"load_dataset_features[{dataset_id}]"] = case
+
+        case = _measure(selector._load_grid_datasets.__wrapped__, reset, repeat)
+        meta, values, cells = case.pop("_result")
+        case["records"] = len(cells)
+        case["payload_bytes"] = {
+            "gridDatasets": len(json.dumps(meta).encode("utf-8")),
+            "gridValues": len(json.dumps(selector._encoded_columns(values)).encode("utf-8")),
+            "gridGeometry": len(json.dumps(cells.to_geojson()).encode("utf-8")),
+        }
+        cases["load_grid_datasets"] = case
+
+        # The outer function is called unwrapped; clearing the caches makes its nested loaders cold too.
+        case = _measure(selector._prepare_site_selector_data.__wrapped__, reset, repeat)
+        payload = case.pop("_result")
+        case["payload_bytes"] = {
+            name: len(value.encode("utf-8")) for name, value in payload.items() if name != "version"
+        }
+        case["payload_bytes_total"] = sum(case["payload_bytes"].values())
+        case["version"] = payload["version"]
+        cases["prepare_site_selector_data"] = case
+    finally:
+        os.chdir(previous_cwd)
+        _clear_caches(selector)
+
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "data_root": str(root),
+            "repeat": repeat,
+        },
+        "cases": cases,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip() or None
+
+
+def _flatten_bytes(case: Dict[str, Any]) -> Dict[str, int]:
+    payload = case.get("payload_bytes")
+    if isinstance(payload, dict):
+        return {f"payload_bytes.{name}": size for name, size in payload.items()}
+    if isinstance(payload, int):
+        return {"payload_bytes": payload}
+    return {}
+
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    time_threshold: float = DEFAULT_TIME_THRESHOLD,
+    bytes_threshold: float = DEFAULT_BYTES_THRESHOLD,
+) -> List[str]:
+    """Return one line per metric that regressed beyond its threshold relative to ``baseline``.
+
+    Median time and peak memory use ``time_threshold``; payload sizes are deterministic, so they use
+    the much tighter ``bytes_threshold``.
+    """
+    regressions: List[str] = []
+    for name, case in current["cases"].items():
+        base = baseline.get("cases", {}).get(name)
+        if base is None:
+            continue
+        metrics = [("peak_memory_bytes", case["peak_memory_bytes"], base["peak_memory_bytes"], time_threshold)]
+        median, base_median = case["seconds"]["median"], base["seconds"]["median"]
+        if median - base_median >= MIN_TIME_DELTA_SECONDS:
+            metrics.append(("seconds.median", median, base_median, time_threshold))
+        base_bytes = _flatten_bytes(base)
+        for metric, value in _flatten_bytes(case).items():
+            if metric in base_bytes:
+                metrics.append((metric, value, base_bytes[metric], bytes_threshold))
+        for metric, value, reference, threshold in metrics:
+            if reference and value / reference - 1 > threshold:
+                regressions.append(
+                    f"{name} {metric}: {reference:,.4g} -> {value:,.4g} ({value / reference - 1:+.1%})"
+                )
+    return regressions
+
+
+def _format_report(report: Dict[str, Any]) -> str:
+    lines = [f"{'case':<44} {'median s':>10} {'peak MiB':>10} {'payload KiB':>12}"]
+    for name, case in report["cases"].items():
+        payload = case.get("payload_bytes_total", case.get("payload_bytes"))
+        if isinstance(payload, dict):
+            payload = sum(payload.values())
+        lines.append(
+            f"{name:<44} {case['seconds']['median']:>10.4f} "
+            f"{case['peak_memory_bytes'] / 2**20:>10.1f} {payload / 1024:>12.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case (default: 5)")
+    parser.add_argument("--data-root", type=Path, help="directory containing the data/ tree to load")
+    parser.add_argument("--output", type=Path, help="result file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", type=Path, help="baseline result file to compare against")
+    parser.add_argument("--time-threshold", type=float, default=DEFAULT_TIME_THRESHOLD)
+    parser.add_argument("--bytes-threshold", type=float, default=DEFAULT_BYTES_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(repeat=args.repeat, data_root=args.data_root)
+    output = args.output or RESULTS_DIR / f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+    print(_format_report(report))
+    print(f"\nSaved {output}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        regressions = compare(report, baseline, args.time_threshold, args.bytes_threshold)
+        if regressions:
+            print(f"\nRegressions against {args.compare}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
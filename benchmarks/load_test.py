@@ -0,0 +1,410 @@
+"""Concurrent-session load test for ``app.py``.
+
+The harness starts the app in a real Streamlit server subprocess and drives it with N websocket
+clients that speak the same protocol as the browser. Each client opens the login page, logs in,
+navigates to the RESET Geospatial Data Explorer and reruns it a few times. Between the first
+explorer render and the reruns the client acknowledges the payload version, as the browser
+component does, so the reruns measure the steady state rather than the payload download. All
+clients start together.
+
+Reported:
+
+* rerun latency percentiles per step, measured from sending the rerun request to receiving
+  ``script_finished``, plus the bytes each step received;
+* server RSS before the run, with every session connected, and after they disconnect. The
+  difference per session is what each live session costs. Streamlit keeps disconnected sessions
+  for two minutes so they can reconnect, so memory released later than that is not visible here;
+* hit/miss counts and hit rate of the explorer's ``st.cache_data`` loaders, counted inside the
+  server process. A concurrent first request that waits for another session to compute a value
+  counts as a miss.
+
+``AppTest`` is not used because it swaps a process-global runtime on every run, so several
+instances cannot run concurrently. RSS is read from ``/proc`` and so needs Linux.
+
+Usage (from the repository root)::
+
+    python -m benchmarks.load_test --sessions 16 --reruns 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+APP_PATH = PROJECT_ROOT / "app.py"
+RESULTS_DIR = PROJECT_ROOT / "benchmarks" / "results"
+
+EXPLORER_PAGE = "RESET Geospatial Data Explorer"
+NAVBAR_COMPONENT = "streamlit_navigation_bar.st_navbar"
+EXPLORER_COMPONENT = "src.components.site_selector_v2.site_selector_v2"
+PERCENTILES = (50, 90, 95, 99)
+# ScriptFinishedStatus values that end a run; FINISHED_EARLY_FOR_RERUN (2) is followed by another
+_FINAL_STATUSES = {0, 1, 3}
+
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+
+def _rss_bytes(pid: int) -> int:
+    with open(f"/proc/{pid}/status", encoding="ascii") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    raise RuntimeError(f"no VmRSS for process {pid}")
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percentile / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+# ---------------------------------------------------------------------------
+# Server side (runs in the subprocess)
+# ---------------------------------------------------------------------------
+
+
+class CacheCounter:
+    """Count hits and misses of ``st.cache_data`` functions by wrapping Streamlit's cache handlers.
+
+    The handlers are wrapped on the ``CachedFunc`` class and calls are attributed by the cached
+    function's module and name. Nothing from the app is imported here: components declared at
+    import time only register with the runtime when imported inside a script run, so importing
+    the explorer before ``bootstrap.run`` would leave its frontend unserved (404).
+    """
+
+    def __init__(self, module: str, names: List[str]) -> None:
+        from streamlit.runtime.caching.cache_utils import CachedFunc
+
+        self._lock = threading.Lock()
+        self._module = module
+        self.counts = {name: {"hits": 0, "misses": 0} for name in names}
+        for handler, outcome in (("_handle_cache_hit", "hits"), ("_handle_cache_miss", "misses")):
+            self._wrap(CachedFunc, handler, outcome)
+
+    def _wrap(self, cached_class: Any, handler: str, outcome: str) -> None:
+        original = getattr(cached_class, handler)
+        counter = self
+
+        def counted(cached: Any, *args: Any, **kwargs: Any) -> Any:
+            func = cached._info.func
+            name = getattr(func, "__name__", "")
+            if getattr(func, "__module__", None) == counter._module and name in counter.counts:
+                with counter._lock:
+                    counter.counts[name][outcome] += 1
+            return original(cached, *args, **kwargs)
+
+        setattr(cached_class, handler, counted)
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        report = {}
+        for name, counts in self.counts.items():
+            calls = counts["hits"] + counts["misses"]
+            report[name] = {**counts, "hit_rate": counts["hits"] / calls if calls else None}
+        return report
+
+
+def serve(port: int, cache_report: Path) -> None:
+    """Run ``app.py`` in this process with cache counters installed; write their report on exit."""
+    from streamlit.web import bootstrap
+
+    bootstrap.load_config_options(
+        {
+            "server_port": port,
+            "server_address": "127.0.0.1",
+            "server_headless": True,
+            "server_fileWatcherType": "none",
+            "browser_gatherUsageStats": False,
+            "logger_level": "error",
+        }
+    )
+    counter = CacheCounter(
+        "src.components.site_selector_v2",
+        ["_load_dataset_features", "_load_grid_datasets", "_prepare_site_selector_data"],
+    )
+    os.chdir(PROJECT_ROOT)  # the loaders resolve data/ relative to the working directory
+    try:
+        bootstrap.run(str(APP_PATH), False, [], {})
+    finally:
+        cache_report.write_text(json.dumps(counter.report()), encoding="utf-8")
+
+
+# ---------------------------------------------------------------------------
+# Client side
+# ---------------------------------------------------------------------------
+
+
+class Session:
+    """One simulated browser session and the timings of each of its steps."""
+
+    def __init__(self, index: int, port: int, password: str, reruns: int, timeout: float) -> None:
+        self.index = index
+        self.url = f"ws://127.0.0.1:{port}/_stcore/stream"
+        self.password = password
+        self.reruns = reruns
+        self.timeout = timeout
+        self.connection: Any = None
+        self.widgets: Dict[str, Any] = {}
+        self.elements: List[Any] = []
+        self.steps: List[Dict[str, Any]] = []
+        self.error: Optional[str] = None
+
+    def _widget_state(self, widget_id: str, **value: Any) -> Any:
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        return WidgetState(id=widget_id, **value)
+
+    async def _run(self, step: str, triggers: Optional[List[Any]] = None) -> None:
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        message = BackMsg()
+        message.rerun_script.query_string = ""
+        message.rerun_script.page_script_hash = ""
+        message.rerun_script.widget_states.widgets.extend(list(self.widgets.values()) + (triggers or []))
+
+        started = time.perf_counter()
+        await self.connection.write_message(message.SerializeToString(), binary=True)
+        received = 0
+        elements: List[Any] = []
+        while True:
+            raw = await asyncio.wait_for(self.connection.read_message(), self.timeout)
+            if raw is None:
+                raise RuntimeError(f"{step}: connection closed")
+            received += len(raw)
+            forward = ForwardMsg()
+            forward.ParseFromString(raw)
+            kind = forward.WhichOneof("type")
+            if kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                elements.append(forward.delta.new_element)
+                if forward.delta.new_element.WhichOneof("type") == "exception":
+                    raise RuntimeError(f"{step}: {forward.delta.new_element.exception.message}")
+            elif kind == "script_finished":
+                if forward.script_finished in _FINAL_STATUSES:
+                    break
+                elements = []  # st.rerun(): the elements of the next run replace these
+        self.steps.append({"step": step, "seconds": time.perf_counter() - started, "bytes": received})
+        self.elements = elements
+
+    def _find(self, kind: str, predicate: Callable[[Any], bool]) -> Any:
+        for element in self.elements:
+            if element.WhichOneof("type") == kind and predicate(getattr(element, kind)):
+                return getattr(element, kind)
+        return None
+
+    async def connect(self) -> None:
+        import tornado.websocket
+
+        self.connection = await tornado.websocket.websocket_connect(self.url, max_message_size=2**31 - 1)
+
+    async def run(self, start: asyncio.Event) -> "Session":
+        try:
+            await start.wait()
+            await self._run("login_page")
+
+            password = self._find("text_input", lambda widget: widget.id.endswith("-password_input"))
+            button = self._find("button", lambda widget: widget.label == "Login")
+            if password is None or button is None:
+                raise RuntimeError("login_page: login form not rendered")
+            self.widgets[password.id] = self._widget_state(password.id, string_value=self.password)
+            await self._run("login", [self._widget_state(button.id, trigger_value=True)])
+
+            navbar = self._find("component_instance", lambda widget: widget.component_name == NAVBAR_COMPONENT)
+            if navbar is None:
+                raise RuntimeError("login: navigation bar not rendered (wrong password?)")
+            self.widgets[navbar.id] = self._widget_state(navbar.id, json_value=json.dumps(EXPLORER_PAGE))
+            await self._run("explorer_first")
+
+            explorer = self._find("component_instance", lambda widget: widget.component_name == EXPLORER_COMPONENT)
+            if explorer is None:
+                raise RuntimeError("explorer_first: explorer component not rendered")
+            version = json.loads(explorer.json_args)["version"]
+            acknowledged = {"payloadVersion": version, "selection": None, "view": None}
+            self.widgets[explorer.id] = self._widget_state(explorer.id, json_value=json.dumps(acknowledged))
+            for _ in range(self.reruns):
+                await self._run("explorer_rerun")
+        except Exception as error:  # noqa: BLE001 - reported per session rather than aborting the run
+            self.error = f"{type(error).__name__}: {error}"
+        return self
+
+    def close(self) -> None:
+        if self.connection is not None:
+            self.connection.close()
+
+
+async def _drive(port: int, sessions: int, password: str, reruns: int, timeout: float, pid: int) -> Dict[str, Any]:
+    clients = [Session(index, port, password, reruns, timeout) for index in range(sessions)]
+    await asyncio.gather(*(client.connect() for client in clients))
+    start = asyncio.Event()
+    tasks = [asyncio.ensure_future(client.run(start)) for client in clients]
+    started = time.perf_counter()
+    start.set()
+    await asyncio.gather(*tasks)
+    wall_seconds = time.perf_counter() - started
+    rss_alive = _rss_bytes(pid)
+    for client in clients:
+        client.close()
+    return {"clients": clients, "wall_seconds": wall_seconds, "rss_alive": rss_alive}
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def _wait_until_healthy(port: int, process: subprocess.Popen, deadline: float) -> None:
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with status {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("server did not become healthy in time")
+
+
+def run_load_test(
+    sessions: int = 8,
+    reruns: int = 5,
+    password: Optional[str] = None,
+    timeout: float = 300.0,
+    warm: bool = False,
+    settle: float = 5.0,
+) -> Dict[str, Any]:
+    """Start a server, run ``sessions`` concurrent clients against it and return a report.
+
+    Caches start cold unless ``warm`` is set, in which case one untimed session runs first.
+    ``settle`` is how long to wait after the clients disconnect before the final RSS sample.
+    """
+    password = password if password is not None else os.getenv("APP_PASSWORD", "yemen2024")
+    port = _free_port()
+    with tempfile.TemporaryDirectory() as scratch:
+        cache_report = Path(scratch) / "cache.json"
+        process = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.load_test", "--serve", str(port), "--cache-report", str(cache_report)],
+            cwd=PROJECT_ROOT,
+            stdout=subprocess.DEVNULL,
+        )
+        try:
+            _wait_until_healthy(port, process, time.monotonic() + 60)
+            if warm:
+                asyncio.run(_drive(port, 1, password, 0, timeout, process.pid))
+            rss_before = _rss_bytes(process.pid)
+            outcome = asyncio.run(_drive(port, sessions, password, reruns, timeout, process.pid))
+            time.sleep(settle)
+            rss_released = _rss_bytes(process.pid)
+        finally:
+            process.send_signal(signal.SIGTERM)
+            process.wait(timeout=30)
+        cache = json.loads(cache_report.read_text(encoding="utf-8")) if cache_report.exists() else {}
+
+    latencies: Dict[str, List[float]] = {}
+    received: Dict[str, List[int]] = {}
+    for client in outcome["clients"]:
+        for step in client.steps:
+            latencies.setdefault(step["step"], []).append(step["seconds"])
+            received.setdefault(step["step"], []).append(step["bytes"])
+
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "sessions": sessions,
+            "reruns": reruns,
+            "warm": warm,
+            "wall_seconds": outcome["wall_seconds"],
+        },
+        "latency_seconds": {
+            step: {
+                "count": len(values),
+                **{f"p{percentile}": _percentile(values, percentile) for percentile in PERCENTILES},
+                "max": max(values),
+                "mean": sum(values) / len(values),
+            }
+            for step, values in latencies.items()
+        },
+        "bytes_received_per_run": {step: max(values) for step, values in received.items()},
+        "rss_bytes": {
+            "before": rss_before,
+            "sessions_alive": outcome["rss_alive"],
+            "after_disconnect": rss_released,
+            "growth_per_session": (outcome["rss_alive"] - rss_before) / sessions,
+        },
+        "cache": cache,
+        "errors": [f"session {client.index}: {client.error}" for client in outcome["clients"] if client.error],
+    }
+
+
+def _format_report(report: Dict[str, Any]) -> str:
+    meta = report["meta"]
+    lines = [
+        f"{meta['sessions']} sessions x {meta['reruns']} reruns in {meta['wall_seconds']:.1f} s",
+        "",
+        f"{'step':<16} {'n':>4} {'p50 s':>8} {'p90 s':>8} {'p95 s':>8} {'p99 s':>8} {'max s':>8} {'recv KiB':>10}",
+    ]
+    for step, stats in report["latency_seconds"].items():
+        lines.append(
+            f"{step:<16} {stats['count']:>4} {stats['p50']:>8.3f} {stats['p90']:>8.3f} {stats['p95']:>8.3f} "
+            f"{stats['p99']:>8.3f} {stats['max']:>8.3f} {report['bytes_received_per_run'][step] / 1024:>10.1f}"
+        )
+    rss = report["rss_bytes"]
+    lines += [
+        "",
+        f"Server RSS before {rss['before'] / 2**20:.0f} MiB, sessions alive {rss['sessions_alive'] / 2**20:.0f} MiB, "
+        f"after disconnect {rss['after_disconnect'] / 2**20:.0f} MiB",
+        f"RSS growth per live session {rss['growth_per_session'] / 2**20:.1f} MiB",
+        "",
+    ]
+    for name, stats in report["cache"].items():
+        rate = "n/a" if stats["hit_rate"] is None else f"{stats['hit_rate']:.1%}"
+        lines.append(f"{name:<30} hits {stats['hits']:>5}  misses {stats['misses']:>4}  hit rate {rate}")
+    for error in report["errors"]:
+        lines += ["", error]
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=8, help="concurrent sessions (default: 8)")
+    parser.add_argument("--reruns", type=int, default=5, help="explorer reruns per session (default: 5)")
+    parser.add_argument("--warm", action="store_true", help="run one untimed session first so caches start warm")
+    parser.add_argument("--timeout", type=float, default=300.0, help="seconds to wait for any single message")
+    parser.add_argument("--settle", type=float, default=5.0, help="seconds to wait after disconnect before sampling RSS")
+    parser.add_argument("--output", type=Path, help="result file (default: benchmarks/results/load-<timestamp>.json)")
+    parser.add_argument("--serve", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    parser.add_argument("--cache-report", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        serve(args.serve, args.cache_report)
+        return 0
+
+    report = run_load_test(args.sessions, args.reruns, timeout=args.timeout, warm=args.warm, settle=args.settle)
+    output = args.output or RESULTS_DIR / f"load-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+    print(_format_report(report))
+    print(f"\nSaved {output}")
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,327 @@
+"""Generate schema-identical synthetic copies of the explorer's data at larger scales.
+
+For a scale factor ``s`` the output holds roughly ``s`` times as many grid cells and exactly ``s``
+times as many sites as ``data/``:
+
+* Grid cells come from a regular hexagonal lattice, ``s`` times finer than the res-5 grid, clipped
+  to the real grid's footprint. Each synthetic cell inherits the values of the real cell that
+  contains its centre with a small multiplicative jitter, which keeps the real spatial structure and
+  missing values. Extensive quantities (counts, populations) are not re-apportioned.
+* Sites are ``s`` copies of every real feature: the first copy keeps its position, the others are
+  moved by a few kilometres, and every copy gets unique identifiers; every other property is
+  copied unchanged.
+
+Files keep the source headers, columns, column order, GeoJSON layout (one feature per line) and the
+``geometry`` WKT columns. Synthetic ``h3_05`` values are unique 15-digit hexadecimal strings in the
+shape of H3 indexes but are *not* valid H3 cells, so only feed the output to code that treats them as
+opaque keys. Output is written in chunks, so memory stays flat even at 1000x.
+
+Usage (from the repository root)::
+
+    python -m benchmarks.synthetic --scale 10            # writes benchmarks/synthetic/x10/data/...
+    python -m benchmarks.bench_loaders --data-root benchmarks/synthetic/x10
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import math
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, TextIO
+
+import numpy as np
+import pandas as pd
+
+from src.h3_grid import points_in_ring
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DATA_DIR = PROJECT_ROOT / "data"
+OUTPUT_DIR = PROJECT_ROOT / "benchmarks" / "synthetic"
+
+GRID_PATH = Path("boundaries_h3") / "h3_grid_res5.geojson"
+GRID_CSV_DIR = Path("processed_h3")
+SITE_DIR = Path("site_data")
+
+DEFAULT_SCALES = (10, 100, 1000)
+# Real cells processed per write; bounds memory independently of the scale factor
+CHUNK_CELLS = 64
+# Relative spread of the multiplicative noise applied to inherited cell values
+VALUE_JITTER = 0.1
+# Standard deviation, in degrees (~4.5 km), of the displacement applied to resampled sites
+SITE_JITTER_DEGREES = 0.04
+# Properties that must stay unique per site, and how to derive a unique value for copy ``k``
+_SITE_ID_FIELDS = ("id", "Subproject_ID", "osm_id")
+# Properties that duplicate the point coordinates and must follow the jittered geometry
+_COORDINATE_FIELDS = {"Longitude": 0, "Latitude": 1}
+
+
+def _geojson_header(name: str) -> str:
+    return (
+        '{\n"type": "FeatureCollection",\n'
+        f'"name": {json.dumps(name)},\n'
+        '"crs": { "type": "name", "properties": { "name": "urn:ogc:def:crs:OGC:1.3:CRS84" } },\n'
+        '"features": [\n'
+    )
+
+
+def _write_features(handle: TextIO, features: Iterator[Dict[str, Any]]) -> int:
+    """Write ``features`` one per line after a GeoJSON header and return how many were written."""
+    count = 0
+    for feature in features:
+        if count:
+            handle.write(",\n")
+        handle.write(json.dumps(feature, ensure_ascii=False))
+        count += 1
+    handle.write("\n]\n}\n")
+    return count
+
+
+def _polygon_area(ring: np.ndarray) -> float:
+    x, y = ring[:, 0], ring[:, 1]
+    return 0.5 * abs(float(np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1])))
+
+
+class HexLattice:
+    """Pointy-top hexagonal lattice with circumradius ``radius`` in lon/lat degrees."""
+
+    def __init__(self, radius: float) -> None:
+        self.radius = radius
+        self.dx = math.sqrt(3.0) * radius
+        self.dy = 1.5 * radius
+        angles = np.radians(np.arange(30.0, 390.0, 60.0))
+        self._corners = np.column_stack([np.cos(angles), np.sin(angles)]) * radius
+
+    def centres_in(self, ring: np.ndarray) -> np.ndarray:
+        """Return the lattice centres that fall inside ``ring``."""
+        (xmin, ymin), (xmax, ymax) = ring.min(axis=0), ring.max(axis=0)
+        rows = np.arange(math.floor(ymin / self.dy), math.ceil(ymax / self.dy) + 1)
+        cols = np.arange(math.floor(xmin / self.dx) - 1, math.ceil(xmax / self.dx) + 1)
+        col_grid, row_grid = np.meshgrid(cols, rows)
+        x = (col_grid + 0.5 * (row_grid & 1)) * self.dx
+        y = row_grid * self.dy
+        points = np.column_stack([x.ravel(), y.ravel()])
+        return points[points_in_ring(points[:, 0], points[:, 1], ring)]
+
+    def ring(self, centre: np.ndarray) -> List[List[float]]:
+        corners = self._corners + centre
+        return [[float(cx), float(cy)] for cx, cy in np.vstack([corners, corners[:1]])]
+
+
+def _wkt_polygon(ring: Sequence[Sequence[float]]) -> str:
+    return "POLYGON ((" + ", ".join(f"{x!r} {y!r}" for x, y in ring) + "))"
+
+
+def _synthetic_cell_id(index: int) -> str:
+    # Mode bits of zero: the ids fail src.h3_grid.cell_resolutions, so the app does not roll the
+    # synthetic grid up into (bogus) parent cells
+    return f"{index:015x}"
+
+
+def _jitter(values: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Multiply numeric ``values`` (rows, columns) by noise; NaNs stay NaN."""
+    return values * rng.uniform(1.0 - VALUE_JITTER, 1.0 + VALUE_JITTER, size=values.shape)
+
+
+class _GridTable:
+    """One ``processed_h3`` CSV: its source rows keyed by cell and an open synthetic writer."""
+
+    def __init__(self, source: Path, target: Path) -> None:
+        self.frame = pd.read_csv(source, dtype={"h3_05": str})
+        self.columns = list(self.frame.columns)
+        self.index_column = self.columns[0] if self.columns[0].startswith("Unnamed") else None
+        self.numeric_columns = [
+            column
+            for column in self.columns
+            if column not in ("h3_05", "geometry", self.index_column)
+            and pd.api.types.is_numeric_dtype(self.frame[column])
+        ]
+        self.integer_columns = {
+            column for column in self.numeric_columns if pd.api.types.is_integer_dtype(self.frame[column])
+        }
+        self.rows = {
+            cell: position for position, cell in enumerate(self.frame["h3_05"]) if isinstance(cell, str)
+        }
+        self.values = self.frame[self.numeric_columns].to_numpy(dtype=float)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        self.handle = target.open("w", encoding="utf-8", newline="")
+        self.writer = csv.writer(self.handle, lineterminator="\n")
+        self.writer.writerow(["" if column == self.index_column else column for column in self.columns])
+        self.written = 0
+
+    def write(
+        self,
+        parent: str,
+        cell_ids: Sequence[str],
+        rings: Sequence[List[List[float]]],
+        rng: np.random.Generator,
+    ) -> None:
+        position = self.rows.get(parent)
+        if position is None:
+            return
+        values = _jitter(np.repeat(self.values[position : position + 1], len(cell_ids), axis=0), rng)
+        for offset, (cell_id, ring) in enumerate(zip(cell_ids, rings)):
+            row_values = dict(zip(self.numeric_columns, values[offset]))
+            row: List[Any] = []
+            for column in self.columns:
+                if column == self.index_column:
+                    row.append(self.written)
+                elif column == "h3_05":
+                    row.append(cell_id)
+                elif column == "geometry":
+                    row.append(_wkt_polygon(ring))
+                elif column in row_values:
+                    value = row_values[column]
+                    if math.isnan(value):
+                        row.append("")
+                    elif column in self.integer_columns:
+                        row.append(int(round(value)))
+                    else:
+                        row.append(repr(float(value)))
+                else:
+                    row.append(self.frame.at[position, column])
+            self.writer.writerow(row)
+            self.written += 1
+
+    def close(self) -> None:
+        self.handle.close()
+
+
+def generate_grid(scale: int, source_dir: Path, output_dir: Path, rng: np.random.Generator) -> Dict[str, int]:
+    """Write the synthetic grid GeoJSON and every ``processed_h3`` CSV; return row counts per file."""
+    with (source_dir / GRID_PATH).open("r", encoding="utf-8") as file:
+        grid = json.load(file)
+    parents = [
+        (feature["properties"], np.asarray(feature["geometry"]["coordinates"][0], dtype=float))
+        for feature in grid["features"]
+    ]
+    mean_area = sum(_polygon_area(ring) for _, ring in parents) / len(parents)
+    lattice = HexLattice(math.sqrt(2.0 * mean_area / (3.0 * math.sqrt(3.0) * scale)))
+
+    tables = {
+        path.name: _GridTable(path, output_dir / GRID_CSV_DIR / path.name)
+        for path in sorted((source_dir / GRID_CSV_DIR).glob("*.csv"))
+    }
+    grid_target = output_dir / GRID_PATH
+    grid_target.parent.mkdir(parents=True, exist_ok=True)
+
+    def features() -> Iterator[Dict[str, Any]]:
+        next_id = 0
+        for start in range(0, len(parents), CHUNK_CELLS):
+            for properties, parent_ring in parents[start : start + CHUNK_CELLS]:
+                centres = lattice.centres_in(parent_ring)
+                cell_ids = [_synthetic_cell_id(next_id + offset) for offset in range(len(centres))]
+                rings = [lattice.ring(centre) for centre in centres]
+                next_id += len(centres)
+                for table in tables.values():
+                    table.write(properties["h3_05"], cell_ids, rings, rng)
+                for cell_id, ring in zip(cell_ids, rings):
+                    yield {
+                        "type": "Feature",
+                        "properties": {**properties, "h3_05": cell_id},
+                        "geometry": {"type": "Polygon", "coordinates": [ring]},
+                    }
+
+    try:
+        with grid_target.open("w", encoding="utf-8") as handle:
+            handle.write(_geojson_header(grid.get("name", grid_target.stem)))
+            counts = {str(GRID_PATH): _write_features(handle, features())}
+    finally:
+        for table in tables.values():
+            table.close()
+    counts.update({str(GRID_CSV_DIR / name): table.written for name, table in tables.items()})
+    return counts
+
+
+def _unique_id(value: Any, copy: int) -> Any:
+    if copy == 0 or value is None:
+        return value
+    if isinstance(value, int):
+        # OSM ids fit comfortably below 10**11; offsetting by copy keeps them integers and unique.
+        return value + copy * 10**11
+    return f"{value}-s{copy}"
+
+
+def generate_sites(
+    scale: int, source_dir: Path, output_dir: Path, rng: np.random.Generator
+) -> Dict[str, int]:
+    """Write ``scale`` jittered copies of every site dataset; return feature counts per file."""
+    counts: Dict[str, int] = {}
+    for source in sorted((source_dir / SITE_DIR).glob("*.geojson")):
+        with source.open("r", encoding="utf-8") as file:
+            collection = json.load(file)
+        originals = collection.get("features", [])
+        target = output_dir / SITE_DIR / source.name
+        target.parent.mkdir(parents=True, exist_ok=True)
+
+        def features() -> Iterator[Dict[str, Any]]:
+            for copy in range(scale):
+                offsets = rng.normal(0.0, SITE_JITTER_DEGREES, size=(len(originals), 2)) if copy else None
+                for position, feature in enumerate(originals):
+                    properties = dict(feature.get("properties") or {})
+                    geometry = feature.get("geometry")
+                    for field in _SITE_ID_FIELDS:
+                        if field in properties:
+                            properties[field] = _unique_id(properties[field], copy)
+                    if offsets is not None and geometry and geometry.get("type") == "Point":
+                        lon, lat = geometry["coordinates"][:2]
+                        point = [lon + float(offsets[position, 0]), lat + float(offsets[position, 1])]
+                        geometry = {"type": "Point", "coordinates": point}
+                        for field, axis in _COORDINATE_FIELDS.items():
+                            if isinstance(properties.get(field), (int, float)):
+                                properties[field] = point[axis]
+                    yield {"type": "Feature", "properties": properties, "geometry": geometry}
+
+        with target.open("w", encoding="utf-8") as handle:
+            handle.write(_geojson_header(collection.get("name", source.stem)))
+            counts[str(SITE_DIR / source.name)] = _write_features(handle, features())
+    return counts
+
+
+def generate(scale: int, output_root: Path, source_dir: Path = DATA_DIR, seed: int = 0) -> Dict[str, Any]:
+    """Generate the synthetic ``data/`` tree for ``scale`` under ``output_root`` and describe it.
+
+    A ``manifest.json`` with the scale, seed and per-file row counts is written next to ``data/``.
+    """
+    if scale < 1:
+        raise ValueError("scale must be a positive integer")
+    rng = np.random.default_rng(seed)
+    output_dir = output_root / "data"
+    started = time.perf_counter()
+    counts = generate_grid(scale, source_dir, output_dir, rng)
+    counts.update(generate_sites(scale, source_dir, output_dir, rng))
+    manifest = {
+        "scale": scale,
+        "seed": seed,
+        "source": str(source_dir),
+        "seconds": round(time.perf_counter() - started, 2),
+        "rows": counts,
+        "bytes": {name: (output_dir / name).stat().st_size for name in counts},
+    }
+    (output_root / "manifest.json").write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+    return manifest
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scale", type=int, action="append", help="scale factor; repeatable (default: 10, 100 and 1000)"
+    )
+    parser.add_argument("--output", type=Path, default=OUTPUT_DIR, help="parent directory for x<scale>/ trees")
+    parser.add_argument("--source", type=Path, default=DATA_DIR, help="data/ directory to scale up")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    for scale in args.scale or DEFAULT_SCALES:
+        manifest = generate(scale, args.output / f"x{scale}", args.source, args.seed)
+        cells = manifest["rows"][str(GRID_PATH)]
+        size = sum(manifest["bytes"].values()) / 2**20
+        print(f"x{scale}: {cells:,} cells, {size:,.1f} MiB in {manifest['seconds']} s -> {args.output / f'x{scale}'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
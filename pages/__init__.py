@@ -1,4 +1,59 @@
-from .home import home
-from .yeeap import yeeap
-from .data_explorer import data_explorer
-from .need_opportunity import need_opportunity
\ No newline at end of file
+"""Page registry.
+
+Page modules are imported on first navigation rather than when ``app.py`` starts, so the login
+form and home page do not pay for pandas and the geospatial explorer they never render.
+"""
+
+from __future__ import annotations
+
+import importlib
+import logging
+import time
+from typing import Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+# Page function name -> module (relative to this package) that defines it
+_PAGE_MODULES: Dict[str, str] = {
+    "home": ".home",
+    "yeeap": ".yeeap",
+    "data_explorer": ".data_explorer",
+    "need_opportunity": ".need_opportunity",
+}
+
+# Seconds spent importing each page module the first time it was resolved in this process
+IMPORT_TIMINGS: Dict[str, float] = {}
+
+
+def load_page(name: str) -> Callable[[], None]:
+    """Import the module behind page ``name`` if needed and return its render function."""
+    module_name = _PAGE_MODULES[name]
+    qualified_name = f"{__name__}{module_name}"
+    if qualified_name not in IMPORT_TIMINGS:
+        started = time.perf_counter()
+        module = importlib.import_module(module_name, __name__)
+        elapsed = time.perf_counter() - started
+        IMPORT_TIMINGS[qualified_name] = elapsed
+        logger.info("page_import module=%s seconds=%.4f", qualified_name, elapsed)
+    else:
+        module = importlib.import_module(module_name, __name__)
+    return getattr(module, name)
+
+
+def lazy_page(name: str) -> Callable[[], None]:
+    """Return a callable that resolves page ``name`` on first call and renders it."""
+    if name not in _PAGE_MODULES:
+        raise KeyError(f"Unknown page: {name}")
+
+    def render() -> None:
+        load_page(name)()
+
+    render.__name__ = name
+    return render
+
+
+def __getattr__(name: str) -> Callable[[], None]:
+    # Keeps ``pages.home``-style access working without importing every page up front.
+    if name in _PAGE_MODULES:
+        return load_page(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,7 +1,8 @@
-import base64
 import streamlit as st
 from streamlit.components.v1 import html
 
+from src.assets import svg_markup, thumbnail_srcset
+
 def home():
     # Card configuration dictionary
     applications = [
@@ -24,14 +25,11 @@ def home():
     # Generate cards HTML from dictionary
     cards_html = ""
     for app in applications:
-        # Handle preview image - convert to base64 if provided
+        # Handle preview image - reference cached, downscaled WebP thumbnails instead of inlining the source
         if app["preview_image"]:
             try:
-                with open(app["preview_image"], "rb") as img_file:
-                    img_data = base64.b64encode(img_file.read()).decode()
-                    img_ext = app["preview_image"].split(".")[-1].lower()
-                    mime_type = "image/png" if img_ext == "png" else "image/jpeg" if img_ext in ["jpg", "jpeg"] else "image/png"
-                    image_html = f'<img src="data:{mime_type};base64,{img_data}" alt="{app["name"]}" style="width: 100%; height: 100%; object-fit: cover;" />'
+                thumbnail = thumbnail_srcset(app["preview_image"])
+                image_html = f'<img src="{thumbnail["src"]}" srcset="{thumbnail["srcset"]}" alt="{app["name"]}" loading="lazy" decoding="async" style="width: 100%; height: 100%; object-fit: cover;" />'
             except FileNotFoundError:
                 image_html = ""
         else:
@@ -133,30 +131,7 @@ def home():
                     </h1>
                 </div>
                 <div style="flex-shrink: 0; text-align: right;">
-                    <svg width="220" height="44" viewBox="0 0 220 44" fill="none" xmlns="http://www.w3.org/2000/svg">
-                        <g clip-path="url(#clip0_4236_3312)">
-                            <mask id="mask0_4236_3312" style="mask-type:luminance" maskUnits="userSpaceOnUse" x="0" y="0" width="44" height="44">
-                                <path d="M26.4321 35.7078C29.2647 35.6713 31.9516 35.2615 34.3289 34.46C34.93 34.2596 35.4947 34.0319 36.0412 33.7951C35.3763 35.4163 34.4109 36.7552 33.1448 37.7662C30.6401 39.6061 27.689 40.8721 24.492 41.3549C25.2935 39.9704 25.9402 38.0122 26.4321 35.7169M13.1067 39.6334C13.043 39.5879 12.9792 39.5423 12.9155 39.5059C11.8043 38.9594 11.3488 36.482 11.9318 32.6839C14.0722 33.6493 16.4039 34.4053 18.854 34.9336C20.7121 35.3343 22.5611 35.5712 24.3736 35.6713C23.4901 39.5241 22.3516 41.5553 21.5956 41.5553C21.5501 41.5553 21.5045 41.5553 21.459 41.5735C18.4715 41.5553 15.6479 40.863 13.1158 39.6516M2.75979 27.3555C2.58674 26.6998 2.47744 26.0349 2.441 25.3608C3.1059 26.3172 3.92564 27.2462 4.90022 28.148C6.36665 29.5051 8.10632 30.7165 10.0555 31.7548C9.65472 33.9772 9.54542 35.981 9.80045 37.6023C6.45773 35.0702 3.95297 31.4907 2.7689 27.3555M27.6981 21.9635C27.6981 21.1802 27.689 20.3969 27.6617 19.6136C30.1573 19.4496 32.4708 18.8029 34.3653 17.7099C36.1141 21.1802 37.0614 24.8326 37.0522 28.2846C37.0522 29.2865 36.9612 30.2337 36.8063 31.1355C35.9046 31.6911 34.8663 32.1647 33.7004 32.5563C31.6329 33.2486 29.292 33.6311 26.8237 33.6949C27.4158 30.1244 27.7072 25.9893 27.7072 21.9635M19.2639 32.9662C16.7773 32.4379 14.4274 31.6455 12.3052 30.6436C13.0065 27.5013 14.2999 23.694 16.3675 19.4678C16.668 18.8576 16.9686 18.2564 17.2874 17.6644C18.7265 18.3111 20.2931 18.8211 21.9417 19.1764C23.1895 19.4405 24.4374 19.5862 25.667 19.6318C25.6852 20.3878 25.7034 21.162 25.7034 21.9635C25.7034 26.6906 25.33 30.6072 24.7835 33.6767C22.9892 33.6038 21.1402 33.367 19.2821 32.9662M6.25735 26.6724C4.55411 25.0967 3.37915 23.4299 2.78712 21.7722C3.26074 19.9141 4.17157 18.056 5.51958 16.2708C6.79473 14.5767 8.38867 13.0556 10.2103 11.7441C10.7386 12.6913 11.4764 13.6203 12.4145 14.5038C13.3071 15.3418 14.3455 16.0978 15.5022 16.7627C15.1834 17.3638 14.8737 17.9741 14.5732 18.6025C12.7971 22.2458 11.3397 26.1624 10.4836 29.7146C8.89873 28.822 7.47785 27.8018 6.26646 26.6815M26.3319 8.0279C28.6089 9.72203 30.7038 11.9171 32.4526 14.4765C32.7805 14.9593 33.0993 15.4602 33.3907 15.9521C31.7877 16.8811 29.7657 17.4276 27.5706 17.5915C27.3884 14.1304 26.9786 10.7968 26.3228 8.0279M22.3516 17.2181C20.9034 16.9084 19.5189 16.4621 18.2529 15.9065C20.1201 12.6367 22.1694 9.78578 24.1914 7.67268C24.8199 10.1592 25.3482 13.4928 25.5759 17.628C24.5102 17.5824 23.4263 17.4549 22.3607 17.2181M13.7807 13.0374C12.9519 12.2632 12.3234 11.4526 11.8953 10.642C13.7716 9.51254 15.8574 8.59261 18.0707 7.9186C19.3914 7.52695 20.7212 7.22637 22.051 7.02599C20.1292 9.17553 18.2164 11.9171 16.4586 15.0048C15.4567 14.4219 14.5549 13.7661 13.7807 13.0465M9.46344 6.64345C9.43612 6.74364 9.40879 6.84383 9.38147 6.95313C9.18109 7.90038 9.1993 8.86585 9.44523 9.83132C7.28658 11.316 5.41028 13.083 3.91654 15.0594C3.46112 15.6606 3.05125 16.2799 2.68693 16.8993C3.79813 12.7915 6.22092 9.22107 9.47255 6.64345M11.3488 7.37211C11.5674 6.33377 12.1959 5.40473 13.1614 4.63053C15.5022 3.9292 18.2256 4.10225 21.0946 5.1497C19.8924 5.35919 18.681 5.64154 17.4969 5.99676C15.2836 6.66166 13.1978 7.57249 11.2851 8.67458C11.2395 8.23739 11.2578 7.80019 11.3488 7.37211ZM27.6252 4.73072C28.3175 4.28442 28.9459 3.97474 29.4742 3.85633C30.4852 4.25709 31.478 4.77626 32.4253 5.42295C30.9042 5.0404 29.292 4.8127 27.6252 4.73072ZM24.2461 2.58118C25.0567 2.67226 25.9311 2.80889 26.8237 3.01838C26.2681 3.31895 25.6852 3.69238 25.0932 4.14779C24.829 3.55576 24.5467 3.03659 24.2461 2.58118ZM22.0692 3.3736C21.1584 3.02748 20.2658 2.75424 19.3823 2.56296C20.0927 2.48099 20.8123 2.43545 21.5409 2.43545C21.878 2.43545 22.2969 2.85443 22.7432 3.64684C22.5246 3.55576 22.2969 3.45557 22.0783 3.3736M0 21.9999C0 24.0493 0.291463 26.0349 0.828848 27.9111C0.865281 28.0387 0.892606 28.1662 0.929039 28.2937C0.929039 28.321 0.947255 28.3392 0.956363 28.3666C3.67972 37.1651 11.8862 43.5773 21.5683 43.5773C26.0495 43.5773 30.212 42.2019 33.664 39.8611C33.7004 39.8429 33.7369 39.8247 33.7642 39.8065C33.9737 39.6699 34.1649 39.5241 34.3562 39.3693C38.3274 36.4364 41.2603 32.1829 42.4899 27.2554C42.5627 27.0276 42.6174 26.7999 42.672 26.5631C42.6811 26.5085 42.6902 26.4538 42.6902 26.3992C42.9817 24.9874 43.1365 23.5119 43.1365 22.0181C43.1365 19.1035 42.5627 16.2799 41.4424 13.6203C41.2238 13.1103 40.6409 12.8735 40.1308 13.083C39.6208 13.3016 39.384 13.8845 39.5934 14.3945C40.6136 16.8082 41.1327 19.3676 41.1327 22.009C41.1327 23.6303 40.9324 25.1969 40.5589 26.7089C40.2675 27.6561 39.7392 28.5396 39.0196 29.332C39.0378 28.995 39.047 28.6489 39.047 28.2937C39.047 24.4409 37.9904 20.3786 36.0139 16.5623C37.4621 15.3236 38.3821 13.7843 38.7008 12.0628C38.801 11.5163 38.4458 10.9972 37.8993 10.897C37.3528 10.7968 36.8337 11.152 36.7335 11.6985C36.524 12.837 35.9319 13.8754 35.012 14.7589C34.7205 14.2852 34.4291 13.8116 34.1103 13.3471C32.3524 10.7695 30.2575 8.52885 27.9714 6.75275C30.9953 6.95313 33.7915 7.68179 36.0412 8.93872C36.3965 9.1391 36.861 9.12999 37.1889 8.85675C37.617 8.50152 37.6716 7.87306 37.3164 7.44497C34.083 2.92729 28.4905 0.431641 21.5683 0.431641C9.67293 0.431641 0 10.1046 0 21.9999Z" fill="white"/>
-                            </mask>
-                            <g mask="url(#mask0_4236_3312)">
-                                <path d="M43.1365 0.431641H0V43.5682H43.1365V0.431641Z" fill="url(#paint0_radial_4236_3312)"/>
-                            </g>
-                            <path d="M215.054 15.697C218.242 15.697 220 17.2363 220 20.0416C220 22.683 218.269 24.2679 215.373 24.2679H213.342V28.3119H210.655V15.697H215.054ZM213.342 22.0637H214.945C216.502 22.0637 217.295 21.3806 217.295 20.0325C217.295 18.6845 216.43 17.9194 214.863 17.9194H213.342V22.0637ZM205.709 23.2568C205.709 25.1058 204.999 26.0075 203.541 26.0075C202.084 26.0075 201.319 25.0785 201.319 23.2568V15.697H198.632V23.0747C198.632 24.8781 199.078 26.2534 199.971 27.1461C200.8 27.984 202.002 28.403 203.541 28.403C205.755 28.403 208.396 27.474 208.396 23.0656V15.6788H205.709V23.2386V23.2568ZM191.309 15.5877C194.032 15.5877 196.947 17.2727 196.947 22.0181C196.947 26.7635 194.032 28.4121 191.309 28.4121C188.586 28.4121 185.653 26.7362 185.653 22.0181C185.653 17.3001 188.577 15.5877 191.309 15.5877ZM191.309 26.0622C192.375 26.0622 194.169 25.5339 194.169 22.0181C194.169 18.5024 192.375 17.9741 191.309 17.9741C189.451 17.9741 188.431 19.4132 188.431 22.0181C188.431 24.6231 189.451 26.0622 191.309 26.0622ZM182.884 24.4865C183.33 25.3882 183.713 26.1715 184.596 26.1715H185.234V28.2482L185.143 28.2755C185.143 28.2755 184.66 28.403 183.84 28.403C181.718 28.403 181.071 26.9457 180.498 25.6523C180.024 24.5958 179.623 23.6849 178.512 23.6849H177.328V28.3119H174.641V15.697H179.113C182.383 15.697 183.904 16.9722 183.904 19.7046C183.904 21.3988 182.884 22.4371 181.873 22.8925C182.319 23.3297 182.611 23.9126 182.893 24.4865M177.319 21.59H178.822C180.315 21.59 181.244 20.8978 181.244 19.7684C181.244 18.5934 180.434 17.9194 179.022 17.9194H177.328V21.59H177.319ZM167.482 23.694H170.251V23.8307C170.251 24.6504 169.959 26.0166 168.028 26.0166C166.207 26.0166 165.114 24.5229 165.114 22.009C165.114 19.4951 166.152 17.965 167.974 17.965C170.132 17.965 170.214 20.1509 170.214 20.242V20.3878L172.728 19.9961V19.8868C172.728 18.976 171.918 15.5786 167.946 15.5786C164.385 15.5786 162.345 17.9194 162.345 22.009C162.345 26.0986 164.449 28.403 167.983 28.403C171.517 28.403 172.792 25.9256 172.792 23.8124V21.6174H167.491V23.6849L167.482 23.694ZM159.439 15.697H156.242L152.071 21.3714V15.697H149.347V28.3119H152.071V22.51L156.352 28.3119H159.585L154.703 21.9544L159.439 15.7061V15.697ZM144.247 23.4845L139.838 15.697H137.115V28.3119H139.802V20.7885L144.192 28.3119H146.934V15.697H144.247V23.4845ZM131.796 15.779L136.396 28.3119H133.599L132.525 25.2242H128.326L127.287 28.3119H124.473L129.1 15.697H131.769L131.796 15.779ZM130.43 19.1308L129.063 23.1111H131.823L130.43 19.1308ZM121.977 21.6538C122.943 21.9362 124.218 22.8197 124.218 24.7142C124.218 26.9912 122.606 28.3028 119.782 28.3028H114.463V15.6879H119.272C122.005 15.6879 123.389 16.8264 123.389 19.0762C123.389 20.8158 122.597 21.4352 121.986 21.6447M118.981 20.8523C120.101 20.8523 120.62 20.3786 120.62 19.3676C120.62 18.3566 119.955 17.9194 118.644 17.9194H117.141V20.8432H118.972L118.981 20.8523ZM117.15 26.0804H119.254C120.629 26.0804 121.267 25.5612 121.267 24.4591C121.267 23.102 120.146 22.8197 119.199 22.8197H117.15V26.0804ZM103.396 15.697C107.322 15.697 109.663 18.1289 109.663 22.2185C109.663 26.3081 107.568 28.3119 103.925 28.3119H99.653V15.697H103.396ZM102.34 26.0804H103.907C105.837 26.0804 106.994 24.6231 106.994 22.1821C106.994 19.3585 105.774 17.9285 103.36 17.9285H102.34V26.0804ZM92.9402 15.697H90.2533V28.3119H98.396V26.0804H92.9402V15.697ZM86.6373 24.4865C87.0836 25.3882 87.4662 26.1715 88.3497 26.1715H88.9873V28.2482L88.8962 28.2755C88.8962 28.2755 88.4134 28.403 87.5937 28.403C85.4715 28.403 84.8248 26.9457 84.251 25.6523C83.7774 24.5958 83.3766 23.6849 82.2654 23.6849H81.0813V28.3119H78.3944V15.697H82.8665C86.1273 15.697 87.6575 16.9722 87.6575 19.7046C87.6575 21.3988 86.6373 22.4371 85.6263 22.8925C86.0726 23.3297 86.3641 23.9126 86.6464 24.4865M81.0813 21.59H82.5842C84.0779 21.59 84.9979 20.8978 84.9979 19.7684C84.9979 18.5934 84.1872 17.9194 82.7754 17.9194H81.0813V21.59ZM71.2262 15.5877C73.9496 15.5877 76.8642 17.2727 76.8642 22.0181C76.8642 26.7635 73.9496 28.4121 71.2262 28.4121C68.5029 28.4121 65.5791 26.7362 65.5791 22.0181C65.5791 17.3001 68.5029 15.5877 71.2262 15.5877ZM71.2262 26.0622C72.2919 26.0622 74.0862 25.5339 74.0862 22.0181C74.0862 18.5024 72.2919 17.9741 71.2262 17.9741C69.3681 17.9741 68.348 19.4132 68.348 22.0181C68.348 24.6231 69.3681 26.0622 71.2262 26.0622ZM62.1544 15.697H65.1875L61.5624 28.3119H58.5294L56.3252 20.406L54.0937 28.3119H51.0606L47.4355 15.697H50.5597L52.6819 24.8963L55.2231 15.697H57.4819L59.9411 24.8963L62.1453 15.697H62.1544Z" fill="#002F54"/>
-                        </g>
-                        <defs>
-                            <radialGradient id="paint0_radial_4236_3312" cx="0" cy="0" r="1" gradientUnits="userSpaceOnUse" gradientTransform="translate(41.3231 9.76319) scale(35.9602 35.9602)">
-                                <stop stop-color="white"/>
-                                <stop offset="0.06" stop-color="#EAF8FD"/>
-                                <stop offset="0.18" stop-color="#B5E7FA"/>
-                                <stop offset="0.36" stop-color="#60CCF5"/>
-                                <stop offset="0.54" stop-color="#00AEEF"/>
-                                <stop offset="1" stop-color="#002F54"/>
-                            </radialGradient>
-                            <clipPath id="clip0_4236_3312">
-                                <rect width="220" height="43.1365" fill="white" transform="translate(0 0.431641)"/>
-                            </clipPath>
-                        </defs>
-                    </svg>
+                    {logo_svg}
                 </div>
             </div>
             
@@ -211,6 +186,6 @@ def home():
                 </div>
             </div>
         </div>
-        """.format(cards_html=cards_html),
+        """.format(cards_html=cards_html, logo_svg=svg_markup("wb_logo.svg")),
         height=900,
     )
\ No newline at end of file
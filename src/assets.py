@@ -0,0 +1,102 @@
+"""Static asset pipeline: cached, content-hashed thumbnails and memoised SVG markup."""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import os
+from pathlib import Path
+
+import streamlit as st
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+ASSETS_DIR = PROJECT_ROOT / "assets"
+# Streamlit serves ``<app dir>/static`` at ``/app/static`` when ``server.enableStaticServing`` is on.
+STATIC_DIR = PROJECT_ROOT / "static"
+THUMBNAIL_DIR = STATIC_DIR / "cache"
+
+
+def _static_url(relative_path: str, digest: str) -> str:
+    """Build the browser URL for a file under ``STATIC_DIR``.
+
+    The ``v`` query parameter makes Streamlit's static handler send a long-lived cache header;
+    the digest in the file name already guarantees the URL changes whenever the content does.
+    """
+    base_path = (st.get_option("server.baseUrlPath") or "").strip("/")
+    prefix = f"/{base_path}" if base_path else ""
+    return f"{prefix}/app/static/{relative_path}?v={digest}"
+
+
+def _resolve(source: str | Path) -> Path:
+    path = Path(source)
+    return path if path.is_absolute() else PROJECT_ROOT / path
+
+
+def build_thumbnail(source: str | Path, width: int, quality: int = 80) -> Path:
+    """Write a WebP copy of ``source`` scaled down to ``width`` pixels and return its path.
+
+    The output name embeds a hash of the source bytes and encoding settings, so an existing file is
+    reused as-is and a changed source produces a new name rather than overwriting a cached one.
+    """
+    from PIL import Image
+
+    path = _resolve(source)
+    data = path.read_bytes()
+    digest = hashlib.sha256(data + f"|{width}|{quality}".encode("utf-8")).hexdigest()[:12]
+    target = THUMBNAIL_DIR / f"{path.stem}-{width}w.{digest}.webp"
+    if target.exists():
+        return target
+
+    THUMBNAIL_DIR.mkdir(parents=True, exist_ok=True)
+    with Image.open(path) as image:
+        image.thumbnail((width, width * 4))
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        # Write to a temporary name first so concurrent sessions never serve a half-written file.
+        partial = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+        image.save(partial, format="WEBP", quality=quality, method=6)
+    os.replace(partial, target)
+    return target
+
+
+@st.cache_resource(show_spinner=False)
+def thumbnail_srcset(source: str, widths: tuple[int, ...] = (480, 960)) -> dict[str, str]:
+    """Return ``src``/``srcset`` attributes for cached WebP thumbnails of ``source``.
+
+    The first width is used as the 1x ``src``; each further width is listed as the next pixel density.
+    """
+    urls = []
+    for width in widths:
+        target = build_thumbnail(source, width)
+        digest = target.suffixes[-2].lstrip(".")
+        urls.append(_static_url(target.relative_to(STATIC_DIR).as_posix(), digest))
+    srcset = ", ".join(f"{url} {density}x" for density, url in enumerate(urls, start=1))
+    return {"src": urls[0], "srcset": srcset}
+
+
+@st.cache_resource(show_spinner=False)
+def svg_markup(name: str) -> str:
+    """Return the inline markup of an SVG in ``assets/``, read from disk once per process."""
+    path = ASSETS_DIR / name
+    if not path.exists():
+        return ""
+    return path.read_text(encoding="utf-8")
+
+
+@st.cache_resource(show_spinner=False)
+def svg_base64(path: str) -> str:
+    """Return the base64-encoded SVG at the absolute ``path``, read from disk once per process."""
+    return base64.b64encode(Path(path).read_text(encoding="utf-8").encode("utf-8")).decode("utf-8")
+
+
+def use_cached_navbar_logo() -> None:
+    """Make ``st_navbar`` take its logo from :func:`svg_base64` instead of re-reading the file.
+
+    ``st_navbar`` only accepts a logo path and encodes that file on every call through its
+    module-private ``_encode_svg``; there is no parameter for pre-encoded markup. If a future
+    release drops that helper, the navbar simply keeps reading the file itself.
+    """
+    import streamlit_navigation_bar as navbar
+
+    if hasattr(navbar, "_encode_svg"):
+        navbar._encode_svg = svg_base64
@@ -0,0 +1,403 @@
+// Legend, colouring and scoring loops for the explorer. Loaded by worker.js so they run off the
+// main thread; the page also loads it directly as a fallback when workers are unavailable.
+const ExplorerCompute = (() => {
+  const UNKNOWN_COLOR = [148, 163, 184];
+  const EMPTY_SITES = {
+    count: 0,
+    ids: [],
+    lat: new Float32Array(0),
+    lon: new Float32Array(0),
+    types: {},
+    columns: {},
+    categories: {},
+  };
+  const EMPTY_LEVEL = { resolution: null, cellCount: 0, columns: {} };
+  // Layer id of the on-demand columns Python computes for the finest level (hotspots and the like)
+  const DERIVED_LAYER = "__derived__";
+  let siteFeatures = {};
+  // One entry per grid level, finest first: { resolution, cellCount, columns: { layerId: { variableId: Float32Array } } }
+  let gridLevels = [];
+  // Interleaved lon/lat centroid of every cell of the finest level, for zonal statistics
+  let gridCentroids = new Float64Array(0);
+
+  function toNumber(value) {
+    if (value === null || value === undefined || value === "") return null;
+    const num = Number(value);
+    return Number.isFinite(num) ? num : null;
+  }
+
+  function applyLogScale(value) {
+    // log(1 + value) keeps zeros defined; negative values cannot be scaled.
+    if (value === null || value < 0) return null;
+    return Math.log(1 + value);
+  }
+
+  function parseHex(hex) {
+    const num = parseInt(hex.slice(1), 16);
+    return [(num >> 16) & 255, (num >> 8) & 255, num & 255];
+  }
+
+  // Diverging maps pass through colorMap.mid at t = 0.5.
+  function interpolate(t, colorMap, target, offset) {
+    let clamp = Math.min(1, Math.max(0, t));
+    let from = colorMap.start;
+    let to = colorMap.end;
+    if (colorMap.mid) {
+      [from, to] = clamp < 0.5 ? [colorMap.start, colorMap.mid] : [colorMap.mid, colorMap.end];
+      clamp = clamp < 0.5 ? clamp * 2 : (clamp - 0.5) * 2;
+    }
+    for (let channel = 0; channel < 3; channel += 1) {
+      target[offset + channel] = Math.round(from[channel] + (to[channel] - from[channel]) * clamp);
+    }
+  }
+
+  function decodeFloat32(base64) {
+    const binary = atob(base64);
+    const bytes = new Uint8Array(binary.length);
+    for (let index = 0; index < binary.length; index += 1) {
+      bytes[index] = binary.charCodeAt(index);
+    }
+    return new Float32Array(bytes.buffer);
+  }
+
+  // Site datasets arrive as columns: ids, base64 float32 coordinates and one value array per
+  // property, so per-site loops index arrays instead of walking an object per feature. Categorical
+  // columns hold integer codes into sites.categories[field] (-1 when missing).
+  function decodeSites(featuresJson) {
+    const datasets = JSON.parse(featuresJson);
+    Object.values(datasets).forEach((sites) => {
+      sites.lat = decodeFloat32(sites.lat);
+      sites.lon = decodeFloat32(sites.lon);
+      Object.keys(sites.categories).forEach((field) => {
+        sites.columns[field] = Int32Array.from(sites.columns[field]);
+      });
+    });
+    return datasets;
+  }
+
+  function siteValue(sites, field, index) {
+    const column = sites.columns[field];
+    if (!column) return undefined;
+    const labels = sites.categories[field];
+    if (!labels) return column[index];
+    const code = column[index];
+    return code < 0 ? null : labels[code];
+  }
+
+  function isMissing(value) {
+    return value === null || value === undefined || value === "";
+  }
+
+  // Codes and labels for a categorical variable; columns Python did not encode are encoded here.
+  function categoryCodes(sites, field) {
+    if (sites.categories[field]) {
+      return { codes: sites.columns[field], labels: sites.categories[field] };
+    }
+    const column = sites.columns[field] || [];
+    const codes = new Int32Array(sites.count).fill(-1);
+    const labels = [];
+    const lookup = new Map();
+    for (let index = 0; index < sites.count; index += 1) {
+      const raw = column[index];
+      if (isMissing(raw)) continue;
+      let code = lookup.get(raw);
+      if (code === undefined) {
+        code = labels.length;
+        lookup.set(raw, code);
+        labels.push(raw);
+      }
+      codes[index] = code;
+    }
+    return { codes, labels };
+  }
+
+  function loadSites(featuresJson) {
+    siteFeatures = decodeSites(featuresJson);
+    return { datasets: Object.keys(siteFeatures).length };
+  }
+
+  // Level values arrive as one base64 float32 column per variable in cell order; NaN is missing.
+  function decodeLevel({ resolution, cellCount, values }) {
+    const columns = {};
+    Object.entries(values).forEach(([layerId, variables]) => {
+      columns[layerId] = {};
+      Object.entries(variables).forEach(([variableId, column]) => {
+        columns[layerId][variableId] = decodeFloat32(column);
+      });
+    });
+    return { resolution, cellCount, columns };
+  }
+
+  function loadGrid({ levels, centroids }) {
+    gridLevels = levels.map(decodeLevel);
+    gridCentroids = centroids;
+    return { levels: gridLevels.length };
+  }
+
+  // Fine-resolution cells sent for the current viewport go into their own level slot.
+  function loadGridLevel({ level, ...data }) {
+    gridLevels[level] = decodeLevel(data);
+    return { cells: data.cellCount };
+  }
+
+  // On-demand columns for the finest level replace the previous ones.
+  function loadDerivedColumns({ columns }) {
+    const level = gridLevels[0];
+    if (!level) return { columns: 0 };
+    level.columns[DERIVED_LAYER] = {};
+    Object.entries(columns).forEach(([variableId, column]) => {
+      level.columns[DERIVED_LAYER][variableId] = decodeFloat32(column);
+    });
+    return { columns: Object.keys(columns).length };
+  }
+
+  function classifySites({ datasetId, variable, colorMap }) {
+    const sites = siteFeatures[datasetId] || EMPTY_SITES;
+    const count = sites.count;
+    const rgb = new Uint8Array(count * 3);
+    if (variable.type === "categorical") {
+      const palette = colorMap.colors.map(parseHex);
+      const { codes, labels } = categoryCodes(sites, variable.id);
+      // Palette slot per code, assigned in order of first appearance; slot 0 of the table is the
+      // missing code (-1), which shares its slot with a literal "Unknown" label.
+      const unknownCode = labels.findIndex((label) => String(label) === "Unknown");
+      const slots = new Int16Array(labels.length + 1).fill(-1);
+      const categories = [];
+      for (let index = 0; index < count; index += 1) {
+        const code = codes[index] === unknownCode ? -1 : codes[index];
+        let slot = slots[code + 1];
+        if (slot === -1) {
+          slot = categories.length < palette.length ? categories.length : -2;
+          slots[code + 1] = slot;
+          if (slot >= 0) {
+            categories.push({ value: code < 0 ? "Unknown" : String(labels[code]), color: colorMap.colors[slot] });
+          }
+        }
+        rgb.set(slot >= 0 ? palette[slot] : UNKNOWN_COLOR, index * 3);
+      }
+      if (!categories.length) {
+        categories.push({ value: "Unknown", color: colorMap.colors[0] });
+      }
+      return { legend: { type: "categorical", categories }, rgb };
+    }
+    const values = new Float64Array(count);
+    let min = Infinity;
+    let max = -Infinity;
+    for (let index = 0; index < count; index += 1) {
+      const value = toNumber(siteValue(sites, variable.id, index));
+      values[index] = value === null ? NaN : value;
+      if (value === null) continue;
+      if (value < min) min = value;
+      if (value > max) max = value;
+    }
+    if (!Number.isFinite(min) || !Number.isFinite(max)) {
+      return { legend: null, rgb };
+    }
+    if (min === max) {
+      max = min + 1;
+    }
+    values.forEach((value, index) => {
+      if (Number.isNaN(value)) {
+        rgb.set(UNKNOWN_COLOR, index * 3);
+      } else {
+        interpolate((value - min) / (max - min), colorMap, rgb, index * 3);
+      }
+    });
+    return { legend: { type: "numeric", min, max }, rgb };
+  }
+
+  // symmetric centres the colour range on zero; significance ({ variableId, alpha }) names a
+  // p-value column of the same layer, and cells at or above alpha are greyed out.
+  function classifyGrid({ level, layerId, variable, useLogScale, colorMap, symmetric = false, significance = null }) {
+    const { resolution, cellCount, columns } = gridLevels[level] || EMPTY_LEVEL;
+    const source = columns[layerId]?.[variable.id];
+    const pValues = significance ? columns[layerId]?.[significance.variableId] : null;
+    const muted = new Uint8Array(cellCount);
+    const values = source ? Float64Array.from(source) : new Float64Array(cellCount).fill(NaN);
+    const scaled = new Float64Array(cellCount);
+    const rgb = new Uint8Array(cellCount * 3);
+    const visible = new Uint8Array(cellCount);
+    let min = Infinity;
+    let max = -Infinity;
+    let originalMin = Infinity;
+    let originalMax = -Infinity;
+    for (let index = 0; index < cellCount; index += 1) {
+      const original = values[index];
+      scaled[index] = NaN;
+      if (Number.isNaN(original)) continue;
+      if (original < originalMin) originalMin = original;
+      if (original > originalMax) originalMax = original;
+      const value = useLogScale ? applyLogScale(original) : original;
+      if (value === null) continue;
+      scaled[index] = value;
+      if (value < min) min = value;
+      if (value > max) max = value;
+    }
+    if (!Number.isFinite(min) || !Number.isFinite(max)) {
+      originalMin = toNumber(variable.min);
+      originalMax = toNumber(variable.max);
+      min = useLogScale ? applyLogScale(originalMin) : originalMin;
+      max = useLogScale ? applyLogScale(originalMax) : originalMax;
+    }
+    if (!Number.isFinite(min) || !Number.isFinite(max)) {
+      return { legend: null, rgb, visible, values };
+    }
+    if (symmetric) {
+      max = Math.max(Math.abs(min), Math.abs(max));
+      min = -max;
+      originalMin = min;
+      originalMax = max;
+    }
+    if (min === max) {
+      max = min + 1;
+    }
+    for (let index = 0; index < cellCount; index += 1) {
+      if (Number.isNaN(scaled[index])) {
+        rgb.set(UNKNOWN_COLOR, index * 3);
+        continue;
+      }
+      visible[index] = 1;
+      if (pValues && !(pValues[index] < significance.alpha)) {
+        muted[index] = 1;
+        rgb.set(UNKNOWN_COLOR, index * 3);
+        continue;
+      }
+      interpolate((scaled[index] - min) / (max - min), colorMap, rgb, index * 3);
+    }
+    return {
+      legend: { type: "numeric", min, max, originalMin, originalMax, useLogScale, resolution, alpha: significance?.alpha },
+      rgb,
+      visible,
+      values,
+      muted,
+    };
+  }
+
+  // Scores are computed on the finest level, the grid the source CSVs describe.
+  function scoreCells({ layerId, weights }) {
+    const { cellCount, columns: levelColumns } = gridLevels[0] || EMPTY_LEVEL;
+    const columns = levelColumns[layerId] || {};
+    const need = new Float32Array(cellCount);
+    const opportunity = new Float32Array(cellCount);
+    const scored = new Uint8Array(cellCount);
+    Object.entries(weights).forEach(([scoreId, weight]) => {
+      const column = columns[scoreId];
+      if (!column) return;
+      for (let index = 0; index < cellCount; index += 1) {
+        const value = column[index];
+        if (Number.isNaN(value)) continue;
+        need[index] += weight.need * value;
+        opportunity[index] += weight.opp * value;
+        scored[index] = 1;
+      }
+    });
+    const combined = new Float32Array(cellCount);
+    let count = 0;
+    let needSum = 0;
+    let opportunitySum = 0;
+    for (let index = 0; index < cellCount; index += 1) {
+      combined[index] = need[index] + opportunity[index];
+      if (!scored[index]) continue;
+      count += 1;
+      needSum += need[index];
+      opportunitySum += opportunity[index];
+    }
+    const meanNeed = count ? needSum / count : 0;
+    const meanOpportunity = count ? opportunitySum / count : 0;
+    return {
+      need,
+      opportunity,
+      combined,
+      scored,
+      summary: { cells: count, need: meanNeed, opportunity: meanOpportunity, combined: meanNeed + meanOpportunity },
+    };
+  }
+
+  // Even-odd test of (x, y) against a closed ring of [x, y] vertices (as in src/h3_grid.py).
+  function pointInRing(x, y, ring) {
+    let inside = false;
+    for (let index = 1; index < ring.length; index += 1) {
+      const [x1, y1] = ring[index - 1];
+      const [x2, y2] = ring[index];
+      if (y1 > y !== y2 > y && x < x1 + ((y - y1) * (x2 - x1)) / (y2 - y1)) {
+        inside = !inside;
+      }
+    }
+    return inside;
+  }
+
+  // Combines values at the given positions with a rollup operator (see src/grid_aggregation.py):
+  // missing values are skipped and "mean" is weighted when the weights in the zone are not all zero.
+  function aggregateZone(column, positions, operator, weights) {
+    let count = 0;
+    let total = 0;
+    let weighted = 0;
+    let weightTotal = 0;
+    let extreme = operator === "min" ? Infinity : -Infinity;
+    positions.forEach((position) => {
+      const value = column[position];
+      if (Number.isNaN(value)) return;
+      count += 1;
+      total += value;
+      if (operator === "min" && value < extreme) extreme = value;
+      if (operator === "max" && value > extreme) extreme = value;
+      const weight = weights ? weights[position] : NaN;
+      if (!Number.isNaN(weight)) {
+        weighted += value * weight;
+        weightTotal += weight;
+      }
+    });
+    if (!count) return null;
+    if (operator === "sum") return total;
+    if (operator === "mean") return weightTotal > 0 ? weighted / weightTotal : total / count;
+    return extreme;
+  }
+
+  // Statistics of the finest level's cells whose centroid lies in polygon ([lon, lat] ring).
+  // variables maps layer ids to [{ id, aggregation }]; weight names the population column.
+  function zonalStatistics({ polygon, variables, weight }) {
+    const { cellCount, columns } = gridLevels[0] || EMPTY_LEVEL;
+    let west = Infinity;
+    let south = Infinity;
+    let east = -Infinity;
+    let north = -Infinity;
+    polygon.forEach(([x, y]) => {
+      west = Math.min(west, x);
+      east = Math.max(east, x);
+      south = Math.min(south, y);
+      north = Math.max(north, y);
+    });
+    const positions = [];
+    for (let position = 0; position < cellCount; position += 1) {
+      const x = gridCentroids[position * 2];
+      const y = gridCentroids[position * 2 + 1];
+      if (x < west || x > east || y < south || y > north) continue;
+      if (pointInRing(x, y, polygon)) positions.push(position);
+    }
+    const weights = weight ? columns[weight.layerId]?.[weight.variableId] : null;
+    const values = {};
+    Object.entries(variables).forEach(([layerId, layerVariables]) => {
+      values[layerId] = {};
+      layerVariables.forEach((variable) => {
+        const column = columns[layerId]?.[variable.id];
+        values[layerId][variable.id] = column ? aggregateZone(column, positions, variable.aggregation, weights) : null;
+      });
+    });
+    return { cells: positions.length, values };
+  }
+
+  return {
+    EMPTY_SITES,
+    DERIVED_LAYER,
+    decodeSites,
+    siteValue,
+    loadSites,
+    loadGrid,
+    loadGridLevel,
+    loadDerivedColumns,
+    classifySites,
+    classifyGrid,
+    scoreCells,
+    zonalStatistics,
+  };
+})();
@@ -0,0 +1,1717 @@
+// Payload globals are filled by loadPayload() once Python ships the data through component args.
+let SITE_DATASETS = {};
+// Per dataset: { count, ids, lat, lon, types, columns }, one array per property (see decodeSites)
+let SITE_FEATURES = {};
+let GRID_DATASETS_META = { feature_sets: {} };
+// Grid levels, finest first: { resolution, minZoom, cellIds, geometry } (values live in the compute worker)
+let GRID_LEVELS = [];
+// Resolutions finer than the payload levels, sent by Python for the viewport: { resolution, minZoom }
+let VIEWPORT_LEVELS = [];
+let GRID_LAYERS = [];
+let datasetIds = [];
+let payloadVersion = null;
+
+const PTI_SCORES = [
+  { id: "population_score", label: "Population pressure" },
+  { id: "displacement_score", label: "Displacement" },
+  { id: "climate_score", label: "Climate exposure" },
+  { id: "conflict_score", label: "Conflict" },
+  { id: "food_nutrition_security_score", label: "Food & nutrition" },
+  { id: "access_services_score", label: "Access to services" },
+  { id: "economic_activity_score", label: "Economic activity" },
+];
+
+const CATEGORY_COLORS = [
+  "#5b63f4",
+  "#22d3ee",
+  "#34d399",
+  "#facc15",
+  "#f97316",
+  "#f472b6",
+  "#14b8a6",
+  "#ef4444",
+  "#a855f7",
+  "#0ea5e9",
+];
+
+const COLOR_MAPS = {
+  continuous: [
+    { id: "blue-red", name: "Blue to Red", start: [91, 99, 244], end: [239, 68, 68] },
+    { id: "viridis", name: "Viridis", start: [68, 1, 84], end: [253, 231, 37] },
+    { id: "plasma", name: "Plasma", start: [13, 8, 135], end: [240, 249, 33] },
+    { id: "green-blue", name: "Green to Blue", start: [34, 211, 153], end: [14, 165, 233] },
+    { id: "purple-orange", name: "Purple to Orange", start: [168, 85, 247], end: [249, 115, 22] },
+  ],
+  // Cold to hot around zero, for z-scores
+  diverging: { id: "cold-hot", name: "Cold to Hot", start: [37, 99, 235], mid: [241, 245, 249], end: [220, 38, 38] },
+  categorical: [
+    { id: "default", name: "Default", colors: CATEGORY_COLORS },
+    { id: "pastel", name: "Pastel", colors: ["#a8e6cf", "#ffd3b6", "#ffaaa5", "#ff8b94", "#c7ceea", "#b4a7d6", "#dda0dd", "#98d8c8"] },
+    { id: "bright", name: "Bright", colors: ["#ff6b6b", "#4ecdc4", "#45b7d1", "#f9ca24", "#f0932b", "#eb4d4b", "#6c5ce7", "#a29bfe"] },
+    { id: "earth", name: "Earth tones", colors: ["#8b4513", "#cd853f", "#daa520", "#b8860b", "#9acd32", "#6b8e23", "#556b2f", "#2f4f2f"] },
+  ],
+};
+
+function createComputeClient() {
+  const runInline = (type, payload) => Promise.resolve().then(() => ExplorerCompute[type](payload));
+  let worker = null;
+  try {
+    worker = new Worker("worker.js");
+  } catch (error) {
+    worker = null;
+  }
+  if (!worker) {
+    // Browsers without worker support in this frame run compute.js inline.
+    return { call: runInline };
+  }
+  const pending = new Map();
+  // Latest payload of each load* call in the order they were made, replayed inline if the worker
+  // dies after loading data. Viewport levels and derived columns belong to the grid loaded before
+  // them, so loading a grid drops them.
+  const loads = new Map();
+  const GRID_DEPENDENT_LOADS = ["loadGridLevel", "loadDerivedColumns"];
+  let nextId = 0;
+  worker.onmessage = (event) => {
+    const { id, result, error } = event.data;
+    const request = pending.get(id);
+    if (!request) return;
+    pending.delete(id);
+    if (error) {
+      request.reject(new Error(error));
+    } else {
+      request.resolve(result);
+    }
+  };
+  worker.onerror = (event) => {
+    // worker.js failed to load or threw outside a request; no reply will ever come, so switch to
+    // compute.js inline: reload the data and re-run the pending requests (rejecting any that fail).
+    console.error("Compute worker failed, running inline:", event.message);
+    worker.terminate();
+    worker = null;
+    const requests = [...pending.values()];
+    pending.clear();
+    const replayed = new Map();
+    loads.forEach((payload, type) => {
+      try {
+        replayed.set(type, { result: ExplorerCompute[type](payload) });
+      } catch (error) {
+        console.error(`Inline ${type} failed:`, error);
+        replayed.set(type, { error });
+      }
+    });
+    requests.forEach((request) => {
+      if (!request.type.startsWith("load")) {
+        runInline(request.type, request.payload).then(request.resolve, request.reject);
+      } else if (loads.get(request.type) !== request.payload) {
+        // Superseded by a later load of the same kind (or dropped with an older grid)
+        request.resolve(null);
+      } else {
+        const { result, error } = replayed.get(request.type);
+        if (error) {
+          request.reject(error);
+        } else {
+          request.resolve(result);
+        }
+      }
+    });
+  };
+  return {
+    call(type, payload) {
+      if (type === "loadGrid") {
+        GRID_DEPENDENT_LOADS.forEach((dependent) => loads.delete(dependent));
+      }
+      if (type.startsWith("load")) {
+        // Re-inserting keeps the map in call order, so a grid replays before what depends on it
+        loads.delete(type);
+        loads.set(type, payload);
+      }
+      if (!worker) {
+        return runInline(type, payload);
+      }
+      nextId += 1;
+      const id = nextId;
+      return new Promise((resolve, reject) => {
+        pending.set(id, { type, payload, resolve, reject });
+        worker.postMessage({ id, type, payload });
+      });
+    },
+  };
+}
+
+function rgbAt(rgb, index) {
+  const offset = index * 3;
+  return `rgb(${rgb[offset]}, ${rgb[offset + 1]}, ${rgb[offset + 2]})`;
+}
+
+function getColorMap(variable, colorMapId) {
+  const maps = variable.type === "categorical" ? COLOR_MAPS.categorical : COLOR_MAPS.continuous;
+  return maps.find((m) => m.id === colorMapId) || maps[0];
+}
+
+function updateGridLegendPanel(legend, layerMeta, variable) {
+  if (!mapGridLegend) return;
+  if (!legend || !variable || !state.showGrid) {
+    mapGridLegend.classList.add("hidden");
+    mapGridLegend.innerHTML = "";
+    return;
+  }
+  mapGridLegend.classList.remove("hidden");
+  const levelLabel = legend.resolution !== undefined && legend.resolution !== null ? ` · H3 res ${legend.resolution}` : "";
+  const datasetLabel = `${layerMeta?.name ?? "Grid layer"}${levelLabel}`;
+  const variableLabel = escapeHtml(variable?.label ?? "Variable");
+  if (legend.type === "numeric") {
+    // Use original values for display if log scale is applied
+    const displayMin = legend.originalMin !== undefined ? legend.originalMin : legend.min;
+    const displayMax = legend.originalMax !== undefined ? legend.originalMax : legend.max;
+    mapGridLegend.innerHTML = `
+      <div class="map-legend-header">
+        <span>${datasetLabel}</span>
+        <strong>${variableLabel}</strong>
+      </div>
+      <div class="map-legend-title">Legend</div>
+      <div class="map-legend-gradient">
+        <div class="map-legend-gradient-bar"></div>
+        <div class="map-legend-gradient-labels">
+          <span>${formatLegendValue(displayMin)}</span>
+          <span>${formatLegendValue(displayMax)}</span>
+        </div>
+      </div>
+    `;
+  } else {
+    const items = legend.categories
+      .map((entry) => `
+        <div class="map-legend-item">
+          <span class="map-legend-swatch" style="background:${entry.color};"></span>
+          <span>${entry.value}</span>
+        </div>
+      `)
+      .join("");
+    mapGridLegend.innerHTML = `
+      <div class="map-legend-header">
+        <span>${datasetLabel}</span>
+        <strong>${variableLabel}</strong>
+      </div>
+      <div class="map-legend-title">Legend</div>
+      <div class="map-legend-items">${items}</div>
+    `;
+  }
+}
+
+function updateLegend(legend, variable, colorMapId) {
+  if (!mapLegend) return;
+  const dataset = getActiveDataset();
+  const variableLabel = variable ? variable.label : "None";
+  mapLegend.classList.remove("hidden");
+  if (!legend || !variable) {
+    mapLegend.innerHTML = `
+      <div class="map-legend-header">
+        <span>${dataset?.label ?? "Sites"}</span>
+        <strong>${variableLabel}</strong>
+      </div>
+      <div class="map-legend-title">Legend</div>
+      <div class="empty-state" style="background:rgba(255,255,255,0.04);border-radius:12px;padding:0.5rem;text-align:center;">No color mapping</div>
+    `;
+    return;
+  }
+  if (legend.type === "numeric") {
+    const map = COLOR_MAPS.continuous.find(m => m.id === colorMapId) || COLOR_MAPS.continuous[0];
+    const startColor = `rgb(${map.start[0]}, ${map.start[1]}, ${map.start[2]})`;
+    const endColor = `rgb(${map.end[0]}, ${map.end[1]}, ${map.end[2]})`;
+    mapLegend.innerHTML = `
+      <div class="map-legend-header">
+        <span>${dataset.label}</span>
+        <strong>${variableLabel}</strong>
+      </div>
+      <div class="map-legend-title">Legend</div>
+      <div class="map-legend-gradient">
+        <div class="map-legend-gradient-bar" style="background: linear-gradient(90deg, ${startColor} 0%, ${endColor} 100%);"></div>
+        <div class="map-legend-gradient-labels">
+          <span>${formatLegendValue(legend.min)}</span>
+          <span>${formatLegendValue(legend.max)}</span>
+        </div>
+      </div>
+    `;
+  } else {
+    const items = legend.categories
+      .map((entry) => `
+        <div class="map-legend-item">
+          <span class="map-legend-swatch" style="background:${entry.color};"></span>
+          <span>${entry.value}</span>
+        </div>
+      `)
+      .join("");
+    mapLegend.innerHTML = `
+      <div class="map-legend-header">
+        <span>${dataset.label}</span>
+        <strong>${variableLabel}</strong>
+      </div>
+      <div class="map-legend-title">Legend</div>
+      <div class="map-legend-items">${items}</div>
+    `;
+  }
+}
+
+const state = {
+  siteDataset: null,
+  siteVariable: "__none__",
+  gridLayer: null,
+  gridVariable: null,
+  sites: ExplorerCompute.EMPTY_SITES,
+  selectedIndex: 0,
+  markerSize: 3,
+  showSites: true,
+  showGrid: true,
+  colorMap: "blue-red",
+  useLogScale: false,
+  // Gi* neighbourhood in rings for the hotspot view of the grid variable; 0 shows raw values
+  hotspotRings: 0,
+  // Derived-variable expressions added by the user, evaluated by Python as variables of their own layer
+  expressions: [],
+  weights: PTI_SCORES.reduce((acc, item) => {
+    acc[item.id] = {
+      need: item.id === "population_score" || item.id === "displacement_score" ? 1 : 0,
+      opp: item.id === "access_services_score" || item.id === "economic_activity_score" ? 1 : 0,
+    };
+    return acc;
+  }, {}),
+};
+
+const siteDatasetSelect = document.getElementById("site-dataset");
+const siteVariableSelect = document.getElementById("site-variable");
+const colorMapSelect = document.getElementById("color-map");
+const toggleSites = document.getElementById("toggle-sites");
+const markerSizeValue = document.getElementById("marker-size-value");
+const siteLegend = document.getElementById("site-legend");
+const gridLayerSelect = document.getElementById("grid-layer");
+const gridVariableSelect = document.getElementById("grid-variable");
+const gridLegend = document.getElementById("grid-legend");
+const toggleGrid = document.getElementById("toggle-grid");
+const toggleNeed = document.getElementById("toggle-need");
+const toggleLogScale = document.getElementById("toggle-log-scale");
+const gridHotspotsSelect = document.getElementById("grid-hotspots");
+const gridDerivedNote = document.getElementById("grid-derived-note");
+const gridExpressionInput = document.getElementById("grid-expression");
+const gridExpressionAddButton = document.getElementById("grid-expression-add");
+const gridExpressionRemoveButton = document.getElementById("grid-expression-remove");
+const tabButtons = document.querySelectorAll(".tab");
+const mapContainer = document.getElementById("map-container");
+const mapLegend = document.getElementById("map-site-legend");
+const mapGridLegend = document.getElementById("map-grid-legend");
+const markerSizeInput = document.getElementById("marker-size");
+const weightsTable = document.getElementById("weights-table");
+const scoreSummary = document.getElementById("score-summary");
+const detailType = document.getElementById("detail-type");
+const detailTitle = document.getElementById("detail-title");
+const detailSubtitle = document.getElementById("detail-subtitle");
+const siteAttributesEl = document.getElementById("site-attributes");
+const gridAttributesEl = document.getElementById("grid-attributes");
+const zoneDrawButton = document.getElementById("zone-draw");
+const zoneFinishButton = document.getElementById("zone-finish");
+const zoneClearButton = document.getElementById("zone-clear");
+const zoneAttributesEl = document.getElementById("zone-attributes");
+const catchmentPickButton = document.getElementById("catchment-pick");
+const catchmentClearButton = document.getElementById("catchment-clear");
+const catchmentOriginEl = document.getElementById("catchment-origin");
+const catchmentAttributesEl = document.getElementById("catchment-attributes");
+const coverageKInput = document.getElementById("coverage-k");
+const coverageRadiusSelect = document.getElementById("coverage-radius");
+const coveragePopulationSelect = document.getElementById("coverage-population");
+const coverageRunButton = document.getElementById("coverage-run");
+const coverageClearButton = document.getElementById("coverage-clear");
+const coverageSummaryEl = document.getElementById("coverage-summary");
+const coverageSitesEl = document.getElementById("coverage-sites");
+
+function syncControls() {
+  if (markerSizeInput) {
+    markerSizeInput.value = state.markerSize;
+    markerSizeInput.min = 1;
+    markerSizeInput.max = 18;
+    if (markerSizeValue) {
+      markerSizeValue.textContent = state.markerSize;
+    }
+  }
+  if (toggleSites) {
+    toggleSites.checked = state.showSites;
+  }
+  if (toggleGrid) {
+    toggleGrid.checked = state.showGrid;
+  }
+  if (toggleLogScale) {
+    toggleLogScale.checked = state.useLogScale;
+  }
+}
+
+let map = null;
+let markersLayer = null;
+// One GeoJSON layer per grid level, built on first use; gridOverlayLayer is the one on the map
+let gridOverlayLayers = [];
+let gridOverlayLayer = null;
+let gridResult = null;
+// Fine-resolution cells around the viewport ({ key, resolution, bounds, cellIds, geometry }), held in
+// the level slot after the payload levels
+let gridViewport = null;
+let siteClassification = { key: null, result: null };
+let siteRequestSeq = 0;
+let gridRequestSeq = 0;
+let scoreRequestSeq = 0;
+
+let requestedVersion = null;
+let argsView = null;
+// Full properties and grid context of the selected site, sent by Python after the selection is reported
+let siteDetail = null;
+// Python sends each requested result (site detail, catchments, suggestions, derived column) in full
+// once, as { key, result }, then only as { key } while the explorer reports holding that key here.
+let received = {};
+
+// Area of interest drawn on the map: [lat, lng] vertices, the outline layer and its statistics
+const zone = { drawing: false, vertices: [], layer: null, result: null };
+let zoneRequestSeq = 0;
+// Clicked point whose catchments Python computes ({ lat, lon }), its map layer and the last result
+const catchment = { picking: false, point: null, layer: null, result: null };
+// New-site suggestions: the request reported to Python ({ k, radiusKm, population }), its result and map layer
+const coverage = { request: null, result: null, layer: null };
+// On-demand grid column computed by Python (see derivedRequest): the last result ({ request, label,
+// error }; its columns live in the compute worker) and the request last reported
+const derived = { result: null, reported: null };
+
+const compute = createComputeClient();
+
+function getActiveDataset() {
+  return SITE_DATASETS[state.siteDataset];
+}
+
+function getActiveSiteVariable() {
+  if (state.siteVariable === "__none__" || !state.siteVariable) {
+    return null;
+  }
+  const dataset = getActiveDataset();
+  return dataset.color_fields.find((field) => field.id === state.siteVariable) ?? null;
+}
+
+function formatLegend(variable) {
+  if (!variable) return ["–", "–"];
+  if (variable.type === "categorical") {
+    const size = variable.categories ? variable.categories.length : "";
+    return ["Categorical", size ? `${size} values` : "—"];
+  }
+  const formatter = new Intl.NumberFormat("en-US", { maximumFractionDigits: variable.max > 10 ? 0 : 2 });
+  return [formatter.format(variable.min ?? 0), formatter.format(variable.max ?? 0)];
+}
+
+// Expression texts are user input and may hold "<" or "&"
+function escapeHtml(text) {
+  return String(text).replace(/[&<>"]/g, (char) => ({ "&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;" })[char]);
+}
+
+function formatLegendValue(value) {
+  if (value === null || value === undefined) return "—";
+  if (typeof value === "number") {
+    const formatter = new Intl.NumberFormat("en-US", { maximumFractionDigits: Math.abs(value) < 1 ? 2 : 0 });
+    return formatter.format(value);
+  }
+  return String(value);
+}
+
+function renderSiteSelectors() {
+  siteDatasetSelect.innerHTML = datasetIds
+    .map((id) => `<option value="${id}">${SITE_DATASETS[id].label}</option>`)
+    .join("");
+  siteDatasetSelect.value = state.siteDataset;
+  updateSiteVariables();
+}
+
+function updateSiteVariables() {
+  const dataset = getActiveDataset();
+  siteVariableSelect.innerHTML = `<option value="__none__">None</option>` + dataset.color_fields
+    .map((variable) => `<option value="${variable.id}">${variable.label}</option>`)
+    .join("");
+  if (state.siteVariable === "__none__" || !dataset.color_fields.find((field) => field.id === state.siteVariable)) {
+    state.siteVariable = "__none__";
+  }
+  siteVariableSelect.value = state.siteVariable ?? "__none__";
+  const variable = getActiveSiteVariable();
+  updateColorMapOptions(variable);
+}
+
+function updateColorMapOptions(variable) {
+  if (!colorMapSelect) return;
+  if (!variable) {
+    colorMapSelect.disabled = true;
+    colorMapSelect.style.opacity = "0.5";
+    colorMapSelect.style.cursor = "not-allowed";
+    return;
+  }
+  colorMapSelect.disabled = false;
+  colorMapSelect.style.opacity = "1";
+  colorMapSelect.style.cursor = "pointer";
+  const maps = variable.type === "categorical" ? COLOR_MAPS.categorical : COLOR_MAPS.continuous;
+  colorMapSelect.innerHTML = maps
+    .map((map) => `<option value="${map.id}">${map.name}</option>`)
+    .join("");
+  if (!maps.find(m => m.id === state.colorMap)) {
+    state.colorMap = maps[0].id;
+  }
+  colorMapSelect.value = state.colorMap;
+}
+
+function renderGridSelectors() {
+  gridLayerSelect.innerHTML = GRID_LAYERS.map(
+    (layer) => `<option value="${layer.id}">${layer.name}</option>`
+  ).join("");
+  gridLayerSelect.value = state.gridLayer;
+  const rings = GRID_DATASETS_META.hotspots?.rings || [];
+  gridHotspotsSelect.innerHTML = ['<option value="0">Off</option>']
+    .concat(rings.map((ring) => `<option value="${ring}">${ring}-ring neighbourhood</option>`))
+    .join("");
+  if (!rings.includes(state.hotspotRings)) {
+    state.hotspotRings = 0;
+  }
+  gridHotspotsSelect.value = String(state.hotspotRings);
+  updateGridVariables();
+}
+
+function updateGridVariables() {
+  const layer = GRID_LAYERS.find((item) => item.id === state.gridLayer);
+  gridVariableSelect.replaceChildren(...layer.variables.map((variable) => new Option(variable.label, variable.id)));
+  if (!layer.variables.find((item) => item.id === state.gridVariable)) {
+    state.gridVariable = layer.variables[0].id;
+  }
+  gridVariableSelect.value = state.gridVariable;
+  gridExpressionRemoveButton.disabled = !isExpressionLayer(layer.id);
+  const variable = layer.variables.find((item) => item.id === state.gridVariable);
+  if (variable) {
+    const minText = formatLegendValue(variable.min);
+    const maxText = formatLegendValue(variable.max);
+    gridLegend.children[0].textContent = `Min ${minText}`;
+    gridLegend.children[1].textContent = `Max ${maxText}`;
+  } else {
+    gridLegend.children[0].textContent = "Min —";
+    gridLegend.children[1].textContent = "Max —";
+  }
+  renderGridOverlay();
+}
+
+function formatValue(value) {
+  if (value === null || value === undefined || value === "") {
+    return "—";
+  }
+  if (typeof value === "number") {
+    const formatter = new Intl.NumberFormat("en-US", { maximumFractionDigits: Math.abs(value) < 1 ? 2 : 0 });
+    return formatter.format(value);
+  }
+  return value;
+}
+
+const siteValue = ExplorerCompute.siteValue;
+
+function siteProperties(sites, index) {
+  const properties = {};
+  Object.keys(sites.columns).forEach((field) => {
+    properties[field] = siteValue(sites, field, index);
+  });
+  return properties;
+}
+
+function getFeatureTitle(sites, index, dataset) {
+  const field = dataset.display?.title_field;
+  const name = siteValue(sites, "name", index) ?? "Untitled";
+  return field ? siteValue(sites, field, index) ?? name : name;
+}
+
+function getFeatureSubtitle(properties, dataset) {
+  const fields = dataset.display?.subtitle_fields ?? [];
+  return fields
+    .map((field) => properties[field])
+    .filter(Boolean)
+    .join(" • ");
+}
+
+function getFeatureMeta(properties, dataset) {
+  const metaField = dataset.display?.meta_field;
+  if (!metaField) return "";
+  const raw = properties[metaField];
+  if (raw === undefined || raw === null || raw === "") return "";
+  const label = dataset.display.meta_label ? ` ${dataset.display.meta_label}` : "";
+  return `${formatValue(raw)}${label}`;
+}
+
+function renderWeightsTable() {
+  weightsTable.innerHTML = PTI_SCORES.map((score) => {
+    const values = state.weights[score.id];
+    return `
+      <tr data-score="${score.id}">
+        <td>${score.label}</td>
+        <td><input type="number" step="0.1" min="-1" max="1" value="${values.need}" data-kind="need" /></td>
+        <td><input type="number" step="0.1" min="-1" max="1" value="${values.opp}" data-kind="opp" /></td>
+      </tr>
+    `;
+  }).join("");
+}
+
+function recomputeScores() {
+  scoreRequestSeq += 1;
+  const requestId = scoreRequestSeq;
+  scoreSummary.textContent = "Scoring…";
+  compute.call("scoreCells", { layerId: "pti_scores", weights: state.weights }).then((result) => {
+    if (requestId !== scoreRequestSeq) return;
+    state.scores = result;
+    const { need, opportunity, combined } = result.summary;
+    scoreSummary.textContent = `Need: ${need.toFixed(2)} • Opportunity: ${opportunity.toFixed(2)} • Combined: ${combined.toFixed(2)}`;
+  }).catch((error) => {
+    if (requestId !== scoreRequestSeq) return;
+    console.error("Scoring failed:", error);
+    scoreSummary.textContent = "Scoring failed.";
+  });
+}
+
+function ensureMap() {
+  if (map || typeof L === "undefined") {
+    if (!map && typeof L === "undefined") {
+      const fallback = document.createElement("div");
+      fallback.id = "map-fallback";
+      fallback.style.position = "absolute";
+      fallback.style.inset = "0";
+      fallback.style.display = "flex";
+      fallback.style.alignItems = "center";
+      fallback.style.justifyContent = "center";
+      fallback.style.padding = "1rem";
+      fallback.style.textAlign = "center";
+      fallback.style.background = "rgba(7, 10, 22, 0.8)";
+      fallback.textContent = "Leaflet failed to load.";
+      mapContainer.appendChild(fallback);
+    }
+    return;
+  }
+  map = L.map("map-root", {
+    attributionControl: true,
+    zoomControl: true,
+  }).setView([15.5, 44], 6);
+  L.tileLayer("https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png", {
+    maxZoom: 18,
+    attribution: "&copy; OpenStreetMap contributors",
+  }).addTo(map);
+  markersLayer = L.layerGroup().addTo(map);
+  map.on("click", (event) => {
+    if (zone.drawing) {
+      zone.vertices.push([event.latlng.lat, event.latlng.lng]);
+      drawZoneOutline();
+      updateZoneControls();
+    } else if (catchment.picking) {
+      setCatchmentPoint({ lat: Number(event.latlng.lat.toFixed(5)), lon: Number(event.latlng.lng.toFixed(5)) });
+    }
+  });
+  map.on("moveend", () => {
+    requestViewportCells();
+    // Crossing a level's zoom threshold swaps the grid for a finer or coarser one.
+    if (state.showGrid && GRID_LEVELS.length && !derivedRequest() && activeGridLevel() !== gridResult?.level) {
+      renderGridOverlay();
+    }
+  });
+}
+
+// Finest viewport-delivered level the current zoom calls for, or null when payload levels suffice.
+function wantedViewportLevel() {
+  if (!map || !state.showGrid) return null;
+  const zoom = map.getZoom();
+  return VIEWPORT_LEVELS.find((level) => zoom >= level.minZoom) ?? null;
+}
+
+function viewportCovers(level) {
+  if (!gridViewport?.geometry || gridViewport.resolution !== level.resolution) return false;
+  const [south, west, north, east] = gridViewport.bounds;
+  return L.latLngBounds([south, west], [north, east]).contains(map.getBounds());
+}
+
+// Zooming past a fine resolution's threshold, or panning out of the cells held for it, asks Python
+// for the cells around the current view.
+function requestViewportCells() {
+  const wanted = wantedViewportLevel();
+  if (wanted && !viewportCovers(wanted)) {
+    reportState();
+  }
+}
+
+function gridLevelAt(index) {
+  return index < GRID_LEVELS.length ? GRID_LEVELS[index] : gridViewport;
+}
+
+// Viewport cells when they match the zoom and cover the view, else the finest payload level whose
+// minimum zoom the map has reached.
+function activeGridLevel() {
+  const wanted = wantedViewportLevel();
+  if (wanted && viewportCovers(wanted)) {
+    return GRID_LEVELS.length;
+  }
+  const zoom = map ? map.getZoom() : 0;
+  const index = GRID_LEVELS.findIndex((level) => zoom >= level.minZoom);
+  return index < 0 ? GRID_LEVELS.length - 1 : index;
+}
+
+function refreshMarkers(shouldFit = false) {
+  ensureMap();
+  if (!map || !markersLayer) return;
+  const variable = state.showSites ? getActiveSiteVariable() : null;
+  const key = variable ? `${state.siteDataset}|${variable.id}|${state.colorMap}` : null;
+  siteRequestSeq += 1;
+  const requestId = siteRequestSeq;
+  if (!variable || key === siteClassification.key) {
+    drawMarkers(variable ? siteClassification.result : null, variable, shouldFit);
+    return;
+  }
+  compute
+    .call("classifySites", { datasetId: state.siteDataset, variable, colorMap: getColorMap(variable, state.colorMap) })
+    .then((result) => {
+      siteClassification = { key, result };
+      if (requestId !== siteRequestSeq) return;
+      drawMarkers(result, variable, shouldFit);
+    })
+    .catch((error) => {
+      console.error("Site colouring failed:", error);
+      if (requestId !== siteRequestSeq) return;
+      drawMarkers(null, variable, shouldFit);
+    });
+}
+
+function drawMarkers(classification, variable, shouldFit) {
+  markersLayer.clearLayers();
+  if (!state.showSites) {
+    return;
+  }
+  updateLegend(classification ? classification.legend : null, variable, state.colorMap);
+  const sites = state.sites;
+  if (!sites.count) {
+    return;
+  }
+  const latLngs = new Array(sites.count);
+  const baseSize = state.markerSize || 3;
+  const dataset = getActiveDataset();
+  for (let index = 0; index < sites.count; index += 1) {
+    const latLng = [sites.lat[index], sites.lon[index]];
+    latLngs[index] = latLng;
+    const color = classification ? rgbAt(classification.rgb, index) : "#000000";
+    const isSelected = index === state.selectedIndex;
+    const marker = L.circleMarker(latLng, {
+      radius: isSelected ? baseSize + 3 : baseSize,
+      color: isSelected ? "#ffffff" : color,
+      weight: isSelected ? 2.5 : 1.5,
+      fillColor: color,
+      fillOpacity: 0.9,
+    }).on("click", () => {
+      state.selectedIndex = index;
+      updatePanels();
+      refreshMarkers();
+      reportState();
+    });
+    marker.bindTooltip(getFeatureTitle(sites, index, dataset), { direction: "top" });
+    marker.addTo(markersLayer);
+  }
+  if (shouldFit && latLngs.length) {
+    if (latLngs.length > 1) {
+      map.fitBounds(latLngs, { padding: [30, 30] });
+    } else {
+      map.setView(latLngs[0], 10);
+    }
+  }
+}
+
+function gridTooltip(layer) {
+  const index = layer.feature.properties._cellIndex;
+  const note = gridResult.muted?.[index] ? " (not significant)" : "";
+  return `${gridResult.label}: ${formatValue(gridResult.values[index])}${note}`;
+}
+
+function hideGridOverlay() {
+  if (gridOverlayLayer && map.hasLayer(gridOverlayLayer)) {
+    gridOverlayLayer.remove();
+  }
+}
+
+function applyGridStyles(result, variable, level) {
+  // Each level's GeoJSON layer is built once; reclassifying only restyles the existing polygons.
+  if (!gridOverlayLayers[level]) {
+    gridOverlayLayers[level] = L.geoJSON(gridLevelAt(level).geometry, {
+      style: () => ({ color: "#1e293b", weight: 0.4, fillColor: "#94a3b8", fillOpacity: 0 }),
+    });
+  }
+  if (gridOverlayLayer !== gridOverlayLayers[level]) {
+    hideGridOverlay();
+    gridOverlayLayer = gridOverlayLayers[level];
+  }
+  gridResult = { ...result, label: variable.label, level };
+  gridOverlayLayer.eachLayer((layer) => {
+    const index = layer.feature.properties._cellIndex;
+    layer.setStyle({
+      fillColor: rgbAt(result.rgb, index),
+      fillOpacity: result.visible[index] ? 0.65 : 0,
+    });
+    if (Number.isNaN(result.values[index])) {
+      layer.unbindTooltip();
+    } else if (!layer.getTooltip()) {
+      layer.bindTooltip(gridTooltip, {
+        permanent: false,
+        direction: "center",
+        className: "grid-tooltip",
+      });
+    }
+  });
+  if (!map.hasLayer(gridOverlayLayer)) {
+    gridOverlayLayer.addTo(map);
+    gridOverlayLayer.eachLayer((layer) => {
+      if (layer.bringToBack) {
+        layer.bringToBack();
+      }
+    });
+  }
+}
+
+function renderGridOverlay() {
+  ensureMap();
+  if (!map) return;
+  gridRequestSeq += 1;
+  const requestId = gridRequestSeq;
+  if (!state.showGrid) {
+    hideGridOverlay();
+    updateGridLegendPanel(null, null, null);
+    return;
+  }
+  const layerMeta = GRID_LAYERS.find((layer) => layer.id === state.gridLayer);
+  if (!layerMeta) {
+    hideGridOverlay();
+    updateGridLegendPanel(null, null, null);
+    return;
+  }
+  const variable = layerMeta.variables.find((item) => item.id === state.gridVariable) ?? layerMeta.variables[0];
+  if (!variable) {
+    hideGridOverlay();
+    updateGridLegendPanel(null, layerMeta, null);
+    return;
+  }
+  const request = derivedRequest();
+  if (request) {
+    renderDerivedOverlay(request, layerMeta, requestId);
+    return;
+  }
+  showDerivedNote(null);
+  const level = activeGridLevel();
+  compute
+    .call("classifyGrid", {
+      level,
+      layerId: layerMeta.id,
+      variable,
+      useLogScale: state.useLogScale,
+      colorMap: COLOR_MAPS.continuous[0],
+    })
+    .then((result) => {
+      if (requestId !== gridRequestSeq) return;
+      updateGridLegendPanel(result.legend, layerMeta, variable);
+      if (!result.legend) {
+        hideGridOverlay();
+        return;
+      }
+      applyGridStyles(result, variable, level);
+    })
+    .catch((error) => {
+      console.error("Grid colouring failed:", error);
+      if (requestId !== gridRequestSeq) return;
+      hideGridOverlay();
+      updateGridLegendPanel(null, layerMeta, null);
+    });
+}
+
+// The grid column Python computes on demand for the current controls, or null for raw values.
+function derivedRequest() {
+  if (!state.gridLayer || !state.gridVariable) return null;
+  if (state.hotspotRings) {
+    return { kind: "hotspot", layerId: state.gridLayer, variableId: state.gridVariable, rings: state.hotspotRings };
+  }
+  if (isExpressionLayer(state.gridLayer)) {
+    return { kind: "expression", expression: state.gridVariable };
+  }
+  return null;
+}
+
+function isExpressionLayer(layerId) {
+  return layerId === GRID_DATASETS_META.expression_layer?.id;
+}
+
+// Lists the expressions as the variables of the expression layer, which exists only while there are any.
+function syncExpressionLayer() {
+  const meta = GRID_DATASETS_META.expression_layer;
+  GRID_LAYERS = GRID_LAYERS.filter((layer) => !isExpressionLayer(layer.id));
+  if (!meta || !state.expressions.length) return;
+  GRID_LAYERS.push({
+    id: meta.id,
+    name: meta.label,
+    variables: state.expressions.map((text) => ({ id: text, label: text, type: "numeric" })),
+  });
+}
+
+function showDerivedNote(message) {
+  gridDerivedNote.hidden = !message;
+  gridDerivedNote.textContent = message || "";
+}
+
+// Derived columns only exist for the finest payload level, which is drawn whatever the zoom.
+function renderDerivedOverlay(request, layerMeta, requestId) {
+  const key = JSON.stringify(request);
+  const result = derived.result;
+  if (!result || JSON.stringify(result.request) !== key) {
+    showDerivedNote(request.kind === "hotspot" ? "Computing hotspots…" : "Evaluating expression…");
+    if (derived.reported !== key) {
+      derived.reported = key;
+      reportState();
+    }
+    return;
+  }
+  if (result.error) {
+    showDerivedNote(result.error);
+    hideGridOverlay();
+    updateGridLegendPanel(null, layerMeta, null);
+    return;
+  }
+  let options;
+  if (request.kind === "hotspot") {
+    const alpha = GRID_DATASETS_META.hotspots?.alpha ?? 0.05;
+    const permutations = GRID_DATASETS_META.hotspots?.permutations;
+    showDerivedNote(`Grey cells are not significant at p < ${alpha} (${formatValue(permutations)} permutations).`);
+    options = {
+      variable: { id: "z", label: result.label },
+      useLogScale: false,
+      colorMap: COLOR_MAPS.diverging,
+      symmetric: true,
+      significance: { variableId: "p", alpha },
+    };
+  } else {
+    showDerivedNote(null);
+    options = {
+      variable: { id: "value", label: result.label },
+      useLogScale: state.useLogScale,
+      colorMap: COLOR_MAPS.continuous[0],
+    };
+  }
+  const { variable } = options;
+  compute
+    .call("classifyGrid", { level: 0, layerId: ExplorerCompute.DERIVED_LAYER, ...options })
+    .then((classified) => {
+      if (requestId !== gridRequestSeq) return;
+      updateGridLegendPanel(classified.legend, layerMeta, variable);
+      if (!classified.legend) {
+        hideGridOverlay();
+        return;
+      }
+      applyGridStyles(classified, variable, 0);
+    })
+    .catch((error) => {
+      console.error("Derived grid colouring failed:", error);
+      if (requestId !== gridRequestSeq) return;
+      hideGridOverlay();
+      updateGridLegendPanel(null, layerMeta, null);
+    });
+}
+
+function loadDerivedColumn(column) {
+  if (!column?.columns) {
+    derived.result = column;
+    renderGridOverlay();
+    return;
+  }
+  compute
+    .call("loadDerivedColumns", { columns: column.columns })
+    .then(() => {
+      derived.result = { request: column.request, label: column.label };
+      renderGridOverlay();
+    })
+    .catch((error) => console.error("Loading derived grid column failed:", error));
+}
+
+function showEmptyState(container, message) {
+  container.innerHTML = "";
+  const empty = document.createElement("div");
+  empty.className = "empty-state";
+  empty.textContent = message;
+  container.appendChild(empty);
+}
+
+function updateDetailAttributes(container, fields, featureProperties) {
+  if (!fields.length) {
+    showEmptyState(container, "No attributes configured.");
+    return;
+  }
+  container.innerHTML = "";
+  fields.forEach((field) => {
+    const row = document.createElement("div");
+    row.className = "kv";
+    const label = document.createElement("span");
+    label.className = "label";
+    label.textContent = field.label;
+    const value = document.createElement("span");
+    value.textContent = formatValue(featureProperties[field.id]);
+    row.appendChild(label);
+    row.appendChild(value);
+    container.appendChild(row);
+  });
+}
+
+// gridContext is { cell, values: { layerId: { variableId: value } } }; the active layer is shown.
+function updateGridContext(gridContext) {
+  if (!gridContext?.cell) {
+    showEmptyState(gridAttributesEl, "No grid context available.");
+    return;
+  }
+  const layer = GRID_LAYERS.find((entry) => entry.id === state.gridLayer && !isExpressionLayer(entry.id));
+  const fields = [{ id: "__cell__", label: "H3 cell" }].concat(layer ? layer.variables : []);
+  const values = { ...(layer ? gridContext.values[layer.id] : {}), __cell__: gridContext.cell };
+  updateDetailAttributes(gridAttributesEl, fields, values);
+}
+
+function updatePanels() {
+  const dataset = getActiveDataset();
+  const variable = getActiveSiteVariable();
+  const sites = state.sites;
+  if (!sites.count) {
+    detailType.textContent = "Site";
+    detailTitle.textContent = "No sample data";
+    detailSubtitle.textContent = "Load a dataset to view site details.";
+    siteAttributesEl.innerHTML = "";
+    gridAttributesEl.innerHTML = "";
+    updateCatchmentPanel();
+    return;
+  }
+  if (state.selectedIndex >= sites.count) {
+    state.selectedIndex = 0;
+  }
+  const index = state.selectedIndex;
+
+  detailType.textContent = dataset.label || "Site";
+  detailTitle.textContent = getFeatureTitle(sites, index, dataset);
+  // The bulk payload only carries titles and colour fields; the rest arrives with the site detail
+  // Python sends once the selection has been reported.
+  if (!siteDetail || siteDetail.dataset !== state.siteDataset || siteDetail.id !== sites.ids[index]) {
+    detailSubtitle.textContent = "";
+    showEmptyState(siteAttributesEl, "Loading attributes…");
+    showEmptyState(gridAttributesEl, "Loading grid context…");
+    updateCatchmentPanel();
+    return;
+  }
+  const properties = { ...siteProperties(sites, index), ...siteDetail.properties };
+  const shown = new Set(dataset.detail_fields.map((field) => field.id));
+  const fields = dataset.detail_fields.concat(
+    Object.keys(siteDetail.properties)
+      .filter((id) => !shown.has(id))
+      .map((id) => ({ id, label: id })),
+  );
+  detailSubtitle.textContent = getFeatureSubtitle(properties, dataset);
+  updateDetailAttributes(siteAttributesEl, fields, properties);
+  updateGridContext(siteDetail.gridContext);
+  updateCatchmentPanel();
+}
+
+siteDatasetSelect.addEventListener("change", (event) => {
+  state.siteDataset = event.target.value;
+  state.sites = SITE_FEATURES[state.siteDataset] || ExplorerCompute.EMPTY_SITES;
+  state.selectedIndex = 0;
+  updateSiteVariables();
+  updatePanels();
+  markerSizeInput.value = state.markerSize;
+  refreshMarkers(true);
+  reportState();
+});
+
+siteVariableSelect.addEventListener("change", (event) => {
+  state.siteVariable = event.target.value;
+  updateSiteVariables();
+  refreshMarkers();
+});
+
+if (colorMapSelect) {
+  colorMapSelect.addEventListener("change", (event) => {
+    state.colorMap = event.target.value;
+    refreshMarkers();
+  });
+}
+
+if (toggleSites) {
+  toggleSites.addEventListener("change", () => {
+    state.showSites = toggleSites.checked;
+    refreshMarkers();
+  });
+}
+
+if (markerSizeInput) {
+  markerSizeInput.addEventListener("input", (event) => {
+    const value = Math.max(1, Math.min(18, parseInt(event.target.value, 10) || 3));
+    state.markerSize = value;
+    if (markerSizeValue) {
+      markerSizeValue.textContent = value;
+    }
+    refreshMarkers();
+  });
+}
+
+gridLayerSelect.addEventListener("change", (event) => {
+  state.gridLayer = event.target.value;
+  updateGridVariables();
+  updatePanels();
+  updateZonePanel();
+});
+
+gridVariableSelect.addEventListener("change", (event) => {
+  state.gridVariable = event.target.value;
+  updateGridVariables();
+});
+
+if (toggleGrid) {
+  toggleGrid.addEventListener("change", () => {
+    state.showGrid = toggleGrid.checked;
+    renderGridOverlay();
+    requestViewportCells();
+  });
+}
+
+if (toggleLogScale) {
+  toggleLogScale.addEventListener("change", () => {
+    state.useLogScale = toggleLogScale.checked;
+    renderGridOverlay();
+  });
+}
+
+gridHotspotsSelect.addEventListener("change", (event) => {
+  state.hotspotRings = Number(event.target.value);
+  renderGridOverlay();
+});
+
+function addGridExpression() {
+  const text = gridExpressionInput.value.trim();
+  if (!text) return;
+  if (!state.expressions.includes(text)) {
+    state.expressions.push(text);
+  }
+  syncExpressionLayer();
+  state.gridLayer = GRID_DATASETS_META.expression_layer?.id ?? state.gridLayer;
+  state.gridVariable = text;
+  gridExpressionInput.value = "";
+  renderGridSelectors();
+}
+
+gridExpressionAddButton.addEventListener("click", addGridExpression);
+gridExpressionInput.addEventListener("keydown", (event) => {
+  if (event.key === "Enter") addGridExpression();
+});
+
+gridExpressionRemoveButton.addEventListener("click", () => {
+  if (!isExpressionLayer(state.gridLayer)) return;
+  state.expressions = state.expressions.filter((text) => text !== state.gridVariable);
+  syncExpressionLayer();
+  if (!state.expressions.length) {
+    state.gridLayer = GRID_LAYERS[0].id;
+    state.gridVariable = null;
+  }
+  renderGridSelectors();
+});
+
+if (toggleNeed) {
+  toggleNeed.addEventListener("change", () => {
+    // Placeholder: need & opportunity layer rendering will respect this state in future iterations.
+  });
+}
+
+tabButtons.forEach((button) => {
+  button.addEventListener("click", () => {
+    tabButtons.forEach((item) => (item.dataset.active = "false"));
+    button.dataset.active = "true";
+    const tab = button.dataset.tab;
+    if (tab === "map") {
+      document.getElementById("map-container").style.display = "flex";
+      document.getElementById("need-view").style.display = "none";
+    } else {
+      document.getElementById("map-container").style.display = "none";
+      document.getElementById("need-view").style.display = "flex";
+    }
+  });
+});
+
+weightsTable.addEventListener("input", (event) => {
+  if (event.target.tagName !== "INPUT") return;
+  const row = event.target.closest("tr");
+  const scoreId = row.dataset.score;
+  const kind = event.target.dataset.kind;
+  const value = Math.max(-1, Math.min(1, parseFloat(event.target.value) || 0));
+  state.weights[scoreId][kind] = value;
+});
+
+document.getElementById("recompute-btn").addEventListener("click", recomputeScores);
+
+function captureView() {
+  const view = {
+    siteDataset: state.siteDataset,
+    siteVariable: state.siteVariable,
+    gridLayer: state.gridLayer,
+    gridVariable: state.gridVariable,
+    colorMap: state.colorMap,
+    useLogScale: state.useLogScale,
+    hotspotRings: state.hotspotRings,
+    expressions: state.expressions,
+    showSites: state.showSites,
+    showGrid: state.showGrid,
+    markerSize: state.markerSize,
+    selectedIndex: state.selectedIndex,
+    weights: state.weights,
+  };
+  if (map) {
+    const center = map.getCenter();
+    const bounds = map.getBounds();
+    view.center = [center.lat, center.lng];
+    view.zoom = map.getZoom();
+    view.bounds = [bounds.getSouth(), bounds.getWest(), bounds.getNorth(), bounds.getEast()].map((value) =>
+      Number(value.toFixed(4))
+    );
+  }
+  return view;
+}
+
+function applyView(view) {
+  state.siteDataset = datasetIds.includes(view.siteDataset) ? view.siteDataset : datasetIds[0];
+  state.siteVariable = view.siteVariable ?? "__none__";
+  state.expressions = Array.isArray(view.expressions) ? view.expressions.filter((text) => typeof text === "string") : [];
+  syncExpressionLayer();
+  const layer = GRID_LAYERS.find((item) => item.id === view.gridLayer) ?? GRID_LAYERS[0];
+  state.gridLayer = layer.id;
+  state.gridVariable = view.gridVariable ?? layer.variables[0].id;
+  ["colorMap", "useLogScale", "hotspotRings", "showSites", "showGrid", "markerSize"].forEach((field) => {
+    if (view[field] !== undefined && view[field] !== null) {
+      state[field] = view[field];
+    }
+  });
+  if (view.weights) {
+    Object.entries(view.weights).forEach(([scoreId, weight]) => {
+      if (state.weights[scoreId]) {
+        state.weights[scoreId] = { ...state.weights[scoreId], ...weight };
+      }
+    });
+  }
+  state.sites = SITE_FEATURES[state.siteDataset] || ExplorerCompute.EMPTY_SITES;
+  state.selectedIndex = view.selectedIndex ?? 0;
+  syncControls();
+}
+
+function loadPayload(payload, version, view) {
+  const restoring = payloadVersion === null;
+  SITE_DATASETS = JSON.parse(payload.siteDatasets);
+  SITE_FEATURES = ExplorerCompute.decodeSites(payload.siteFeatures);
+  GRID_DATASETS_META = JSON.parse(payload.gridDatasets);
+  VIEWPORT_LEVELS = GRID_DATASETS_META.viewport_levels || [];
+  const levels = JSON.parse(payload.gridLevels);
+  GRID_LEVELS = levels.map(({ resolution, minZoom, cellIds, geometry }) => {
+    geometry.features.forEach((feature, index) => {
+      feature.properties._cellIndex = index;
+    });
+    return { resolution, minZoom, cellIds, geometry };
+  });
+  GRID_LAYERS = Object.entries(GRID_DATASETS_META.feature_sets).map(([id, config]) => ({
+    id,
+    name: config.label,
+    path: config.path,
+    variables: config.variables,
+  }));
+  datasetIds = Object.keys(SITE_DATASETS);
+  compute.call("loadSites", payload.siteFeatures).catch((error) => console.error("Loading sites failed:", error));
+  compute
+    .call("loadGrid", {
+      levels: levels.map(({ resolution, cellIds, values }) => ({ resolution, cellCount: cellIds.length, values })),
+      centroids: cellCentroids(GRID_LEVELS[0].geometry),
+    })
+    .catch((error) => console.error("Loading grid values failed:", error));
+  payloadVersion = version;
+  // A new payload invalidates the cached grid layers and site colours built from the old one.
+  gridOverlayLayers.forEach((layer) => layer.remove());
+  gridOverlayLayers = [];
+  gridOverlayLayer = null;
+  gridResult = null;
+  gridViewport = null;
+  derived.result = null;
+  derived.reported = null;
+  received = {};
+  siteClassification = { key: null, result: null };
+  const nextView = restoring ? view || {} : captureView();
+  applyView(nextView);
+  renderSiteSelectors();
+  renderGridSelectors();
+  renderCoverageControls();
+  renderWeightsTable();
+  updateSiteVariables();
+  updatePanels();
+  if (zone.result) {
+    computeZone();
+  }
+  updateZonePanel();
+  const hasSavedView = Array.isArray(nextView.center) && nextView.zoom !== undefined;
+  if (hasSavedView) {
+    ensureMap();
+    if (map) {
+      map.setView(nextView.center, nextView.zoom);
+    }
+  }
+  refreshMarkers(!hasSavedView);
+  recomputeScores();
+}
+
+// Headline statistics shown for every drawn area, ahead of the active grid layer's variables
+const ZONE_SUMMARY = [
+  { layerId: "climate", id: "worldpop2023_sum" },
+  { layerId: "climate", id: "adj_at_least_one" },
+  { layerId: "health_access", id: "health_number_of_sites" },
+  { layerId: "education_access", id: "education_number_of_sites" },
+  { layerId: "yeeap_coverage", id: "yeeap_number_of_sites" },
+  { layerId: "tamkeen_coverage", id: "tamkeen_number_of_sites" },
+  ...PTI_SCORES.map((score) => ({ layerId: "pti_scores", id: score.id })),
+];
+
+function drawZoneOutline() {
+  if (zone.layer) {
+    zone.layer.remove();
+    zone.layer = null;
+  }
+  if (!map || !zone.vertices.length) return;
+  const style = { color: "#facc15", weight: 2, fillOpacity: 0.08, interactive: false };
+  zone.layer = zone.drawing || zone.vertices.length < 3
+    ? L.polyline(zone.vertices, { ...style, dashArray: "4 4" })
+    : L.polygon(zone.vertices, style);
+  zone.layer.addTo(map);
+}
+
+function updateZoneControls() {
+  zoneDrawButton.disabled = zone.drawing;
+  zoneFinishButton.disabled = !zone.drawing || zone.vertices.length < 3;
+  zoneClearButton.disabled = !zone.drawing && !zone.vertices.length;
+  mapContainer.style.cursor = zone.drawing ? "crosshair" : "";
+}
+
+function updateZonePanel() {
+  if (!zone.result) {
+    showEmptyState(
+      zoneAttributesEl,
+      zone.drawing ? "Click the map to add vertices, then press Finish." : "Draw an area to summarise the grid cells inside it."
+    );
+    return;
+  }
+  const activeLayer = GRID_LAYERS.find((layer) => layer.id === state.gridLayer && !isExpressionLayer(layer.id));
+  const entries = ZONE_SUMMARY.concat(
+    (activeLayer ? activeLayer.variables : [])
+      .map((variable) => ({ layerId: activeLayer.id, id: variable.id }))
+      .filter((entry) => !ZONE_SUMMARY.some((item) => item.layerId === entry.layerId && item.id === entry.id))
+  );
+  const fields = [{ id: "__cells__", label: "Grid cells" }];
+  const values = { __cells__: zone.result.cells };
+  entries.forEach(({ layerId, id }) => {
+    const variable = GRID_LAYERS.find((layer) => layer.id === layerId)?.variables.find((item) => item.id === id);
+    if (!variable) return;
+    const key = `${layerId}.${id}`;
+    fields.push({ id: key, label: variable.aggregation === "mean" ? `${variable.label} (mean)` : variable.label });
+    values[key] = zone.result.values[layerId]?.[id];
+  });
+  updateDetailAttributes(zoneAttributesEl, fields, values);
+}
+
+// Cells are counted in the area when their centroid is; statistics use the finest payload level.
+function computeZone() {
+  zoneRequestSeq += 1;
+  const requestId = zoneRequestSeq;
+  const polygon = zone.vertices.map(([lat, lng]) => [lng, lat]);
+  polygon.push(polygon[0]);
+  const variables = Object.fromEntries(
+    GRID_LAYERS.filter((layer) => !isExpressionLayer(layer.id)).map((layer) => [
+      layer.id,
+      layer.variables.map(({ id, aggregation }) => ({ id, aggregation })),
+    ])
+  );
+  compute
+    .call("zonalStatistics", { polygon, variables, weight: GRID_DATASETS_META.population_weight ?? null })
+    .then((result) => {
+      if (requestId !== zoneRequestSeq) return;
+      zone.result = result;
+      updateZonePanel();
+    })
+    .catch((error) => console.error("Area statistics failed:", error));
+}
+
+zoneDrawButton.addEventListener("click", () => {
+  ensureMap();
+  if (!map) return;
+  zone.drawing = true;
+  zone.vertices = [];
+  zone.result = null;
+  // Double clicks would zoom the map while vertices are being placed.
+  map.doubleClickZoom.disable();
+  drawZoneOutline();
+  updateZoneControls();
+  updateZonePanel();
+});
+
+zoneFinishButton.addEventListener("click", () => {
+  if (zone.vertices.length < 3) return;
+  zone.drawing = false;
+  map.doubleClickZoom.enable();
+  drawZoneOutline();
+  updateZoneControls();
+  computeZone();
+});
+
+zoneClearButton.addEventListener("click", () => {
+  zoneRequestSeq += 1;
+  zone.drawing = false;
+  zone.vertices = [];
+  zone.result = null;
+  if (map) map.doubleClickZoom.enable();
+  drawZoneOutline();
+  updateZoneControls();
+  updateZonePanel();
+});
+
+// Rows of the catchment table: per-cell population and hazard exposure, which add up over cells
+// (district figures such as pop_total repeat in every cell and would not)
+const CATCHMENT_SUMMARY = [
+  { layerId: "climate", id: "worldpop2023_sum" },
+  { layerId: "climate", id: "adj_at_least_one" },
+  { layerId: "climate", id: "adj_exposed_flood5_pop" },
+  { layerId: "climate", id: "adj_exposed_heat32_pop" },
+  { layerId: "climate", id: "adj_exposed_drought20_pop" },
+];
+
+// catchments is { radiusKm: { cells, values: { layerId: { variableId: value } } } }
+function renderCatchmentTable(catchments) {
+  const radii = Object.keys(catchments);
+  const rows = [{ label: "Grid cells", value: (radius) => catchments[radius].cells }];
+  CATCHMENT_SUMMARY.forEach(({ layerId, id }) => {
+    const variable = GRID_LAYERS.find((layer) => layer.id === layerId)?.variables.find((item) => item.id === id);
+    if (!variable) return;
+    rows.push({ label: variable.label, value: (radius) => catchments[radius].values[layerId]?.[id] });
+  });
+  const table = document.createElement("table");
+  const head = table.createTHead().insertRow();
+  ["", ...radii.map((radius) => `${radius} km`)].forEach((text) => {
+    const cell = document.createElement("th");
+    cell.textContent = text;
+    head.appendChild(cell);
+  });
+  const body = table.createTBody();
+  rows.forEach(({ label, value }) => {
+    const row = body.insertRow();
+    row.insertCell().textContent = label;
+    radii.forEach((radius) => {
+      row.insertCell().textContent = formatValue(value(radius));
+    });
+  });
+  catchmentAttributesEl.innerHTML = "";
+  catchmentAttributesEl.appendChild(table);
+}
+
+// Catchments of the clicked point when one is picked, else of the selected site (from its detail).
+function updateCatchmentPanel() {
+  let catchments = null;
+  if (catchment.point) {
+    const { lat, lon } = catchment.point;
+    catchmentOriginEl.textContent = `Around ${lat.toFixed(4)}, ${lon.toFixed(4)}`;
+    if (catchment.result && catchment.result.lat === lat && catchment.result.lon === lon) {
+      catchments = catchment.result.catchments;
+    }
+  } else {
+    catchmentOriginEl.textContent = catchment.picking ? "Click the map to pick a point." : "Around the selected site";
+    const ids = state.sites?.ids;
+    if (siteDetail && siteDetail.dataset === state.siteDataset && ids && siteDetail.id === ids[state.selectedIndex]) {
+      catchments = siteDetail.catchments;
+    }
+  }
+  if (!catchments) {
+    const waiting = catchment.point || state.sites?.count;
+    showEmptyState(catchmentAttributesEl, waiting ? "Loading catchments…" : "Pick a point on the map.");
+    return;
+  }
+  renderCatchmentTable(catchments);
+}
+
+function setCatchmentPoint(point) {
+  catchment.picking = false;
+  catchment.point = point;
+  if (catchment.layer) {
+    catchment.layer.remove();
+    catchment.layer = null;
+  }
+  if (point && map) {
+    const style = { color: "#38bdf8", weight: 1.5, fill: false, dashArray: "4 4", interactive: false };
+    catchment.layer = L.layerGroup([
+      L.circleMarker([point.lat, point.lon], { radius: 5, color: "#38bdf8", fillOpacity: 1, interactive: false }),
+      ...(GRID_DATASETS_META.catchment_radii_km || []).map((radius) => L.circle([point.lat, point.lon], { ...style, radius: radius * 1000 })),
+    ]).addTo(map);
+  }
+  catchmentPickButton.disabled = false;
+  catchmentClearButton.disabled = !point;
+  mapContainer.style.cursor = "";
+  updateCatchmentPanel();
+  reportState();
+}
+
+catchmentPickButton.addEventListener("click", () => {
+  ensureMap();
+  if (!map) return;
+  catchment.picking = true;
+  catchmentPickButton.disabled = true;
+  mapContainer.style.cursor = "crosshair";
+  updateCatchmentPanel();
+});
+
+catchmentClearButton.addEventListener("click", () => setCatchmentPoint(null));
+
+function renderCoverageControls() {
+  const meta = GRID_DATASETS_META.coverage || { populations: [], maxSites: 100 };
+  coverageRadiusSelect.innerHTML = (GRID_DATASETS_META.catchment_radii_km || [])
+    .map((radius) => `<option value="${radius}">${radius} km</option>`)
+    .join("");
+  coverageRadiusSelect.value = String(coverage.request?.radiusKm ?? GRID_DATASETS_META.catchment_radii_km?.[1] ?? "");
+  coveragePopulationSelect.innerHTML = meta.populations
+    .map((population) => `<option value="${population.id}">${population.label}</option>`)
+    .join("");
+  if (coverage.request) {
+    coveragePopulationSelect.value = coverage.request.population;
+    coverageKInput.value = coverage.request.k;
+  }
+  coverageKInput.max = meta.maxSites;
+  coverageRunButton.title = meta.existing ? `Areas within reach of ${meta.existing} count as covered.` : "";
+}
+
+function drawCoverageSites() {
+  if (coverage.layer) {
+    coverage.layer.remove();
+    coverage.layer = null;
+  }
+  if (!coverage.result?.sites || !map) return;
+  const radius = (coverage.result.radiusKm ?? coverage.result.request.radiusKm) * 1000;
+  coverage.layer = L.layerGroup(
+    coverage.result.sites.flatMap((site, rank) => [
+      L.circle([site.lat, site.lon], { radius, color: "#f59e0b", weight: 1, fillOpacity: 0.08, interactive: false }),
+      L.circleMarker([site.lat, site.lon], { radius: 6, color: "#f59e0b", fillColor: "#fbbf24", fillOpacity: 1 }).bindTooltip(
+        `#${rank + 1} · +${formatValue(site.population)} people`,
+      ),
+    ]),
+  ).addTo(map);
+}
+
+function updateCoveragePanel() {
+  coverageClearButton.disabled = !coverage.request;
+  const result = coverage.result;
+  if (!coverage.request) {
+    coverageSummaryEl.textContent = "No suggestions requested.";
+    coverageSitesEl.innerHTML = "";
+    return;
+  }
+  if (!result || JSON.stringify(result.request) !== JSON.stringify(coverage.request)) {
+    coverageSummaryEl.textContent = "Optimising…";
+    coverageSitesEl.innerHTML = "";
+    return;
+  }
+  if (result.error) {
+    coverageSummaryEl.textContent = result.error;
+    coverageSitesEl.innerHTML = "";
+    return;
+  }
+  const added = result.sites.length ? result.sites[result.sites.length - 1].cumulative : 0;
+  const share = (value) => (result.total > 0 ? ` (${((100 * value) / result.total).toFixed(1)}%)` : "");
+  coverageSummaryEl.textContent =
+    `Already covered: ${formatValue(result.existing)}${share(result.existing)} · ` +
+    `${result.sites.length} new sites add ${formatValue(added)}${share(added)}`;
+  const table = document.createElement("table");
+  const head = table.createTHead().insertRow();
+  ["#", "Cell", "New population", "Cumulative"].forEach((text) => {
+    const cell = document.createElement("th");
+    cell.textContent = text;
+    head.appendChild(cell);
+  });
+  const body = table.createTBody();
+  result.sites.forEach((site, rank) => {
+    const row = body.insertRow();
+    [String(rank + 1), site.cell, formatValue(site.population), formatValue(site.cumulative)].forEach((text) => {
+      row.insertCell().textContent = text;
+    });
+    row.style.cursor = "pointer";
+    row.addEventListener("click", () => map?.setView([site.lat, site.lon], Math.max(map.getZoom(), 9)));
+  });
+  coverageSitesEl.innerHTML = "";
+  coverageSitesEl.appendChild(table);
+}
+
+coverageRunButton.addEventListener("click", () => {
+  ensureMap();
+  const maxSites = GRID_DATASETS_META.coverage?.maxSites ?? 100;
+  const k = Math.min(maxSites, Math.max(1, Math.round(Number(coverageKInput.value) || 1)));
+  coverageKInput.value = k;
+  coverage.request = { k, radiusKm: Number(coverageRadiusSelect.value), population: coveragePopulationSelect.value };
+  updateCoveragePanel();
+  reportState();
+});
+
+coverageClearButton.addEventListener("click", () => {
+  coverage.request = null;
+  coverage.result = null;
+  drawCoverageSites();
+  updateCoveragePanel();
+  reportState();
+});
+
+// Vertex mean of each cell's outer ring (closing vertex excluded), interleaved lon/lat; the same
+// centroids src/h3_grid.py uses.
+function cellCentroids(geometry) {
+  const centroids = new Float64Array(geometry.features.length * 2);
+  geometry.features.forEach((feature, index) => {
+    const { type, coordinates } = feature.geometry;
+    const ring = type === "Polygon" ? coordinates[0] : coordinates[0][0];
+    let x = 0;
+    let y = 0;
+    for (let vertex = 0; vertex < ring.length - 1; vertex += 1) {
+      x += ring[vertex][0];
+      y += ring[vertex][1];
+    }
+    centroids[index * 2] = x / (ring.length - 1);
+    centroids[index * 2 + 1] = y / (ring.length - 1);
+  });
+  return centroids;
+}
+
+function loadGridViewport(viewport) {
+  const slot = GRID_LEVELS.length;
+  if (gridOverlayLayers[slot]) {
+    if (gridOverlayLayer === gridOverlayLayers[slot]) {
+      hideGridOverlay();
+      gridOverlayLayer = null;
+    }
+    gridOverlayLayers[slot] = null;
+  }
+  viewport.geometry.features.forEach((feature, index) => {
+    feature.properties._cellIndex = index;
+  });
+  gridViewport = viewport;
+  compute
+    .call("loadGridLevel", {
+      level: slot,
+      resolution: viewport.resolution,
+      cellCount: viewport.cellIds.length,
+      values: viewport.values,
+    })
+    .catch((error) => console.error("Loading viewport cells failed:", error));
+  // Force a redraw even if the slot index matches the level drawn before.
+  gridResult = null;
+  renderGridOverlay();
+}
+
+// Minimal implementation of the Streamlit component protocol (what streamlit-component-lib wraps).
+const Streamlit = {
+  send(type, data = {}) {
+    window.parent.postMessage({ isStreamlitMessage: true, type, ...data }, "*");
+  },
+  setComponentValue(value) {
+    this.send("streamlit:setComponentValue", { value, dataType: "json" });
+  },
+  setFrameHeight(height) {
+    this.send("streamlit:setFrameHeight", { height });
+  },
+};
+
+function currentSelection() {
+  const sites = state.sites;
+  const index = state.selectedIndex;
+  if (index >= sites.count) return null;
+  // Coordinates are float32; round so Python sees the source precision, not float32 noise.
+  return {
+    dataset: state.siteDataset,
+    index,
+    id: sites.ids[index],
+    lat: Number(sites.lat[index].toFixed(6)),
+    lon: Number(sites.lon[index].toFixed(6)),
+  };
+}
+
+function reportState() {
+  Streamlit.setComponentValue({
+    payloadVersion,
+    gridViewport: gridViewport?.key ?? null,
+    received,
+    catchmentPoint: catchment.point,
+    coverageRequest: coverage.request,
+    derivedRequest: derivedRequest(),
+    selection: payloadVersion === null ? null : currentSelection(),
+    view: payloadVersion === null ? argsView : captureView(),
+  });
+}
+
+// The result Python sent as args[name]: null without a request, undefined when only the key of the
+// result already held is confirmed. A new result's key is recorded for the acknowledgement.
+function takeResult(args, name) {
+  const value = args[name] ?? null;
+  if (value === null) {
+    delete received[name];
+    return null;
+  }
+  if (!("result" in value)) return undefined;
+  received[name] = value.key;
+  return value.result;
+}
+
+function onRender(args) {
+  Streamlit.setFrameHeight(args.height || 920);
+  argsView = args.view ?? null;
+  const held = { ...received };
+  const detail = takeResult(args, "detail");
+  if (detail !== undefined && JSON.stringify(detail) !== JSON.stringify(siteDetail)) {
+    siteDetail = detail;
+    if (payloadVersion !== null) {
+      updatePanels();
+    }
+  }
+  if (args.payload && args.version !== payloadVersion) {
+    loadPayload(args.payload, args.version, args.view);
+    // Acknowledge the payload so later reruns only send small deltas.
+    reportState();
+    return;
+  }
+  const pointCatchments = takeResult(args, "pointCatchments");
+  if (pointCatchments !== undefined && JSON.stringify(pointCatchments) !== JSON.stringify(catchment.result)) {
+    catchment.result = pointCatchments;
+    if (payloadVersion !== null) {
+      updateCatchmentPanel();
+    }
+  }
+  const coverageSites = takeResult(args, "coverageSites");
+  if (coverageSites !== undefined && JSON.stringify(coverageSites) !== JSON.stringify(coverage.result)) {
+    coverage.result = coverageSites;
+    if (payloadVersion !== null) {
+      drawCoverageSites();
+      updateCoveragePanel();
+    }
+  }
+  // Derived columns need the grid, so they are only taken once a payload is loaded
+  const derivedColumn = payloadVersion !== null ? takeResult(args, "derivedColumn") : undefined;
+  const derivedChanged = JSON.stringify(derivedColumn?.request) !== JSON.stringify(derived.result?.request);
+  if (derivedColumn && derivedChanged) {
+    loadDerivedColumn(derivedColumn);
+  }
+  const viewport = args.gridViewport ?? null;
+  let acknowledge = Object.entries(received).some(([name, key]) => held[name] !== key);
+  if (payloadVersion !== null && viewport?.geometry && viewport.key !== gridViewport?.key) {
+    loadGridViewport(viewport);
+    // Acknowledge the cells so later reruns only confirm the key.
+    acknowledge = true;
+  }
+  if (args.version !== payloadVersion && requestedVersion !== args.version) {
+    // The frame was remounted (or Python moved on) without resending data: ask for it.
+    requestedVersion = args.version;
+    acknowledge = true;
+  }
+  if (acknowledge) {
+    reportState();
+  }
+}
+
+window.addEventListener("message", (event) => {
+  if (event.data?.type === "streamlit:render") {
+    onRender(event.data.args || {});
+  }
+});
+Streamlit.send("streamlit:componentReady", { apiVersion: 1 });
@@ -0,0 +1,16 @@
+// Dedicated worker for the explorer: runs ExplorerCompute off the main thread and transfers
+// typed-array results back so the page only has to apply them to map layers.
+importScripts("compute.js");
+
+self.onmessage = (event) => {
+  const { id, type, payload } = event.data;
+  try {
+    const result = ExplorerCompute[type](payload);
+    const transfer = Object.values(result)
+      .filter((value) => ArrayBuffer.isView(value))
+      .map((value) => value.buffer);
+    self.postMessage({ id, result }, transfer);
+  } catch (error) {
+    self.postMessage({ id, error: String(error) });
+  }
+};
@@ -4,6 +4,8 @@ from __future__ import annotations
 
 from streamlit.components.v1 import html
 
+from src.components.vendor import INTER_CSS, LEAFLET_CSS, LEAFLET_JS, vendor_url
+
 
 def render_yemen_site_selector() -> None:
     """Render a lightweight three-panel selector for Yemen candidate sites."""
@@ -16,19 +18,9 @@ def render_yemen_site_selector() -> None:
     <meta charset="utf-8" />
     <meta name="viewport" content="width=device-width, initial-scale=1" />
     <title>Yemen Site Selector</title>
-    <link rel="preconnect" href="https://fonts.googleapis.com" />
-    <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin />
-    <link
-      href="https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap"
-      rel="stylesheet"
-    />
-    <link
-      rel="stylesheet"
-      href="https://unpkg.com/leaflet@1.9.4/dist/leaflet.css"
-    />
-    <script
-      src="https://unpkg.com/leaflet@1.9.4/dist/leaflet.js"
-    ></script>
+    <link rel="stylesheet" href="__INTER_CSS__" />
+    <link rel="stylesheet" href="__LEAFLET_CSS__" />
+    <script src="__LEAFLET_JS__"></script>
     <style>
       :root {
         font-family: "Inter", -apple-system, BlinkMacSystemFont, "Segoe UI", sans-serif;
@@ -398,7 +390,7 @@ def render_yemen_site_selector() -> None:
             fallback.style.padding = "1rem";
             fallback.style.textAlign = "center";
             fallback.style.background = "rgba(7, 10, 22, 0.8)";
-            fallback.textContent = "Leaflet failed to load. Check network access.";
+            fallback.textContent = "Leaflet failed to load.";
             mapPlaceholder.appendChild(fallback);
           }
           return;
@@ -519,7 +511,9 @@ def render_yemen_site_selector() -> None:
     </script>
   </body>
 </html>
-        """,
+        """.replace("__INTER_CSS__", vendor_url(INTER_CSS))
+        .replace("__LEAFLET_CSS__", vendor_url(LEAFLET_CSS))
+        .replace("__LEAFLET_JS__", vendor_url(LEAFLET_JS)),
         height=900,
         scrolling=False,
     )
@@ -2,20 +2,43 @@
 
 from __future__ import annotations
 
+import base64
+import hashlib
 import json
+import math
+from array import array
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Optional
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 
-from streamlit.components.v1 import html
+import streamlit.components.v1 as components
 
-# Site datasets metadata: location on disk, fields available for colouring, and detail attributes
+from src.geojson_stream import iter_features, iter_point_features
+from src.grid_accessibility import e2sfca
+from src.grid_aggregation import aggregate_frame, aggregation_for, parent_groups, zonal_statistics
+from src.grid_catchments import CentroidIndex, catchment_statistics
+from src.grid_coverage import optimize_coverage
+from src.grid_expressions import compile_expression
+from src.grid_hotspots import gi_star, gi_star_pseudo_p
+from src.grid_neighbours import CellAdjacency
+from src.h3_grid import GridCells, dissolve_rings
+from src.instrumentation import span, timed_cache
+
+# Registers the vendored Leaflet/Inter assets that the explorer frontend loads
+from src.components import vendor  # noqa: F401
+
+_FRONTEND_DIR = Path(__file__).parent / "frontend" / "site_selector_v2"
+_site_selector_component = components.declare_component("site_selector_v2", path=str(_FRONTEND_DIR))
+
+# Site datasets metadata: location on disk, unique id property, fields available for colouring, and detail attributes
 SITE_DATASETS: Dict[str, Dict[str, Any]] = {
     "yeeap": {
         "label": "YEEAP installations",
         "path": Path("data/site_data/yeeap_installations.geojson"),
+        "id_field": "id",
         "color_fields": [
             {"id": "pv_system_kwp", "label": "PV capacity (kWp)", "type": "numeric", "min": 0, "max": 75},
             {"id": "total_beneficiaries", "label": "Total beneficiaries", "type": "numeric", "min": 0, "max": 12_500},
@@ -42,6 +65,7 @@ SITE_DATASETS: Dict[str, Dict[str, Any]] = {
     "tamkeen": {
         "label": "Tamkeen projects",
         "path": Path("data/site_data/tamkeen.geojson"),
+        "id_field": "Subproject_ID",
         "color_fields": [
             {"id": "Status", "label": "Status", "type": "categorical", "categories": ["Planned", "Active", "Completed"]},
         ],
@@ -59,6 +83,7 @@ SITE_DATASETS: Dict[str, Dict[str, Any]] = {
     "pilot_minigrid": {
         "label": "Pilot mini-grids",
         "path": Path("data/site_data/pilot_minigrid.geojson"),
+        "id_field": "name",
         "color_fields": [
             {"id": "Estimated  Population", "label": "Estimated population", "type": "numeric", "min": 0, "max": 20_000},
             {"id": "Ownership", "label": "Ownership", "type": "categorical"},
@@ -80,6 +105,7 @@ SITE_DATASETS: Dict[str, Dict[str, Any]] = {
     "health": {
         "label": "Health facilities",
         "path": Path("data/site_data/health_facilities.geojson"),
+        "id_field": "osm_id",
         "color_fields": [
             {"id": "amenity", "label": "Amenity type", "type": "categorical"},
             {"id": "healthcare", "label": "Healthcare type", "type": "categorical"},
@@ -96,6 +122,7 @@ SITE_DATASETS: Dict[str, Dict[str, Any]] = {
     "education": {
         "label": "Education facilities",
         "path": Path("data/site_data/education_facilities.geojson"),
+        "id_field": "osm_id",
         "color_fields": [
             {"id": "amenity", "label": "Amenity type", "type": "categorical"},
         ],
@@ -110,6 +137,12 @@ SITE_DATASETS: Dict[str, Dict[str, Any]] = {
     },
 }
 
+# Grid layers: CSV path, variable labels and optional ``aggregations`` ({column: operator}) that
+# override the operator src.grid_aggregation.aggregation_for picks from the column name. Layers with
+# ``e2sfca`` instead of a path are derived when the grid loads: each column is the E2SFCA
+# accessibility of a site dataset's facilities, as facilities per ``per`` people of
+# GRID_POPULATION_WEIGHT (after the layers it reads). ``supply_field`` names a facility capacity
+# property; without one every facility counts once.
 GRID_FEATURE_CONFIG: Dict[str, Dict[str, Any]] = {
     "climate": {
         "label": "Climate hazard exposure",
@@ -178,6 +211,16 @@ GRID_FEATURE_CONFIG: Dict[str, Dict[str, Any]] = {
             "bemonc_walk_60m_plus_pct": "Births >60 min from BEmONC (%)",
             "num_health_facilities_per_10000": "Health facilities per 10k",
         },
+        # District figures repeated in every cell of the district: summing them over cells would
+        # count the district once per cell, so areas take the largest district's figure instead
+        "aggregations": {
+            "pop_total": "max",
+            "total_idps_district": "max",
+            "num_idp_hh_displaced_to_dtm_12m": "max",
+            "num_idp_hh_displaced_from_dtm_12m": "max",
+            "conflict_incidents": "max",
+            "conflict_fatalities": "max",
+        },
     },
     "pti_scores": {
         "label": "PTI scores",
@@ -192,39 +235,206 @@ GRID_FEATURE_CONFIG: Dict[str, Dict[str, Any]] = {
             "economic_activity_score": "Economic activity score",
         },
     },
+    "accessibility": {
+        "label": "Service accessibility (E2SFCA)",
+        "e2sfca": {
+            "health_e2sfca_per_10000": {"sites": "health", "per": 10_000},
+            "education_e2sfca_per_10000": {"sites": "education", "per": 10_000},
+        },
+        "labels": {
+            "health_e2sfca_per_10000": "Health facilities per 10k within reach (E2SFCA)",
+            "education_e2sfca_per_10000": "Education facilities per 10k within reach (E2SFCA)",
+        },
+    },
 }
 
-
-@st.cache_data(ttl=3600)  # Cache for 1 hour
-def _load_dataset_features(dataset_id: str) -> list[dict[str, Any]]:
-    """Load and cache dataset features from GeoJSON files."""
+# Grid levels drawn by the explorer, finest first: each is shown from ``min_zoom`` up to the next
+# finer level's threshold. Coarser levels are rollups of the res-5 grid to parent H3 cells.
+GRID_LEVELS: list[Dict[str, int]] = [
+    {"resolution": 5, "min_zoom": 7},
+    {"resolution": 4, "min_zoom": 6},
+    {"resolution": 3, "min_zoom": 5},
+    {"resolution": 2, "min_zoom": 0},
+]
+GRID_BASE_RESOLUTION = GRID_LEVELS[0]["resolution"]
+# Per-cell population (layer, column) that weights the means of intensive variables in rollups
+GRID_POPULATION_WEIGHT = ("climate", "worldpop2023_sum")
+
+# Grid resolutions the app can load: cell polygons, the directory holding the per-layer CSVs (named
+# as in GRID_FEATURE_CONFIG) and the cell id column. The base resolution ships whole in the payload;
+# finer ones are sent for the viewport only, from ``min_zoom`` up, in tiles of ``tile_degrees``.
+# Resolutions whose polygon file is missing are skipped.
+GRID_RESOLUTIONS: Dict[int, Dict[str, Any]] = {
+    5: {
+        "geometry": Path("data/boundaries_h3/h3_grid_res5.geojson"),
+        "data_dir": Path("data/processed_h3"),
+        "id_field": "h3_05",
+    },
+    6: {
+        "geometry": Path("data/boundaries_h3/h3_grid_res6.geojson"),
+        "data_dir": Path("data/processed_h3/res6"),
+        "id_field": "h3_06",
+        "min_zoom": 9,
+        "tile_degrees": 1.0,
+    },
+    7: {
+        "geometry": Path("data/boundaries_h3/h3_grid_res7.geojson"),
+        "data_dir": Path("data/processed_h3/res7"),
+        "id_field": "h3_07",
+        "min_zoom": 11,
+        "tile_degrees": 0.5,
+    },
+}
+# Catchment radii (km) summarised around the selected site or a clicked point, and their layers
+CATCHMENT_RADII_KM = (5, 10, 25)
+CATCHMENT_LAYERS = ("climate", "pti_indicators")
+# Populations the new-site optimizer can maximise, as (layer, column). They must be per-cell
+# counts: district totals such as pop_total repeat in every cell and would be counted many times.
+COVERAGE_POPULATIONS = {
+    "worldpop2023_sum": ("climate", "worldpop2023_sum"),
+}
+# Site dataset whose sites already cover their catchments, and the most new sites one run places
+COVERAGE_EXISTING_DATASET = "yeeap"
+COVERAGE_MAX_SITES = 100
+# Neighbourhood sizes (in rings) offered for Gi* hotspots, the permutations behind their p-values
+# and the significance level the explorer highlights
+HOTSPOT_RINGS = (1, 2, 3)
+HOTSPOT_PERMUTATIONS = 999
+HOTSPOT_ALPHA = 0.05
+# Layer id under which the explorer lists derived-variable expressions (src.grid_expressions); the
+# layer's "columns" are the expression texts
+GRID_EXPRESSION_LAYER = "expressions"
+# Rows per chunk when reading grid CSVs, so fine resolutions never hold a whole file as text columns
+GRID_CSV_CHUNK_ROWS = 50_000
+# Largest number of cells sent for one viewport; a bigger request keeps showing the base grid
+GRID_VIEWPORT_MAX_CELLS = 20_000
+
+
+@timed_cache("load_dataset_features", st.cache_data(ttl=3600))  # Cache for 1 hour
+def _load_dataset_features(dataset_id: str) -> Dict[str, Any]:
+    """Load and cache one site dataset as columns rather than one dict per feature.
+
+    Returns ``count``, ``ids`` (list), ``lat`` and ``lon`` (float32 arrays) and ``properties``, a
+    DataFrame with one typed column per property. Categorical properties are dictionary-encoded
+    (see :func:`_encode_categories`). Features are streamed from disk one at a time, so the parsed
+    document is never held in memory alongside the columns.
+    """
     config = SITE_DATASETS[dataset_id]
     path = config["path"]
-    if not path.exists():
-        return []
-    with path.open("r", encoding="utf-8") as file:
-        geojson = json.load(file)
-    features: list[dict[str, Any]] = []
-    for feature in geojson.get("features", []):
-        geom = feature.get("geometry")
-        props = feature.get("properties", {})
-        if not geom or geom.get("type") != "Point":
+    id_field = config.get("id_field")
+    ids: list[str] = []
+    seen: set[str] = set()
+    lat = array("f")
+    lon = array("f")
+    columns: dict[str, list[Any]] = {}
+    if path.exists():
+        for feature_lon, feature_lat, props in iter_point_features(path):
+            index = len(ids)
+            site_id = props.get(id_field) if id_field else None
+            site_id = str(index) if site_id is None or site_id == "" else str(site_id)
+            if site_id in seen:
+                # Ids key the detail index, so a repeated one gets the first free numbered suffix
+                base, suffix = site_id, 2
+                while site_id in seen:
+                    site_id, suffix = f"{base}#{suffix}", suffix + 1
+            seen.add(site_id)
+            ids.append(site_id)
+            lat.append(feature_lat)
+            lon.append(feature_lon)
+            for name, value in props.items():
+                if name not in columns:
+                    # A property first seen part-way through is missing for the earlier features
+                    columns[name] = [None] * index
+                columns[name].append(value)
+            for values in columns.values():
+                if len(values) == index:
+                    values.append(None)
+    properties = pd.DataFrame({name: pd.Series(values) for name, values in columns.items()})
+    return {
+        "count": len(ids),
+        "ids": ids,
+        "lat": np.frombuffer(lat, dtype=np.float32),
+        "lon": np.frombuffer(lon, dtype=np.float32),
+        "properties": _encode_categories(properties, config),
+    }
+
+
+def _encode_categories(properties: pd.DataFrame, config: Dict[str, Any]) -> pd.DataFrame:
+    """Convert categorical properties to pandas ``category`` columns (integer codes plus labels).
+
+    A property is categorical when a colour field declares it so, or when it is text or boolean
+    with at most half as many distinct values as non-missing ones, which keeps names and ids as
+    plain text. Empty strings count as missing. Categories are ordered by first appearance, so
+    code order matches the order in which the explorer assigns palette colours.
+    """
+    declared = {field["id"] for field in config.get("color_fields", []) if field.get("type") == "categorical"}
+    encoded = properties.copy()
+    for name in properties.columns:
+        series = properties[name]
+        if _column_type(series) == "numeric" and name not in declared:
             continue
-        coords = geom.get("coordinates")
-        if not isinstance(coords, (list, tuple)) or len(coords) < 2:
+        if series.dtype == object:
+            series = series.mask(series == "")
+        if name not in declared and series.nunique() * 2 > series.count():
             continue
-        lon, lat = coords[0], coords[1]
-        features.append(
-            {
-                "id": props.get("id") or props.get("Subproject_ID") or props.get("name") or props.get("facility_name") or str(len(features)),
-                "lat": lat,
-                "lon": lon,
-                "properties": props,
-                "summary": "",
-                "gridContext": {},
-            }
-        )
-    return features
+        encoded[name] = pd.Categorical(series, categories=pd.unique(series.dropna()))
+    return encoded
+
+
+def _column_type(series: pd.Series) -> str:
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return "category"
+    if pd.api.types.is_bool_dtype(series):
+        return "boolean"
+    if pd.api.types.is_numeric_dtype(series):
+        return "numeric"
+    return "text"
+
+
+def _encode_float32(values: np.ndarray) -> str:
+    # Little-endian float32, which is what a Float32Array over the decoded bytes reads in every browser
+    return base64.b64encode(np.ascontiguousarray(values, dtype="<f4").tobytes()).decode("ascii")
+
+
+def _site_fields(config: Dict[str, Any]) -> list[str]:
+    """Properties shipped for every site: the title (marker tooltips) and the colour fields.
+
+    Everything else, detail fields included, is looked up for the selected site on demand (see
+    :func:`_site_details`).
+    """
+    fields = [config.get("display", {}).get("title_field")]
+    fields += [field["id"] for field in config.get("color_fields", [])]
+    return list(dict.fromkeys(field for field in fields if field))
+
+
+def _encode_site_columns(columns: Dict[str, Any], fields: Optional[list[str]] = None) -> Dict[str, Any]:
+    """JSON-ready wire form of :func:`_load_dataset_features`, limited to ``fields`` if given.
+
+    Coordinates travel as base64 float32 buffers; each property is one array of values (missing
+    values are ``null``) with its type in ``types``. ``category`` columns carry integer codes
+    (``-1`` when missing) that index the labels listed under ``categories``.
+    """
+    properties: pd.DataFrame = columns["properties"]
+    if fields is not None:
+        properties = properties[[name for name in fields if name in properties.columns]]
+    encoded_columns: Dict[str, list[Any]] = {}
+    categories: Dict[str, list[Any]] = {}
+    for name in properties.columns:
+        series = properties[name]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            encoded_columns[name] = series.cat.codes.tolist()
+            categories[name] = series.cat.categories.tolist()
+        else:
+            encoded_columns[name] = [None if pd.isna(value) else value for value in series.tolist()]
+    return {
+        "count": columns["count"],
+        "ids": columns["ids"],
+        "lat": _encode_float32(columns["lat"]),
+        "lon": _encode_float32(columns["lon"]),
+        "types": {name: _column_type(properties[name]) for name in properties.columns},
+        "columns": encoded_columns,
+        "categories": categories,
+    }
 
 
 def _humanize_column(name: str) -> str:
@@ -236,1595 +446,680 @@ def _humanize_column(name: str) -> str:
     return label.title()
 
 
-@st.cache_data(ttl=3600)  # Cache for 1 hour
-def _load_grid_datasets() -> tuple[Dict[str, Any], Dict[str, Dict[str, Dict[str, float]]], Dict[str, Any]]:
-    """Load and cache grid datasets (geometry, metadata, and values)."""
-    base_path = Path("data/boundaries_h3/h3_grid_res5.geojson")
-    with base_path.open("r", encoding="utf-8") as file:
-        geometry = json.load(file)
+def _grid_layer_path(config: Dict[str, Any], resolution: int) -> Path:
+    return GRID_RESOLUTIONS[resolution]["data_dir"] / Path(config["path"]).name
+
+
+def _read_grid_csv(path: Path, id_field: str) -> Optional[pd.DataFrame]:
+    """Numeric columns of one grid CSV as float32, indexed by cell id, read in chunks.
+
+    Text columns (such as the WKT ``geometry``), recognised in the first chunk as those without
+    any numeric value, are dropped from every chunk before the cast, so they never accumulate.
+    Returns ``None`` when the file has no ``id_field`` column.
+    """
+    chunks = []
+    text_columns: Optional[list[str]] = None
+    for chunk in pd.read_csv(path, chunksize=GRID_CSV_CHUNK_ROWS):
+        chunk = chunk.drop(columns=[col for col in chunk.columns if col.startswith("Unnamed")], errors="ignore")
+        if id_field not in chunk.columns:
+            return None
+        chunk = chunk.dropna(subset=[id_field]).set_index(id_field)
+        if text_columns is None:
+            text_columns = [
+                column
+                for column in chunk.select_dtypes(include="object").columns
+                if pd.to_numeric(chunk[column], errors="coerce").isna().all()
+            ]
+        chunk = chunk.drop(columns=text_columns).apply(pd.to_numeric, errors="coerce").astype(np.float32)
+        chunks.append(chunk)
+    if not chunks:
+        return None
+    frame = pd.concat(chunks)
+    frame = frame[~frame.index.duplicated()]
+    return frame.dropna(axis="columns", how="all")
+
+
+def _accessibility_frame(
+    config: Dict[str, Any], cells: GridCells, frames: Dict[str, pd.DataFrame], id_field: str
+) -> Optional[pd.DataFrame]:
+    """E2SFCA columns of a derived layer, as float32 indexed by the ids of ``cells``.
+
+    ``frames`` are the layers loaded so far; ``None`` when the population layer is not among them.
+    """
+    weight_layer, weight_column = GRID_POPULATION_WEIGHT
+    if weight_layer not in frames or not len(cells):
+        return None
+    population = frames[weight_layer][weight_column].to_numpy()
+    index = CentroidIndex.from_cells(cells)
+    columns = {}
+    with span("e2sfca", cells=len(cells)):
+        for column, settings in config["e2sfca"].items():
+            sites = _load_dataset_features(settings["sites"])
+            supply_field = settings.get("supply_field")
+            supply = (
+                None
+                if supply_field is None
+                else pd.to_numeric(sites["properties"][supply_field], errors="coerce").to_numpy(dtype=np.float64)
+            )
+            accessibility = e2sfca(index, population, sites["lon"], sites["lat"], supply)
+            columns[column] = (accessibility * settings["per"]).astype(np.float32)
+    return pd.DataFrame(columns, index=pd.Index(cells.cell_ids, name=id_field))
+
+
+@timed_cache("load_grid_datasets", st.cache_data(ttl=3600))  # Cache for 1 hour
+def _load_grid_datasets(
+    resolution: int = GRID_BASE_RESOLUTION,
+) -> tuple[Dict[str, Any], Dict[str, pd.DataFrame], GridCells]:
+    """Load and cache one grid resolution (metadata, values and cells).
+
+    Values are one float32 DataFrame per layer, indexed by cell id and aligned row for row with the
+    cells; cells missing from a layer's CSV hold NaN. Cell polygons are streamed from the GeoJSON
+    into flat vertex arrays.
+    """
+    settings = GRID_RESOLUTIONS[resolution]
+    id_field = settings["id_field"]
+    cells = GridCells.from_features(iter_features(settings["geometry"]), id_field)
 
     feature_sets_meta: Dict[str, Any] = {}
-    feature_values: Dict[str, Dict[str, Dict[str, float]]] = {}
+    feature_values: Dict[str, pd.DataFrame] = {}
 
     for feature_id, config in GRID_FEATURE_CONFIG.items():
-        path: Path = config["path"]
-        if not path.exists():
-            continue
-        df = pd.read_csv(path)
-        df = df.drop(columns=[col for col in df.columns if col.startswith("Unnamed")], errors="ignore")
-        if "h3_05" not in df.columns:
+        if "e2sfca" in config:
+            df = _accessibility_frame(config, cells, feature_values, id_field)
+            source = "derived: E2SFCA"
+        else:
+            path = _grid_layer_path(config, resolution)
+            df = _read_grid_csv(path, id_field) if path.exists() else None
+            source = str(path)
+        if df is None:
             continue
-        df = df.dropna(subset=["h3_05"]).copy()
-        numeric_columns = []
-        variables = []
         label_map = config.get("labels", {})
-
-        for column in df.columns:
-            if column == "h3_05":
-                continue
-            series = pd.to_numeric(df[column], errors="coerce")
-            if not pd.api.types.is_numeric_dtype(series):
-                continue
-            series = series.dropna()
-            if series.empty:
-                continue
-            col_min = float(series.min())
-            col_max = float(series.max())
-            label = label_map.get(column, _humanize_column(column))
-            variables.append(
-                {
-                    "id": column,
-                    "label": label,
-                    "type": "numeric",
-                    "min": col_min,
-                    "max": col_max,
-                }
-            )
-            numeric_columns.append(column)
-
-        values_map: Dict[str, Dict[str, float]] = {}
-        if numeric_columns:
-            sub_df = df[["h3_05"] + numeric_columns].copy()
-            for column in numeric_columns:
-                sub_df[column] = pd.to_numeric(sub_df[column], errors="coerce")
-            for h3, row in sub_df.set_index("h3_05").iterrows():
-                values_map[h3] = {
-                    column: (None if pd.isna(value) else float(value))
-                    for column, value in row.items()
-                }
+        variables = [
+            {
+                "id": column,
+                "label": label_map.get(column, _humanize_column(column)),
+                "type": "numeric",
+                "min": float(df[column].min()),
+                "max": float(df[column].max()),
+                "aggregation": aggregation_for(column, config.get("aggregations")),
+            }
+            for column in df.columns
+        ]
 
         feature_sets_meta[feature_id] = {
             "label": config["label"],
-            "path": str(path),
+            "path": source,
             "variables": variables,
         }
-        feature_values[feature_id] = values_map
+        feature_values[feature_id] = df.reindex(cells.cell_ids)
+
+    return {"feature_sets": feature_sets_meta}, feature_values, cells
+
+
+def _encoded_columns(frames: Dict[str, pd.DataFrame]) -> Dict[str, Dict[str, str]]:
+    """Layer columns in cell order as base64 float32 (see :func:`_encode_float32`); NaN is missing."""
+    return {
+        layer_id: {column: _encode_float32(frame[column].to_numpy()) for column in frame.columns}
+        for layer_id, frame in frames.items()
+    }
+
+
+def _grid_levels(frames: Dict[str, pd.DataFrame], cells: GridCells) -> list[Dict[str, Any]]:
+    """The base grid plus its rollups to the coarser resolutions in ``GRID_LEVELS``.
+
+    Each level carries its cell ids, polygons and per-layer columns, plus the lowest map zoom at
+    which the explorer draws it. Rollups combine cell values with each variable's operator
+    (weighting means by ``GRID_POPULATION_WEIGHT``) and dissolve the child polygons. Grids whose
+    ids are not H3 cells (such as the synthetic benchmark grids) only get the base level.
+    """
+    base, *rollups = GRID_LEVELS
+    cell_ids = cells.cell_ids
+    weight_layer, weight_column = GRID_POPULATION_WEIGHT
+    weights = frames[weight_layer][weight_column].to_numpy() if weight_layer in frames else None
+    levels = [
+        {
+            "resolution": base["resolution"],
+            "minZoom": base["min_zoom"],
+            "cellIds": cell_ids,
+            "geometry": cells.to_geojson(GRID_RESOLUTIONS[base["resolution"]]["id_field"]),
+            "values": _encoded_columns(frames),
+        }
+    ]
+    rings = cells.rings
+    for level in rollups:
+        resolution = level["resolution"]
+        try:
+            parent_ids, groups = parent_groups(cell_ids, resolution)
+        except ValueError:
+            levels[0]["minZoom"] = 0
+            break
+        members: list[list[np.ndarray]] = [[] for _ in parent_ids]
+        for ring, group in zip(rings, groups.tolist()):
+            members[group].append(ring)
+        features = []
+        for parent_id, parent_rings in zip(parent_ids, members):
+            parts = [[ring.tolist() for ring in part] for part in dissolve_rings(parent_rings)]
+            if len(parts) == 1:
+                shape = {"type": "Polygon", "coordinates": parts[0]}
+            else:
+                shape = {"type": "MultiPolygon", "coordinates": parts}
+            features.append(
+                {"type": "Feature", "properties": {f"h3_{resolution:02d}": parent_id}, "geometry": shape}
+            )
+        rolled = {
+            layer_id: aggregate_frame(
+                frame, groups, len(parent_ids), GRID_FEATURE_CONFIG[layer_id].get("aggregations"), weights
+            )
+            for layer_id, frame in frames.items()
+        }
+        levels.append(
+            {
+                "resolution": resolution,
+                "minZoom": level["min_zoom"],
+                "cellIds": parent_ids,
+                "geometry": {"type": "FeatureCollection", "features": features},
+                "values": _encoded_columns(rolled),
+            }
+        )
+    return levels
+
 
-    return {"feature_sets": feature_sets_meta}, feature_values, geometry
+@timed_cache("prepare_site_selector_data", st.cache_data(ttl=3600))
+def _prepare_site_selector_data() -> Dict[str, str]:
+    """Prepare and cache all data needed for the site selector component.
 
-@st.cache_data(ttl=3600)
-def _prepare_site_selector_data() -> tuple[str, str, str, str, str]:
-    """Prepare and cache all data needed for the site selector component."""
+    Returns the serialised payloads keyed by component argument name plus a ``version`` digest,
+    which lets the frontend tell Python which payload it already holds.
+    """
     # Load data (cached functions, so fast after first load)
-    datasets_json = json.dumps({k: {**v, "path": str(v["path"])} for k, v in SITE_DATASETS.items()})
-    
-    # Load features for all datasets
     features_dict = {}
     for dataset_id in SITE_DATASETS:
-        features_dict[dataset_id] = _load_dataset_features(dataset_id)
-    features_json = json.dumps(features_dict)
-    
-    # Load grid data
-    grid_meta, grid_values, grid_geometry = _load_grid_datasets()
-    grid_datasets_json = json.dumps(grid_meta)
-    grid_values_json = json.dumps(grid_values)
-    grid_geometry_json = json.dumps(grid_geometry)
-    
-    return datasets_json, features_json, grid_datasets_json, grid_values_json, grid_geometry_json
-
-
-def render_site_selector_v2() -> None:
-    """Render a three-column prototype for the site selector v2 dashboard."""
-    
-    # Get cached data (this function caches the entire data preparation)
-    # Wrap in try-except to handle initialization errors gracefully
-    try:
-        datasets_json, features_json, grid_datasets_json, grid_values_json, grid_geometry_json = _prepare_site_selector_data()
-    except Exception as e:
-        st.error(f"Error loading geospatial data: {str(e)}")
-        st.info("Please refresh the page. If the problem persists, the data files may be missing or corrupted.")
-        return
-
-    template = """
-<!DOCTYPE html>
-<html lang="en">
-  <head>
-    <meta charset="utf-8" />
-    <meta name="viewport" content="width=device-width, initial-scale=1" />
-    <title>Site Selector v2 Prototype</title>
-    <link rel="preconnect" href="https://fonts.googleapis.com" />
-    <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin />
-    <link
-      href="https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap"
-      rel="stylesheet"
-    />
-    <link
-      rel="stylesheet"
-      href="https://unpkg.com/leaflet@1.9.4/dist/leaflet.css"
-    />
-    <script src="https://unpkg.com/leaflet@1.9.4/dist/leaflet.js"></script>
-    <style>
-      :root {
-        font-family: "Inter", -apple-system, BlinkMacSystemFont, "Segoe UI", sans-serif;
-        color: #e2e8f0;
-        background: #050914;
-      }
-      *, *::before, *::after {
-        box-sizing: border-box;
-      }
-      body {
-        margin: 0;
-        height: 100vh;
-        overflow: hidden;
-        background: radial-gradient(circle at 12% -8%, rgba(91, 99, 244, 0.35), transparent 55%);
-      }
-      .app {
-        display: grid;
-        grid-template-columns: 360px minmax(600px, 1fr) 340px;
-        gap: 1.6rem;
-        padding: 1.6rem 1.8rem;
-        height: 100%;
-      }
-      .panel {
-        display: flex;
-        flex-direction: column;
-        border-radius: 24px;
-        background: rgba(13, 20, 42, 0.92);
-        backdrop-filter: blur(16px);
-        box-shadow: 0 30px 45px -26px rgba(3, 7, 18, 0.7);
-        min-height: 0;
-      }
-      .panel header {
-        padding: 1.3rem 1.5rem 1rem;
-        border-bottom: 1px solid rgba(148, 163, 184, 0.18);
-      }
-      .panel header h2 {
-        margin: 0;
-        font-size: 1.25rem;
-      }
-      .panel header p {
-        margin: 0.35rem 0 0;
-        font-size: 0.9rem;
-        color: #8fb5ff;
-      }
-      .panel__body {
-        flex: 1;
-        overflow-y: auto;
-        padding: 1.2rem 1.5rem 1.5rem;
-        display: grid;
-        gap: 1.1rem;
-      }
-      .section {
-        display: grid;
-        gap: 0.75rem;
-        background: rgba(255, 255, 255, 0.04);
-        border: 1px solid rgba(255, 255, 255, 0.05);
-        border-radius: 18px;
-        padding: 1rem 1.1rem;
-      }
-      .section h3 {
-        margin: 0;
-        font-size: 0.95rem;
-        letter-spacing: 0.06em;
-        text-transform: uppercase;
-        color: rgba(186, 201, 255, 0.85);
-      }
-      label {
-        display: grid;
-        gap: 0.4rem;
-        font-size: 0.9rem;
-      }
-      select, input[type="number"] {
-        width: 100%;
-        border-radius: 12px;
-        border: 1px solid rgba(148, 163, 184, 0.32);
-        background: rgba(8, 13, 30, 0.85);
-        color: inherit;
-        padding: 0.55rem 0.75rem;
-        font-size: 0.9rem;
-      }
-      select:focus, input[type="number"]:focus {
-        outline: 2px solid rgba(99, 179, 237, 0.45);
-      }
-      .legend {
-        font-size: 0.82rem;
-        color: rgba(226, 232, 240, 0.7);
-        display: flex;
-        justify-content: space-between;
-      }
-      .marker-control {
-        display: grid;
-        gap: 0.45rem;
-        font-size: 0.82rem;
-      }
-      .marker-control input[type="range"] {
-        width: 100%;
-      }
-      .styling-panel {
-        padding: 0;
-        background: transparent !important;
-        border: none !important;
-      }
-      .styling-panel summary {
-        list-style: none;
-      }
-      .styling-panel summary::-webkit-details-marker {
-        display: none;
-      }
-      .styling-panel summary::before {
-        content: "▶";
-        display: inline-block;
-        margin-right: 0.5rem;
-        transition: transform 0.2s ease;
-        font-size: 0.7rem;
-      }
-      .styling-panel[open] summary::before {
-        transform: rotate(90deg);
-      }
-      .styling-controls {
-        display: grid;
-        gap: 0.9rem;
-      }
-      .styling-control-item {
-        display: grid;
-        gap: 0.4rem;
-      }
-      .selector-note {
-        margin: 0;
-        font-size: 0.82rem;
-        color: rgba(226, 232, 240, 0.68);
-      }
-      details {
-        border-radius: 16px;
-        border: 1px solid rgba(148, 163, 184, 0.18);
-        background: rgba(9, 14, 25, 0.75);
-        padding: 0.75rem 0.9rem;
-      }
-      details summary {
-        cursor: pointer;
-        font-size: 0.9rem;
-        font-weight: 600;
-      }
-      details ul {
-        margin: 0.8rem 0 0;
-        padding-left: 1.1rem;
-        display: grid;
-        gap: 0.4rem;
-        font-size: 0.85rem;
-      }
-      .tabs {
-        display: flex;
-        gap: 0.6rem;
-        padding: 0.8rem 1.2rem 0;
-      }
-      .tab {
-        flex: 1;
-        border-radius: 14px;
-        text-align: center;
-        padding: 0.6rem 0.8rem;
-        cursor: pointer;
-        font-weight: 600;
-        font-size: 0.95rem;
-        border: 1px solid transparent;
-        background: rgba(255, 255, 255, 0.05);
-        transition: all 0.15s ease;
-      }
-      .tab[data-active="true"] {
-        background: rgba(91, 99, 244, 0.3);
-        border-color: rgba(91, 99, 244, 0.6);
-      }
-      .map-container, .need-container {
-        flex: 1;
-        margin: 0 1.2rem 1.2rem;
-        border-radius: 20px;
-        border: 1px solid rgba(255, 255, 255, 0.08);
-        background: radial-gradient(circle at center, rgba(28, 58, 138, 0.92), rgba(7, 10, 22, 0.92));
-        display: flex;
-        align-items: center;
-        justify-content: center;
-        color: rgba(226, 232, 240, 0.75);
-        position: relative;
-        padding: 1.2rem;
-      }
-      #map-root {
-        position: absolute;
-        inset: 0;
-        border-radius: 18px;
-        overflow: hidden;
-        z-index: 1;
-      }
-      .map-site-legend {
-        position: absolute;
-        right: 1.3rem;
-        bottom: 1.3rem;
-        background: rgba(8, 13, 30, 0.78);
-        border-radius: 14px;
-        border: 1px solid rgba(148, 163, 184, 0.28);
-        padding: 1rem 1.1rem;
-        min-width: 240px;
-        font-size: 0.85rem;
-        display: grid;
-        gap: 0.8rem;
-        z-index: 4;
-      }
-      .map-site-legend.hidden {
-        display: none;
-      }
-      .map-grid-legend {
-        position: absolute;
-        left: 1.3rem;
-        bottom: 1.3rem;
-        background: rgba(8, 13, 30, 0.78);
-        border-radius: 14px;
-        border: 1px solid rgba(148, 163, 184, 0.28);
-        padding: 1rem 1.1rem;
-        min-width: 240px;
-        font-size: 0.85rem;
-        display: grid;
-        gap: 0.8rem;
-        z-index: 4;
-      }
-      .map-grid-legend.hidden {
-        display: none;
-      }
-      .map-legend-header {
-        display: grid;
-        gap: 0.35rem;
-      }
-      .map-legend-header span {
-        font-size: 0.78rem;
-        letter-spacing: 0.05em;
-        text-transform: uppercase;
-        color: rgba(148, 163, 184, 0.85);
-      }
-      .map-legend-header strong {
-        font-size: 0.95rem;
-      }
-      .map-legend-title {
-        font-size: 0.82rem;
-        font-weight: 600;
-        letter-spacing: 0.05em;
-        text-transform: uppercase;
-        color: rgba(148, 163, 184, 0.85);
-      }
-      .map-legend-gradient {
-        display: grid;
-        gap: 0.4rem;
-      }
-      .map-legend-gradient-bar {
-        height: 12px;
-        border-radius: 999px;
-        background: linear-gradient(90deg, #5b63f4 0%, #ef4444 100%);
-        border: 1px solid rgba(148, 163, 184, 0.25);
-      }
-      .map-legend-gradient-labels {
-        display: flex;
-        justify-content: space-between;
-        font-size: 0.78rem;
-        color: rgba(226, 232, 240, 0.75);
-      }
-      .map-legend-items {
-        display: grid;
-        gap: 0.35rem;
-      }
-      .map-legend-item {
-        display: flex;
-        align-items: center;
-        gap: 0.5rem;
-        font-size: 0.82rem;
-      }
-      .grid-tooltip {
-        background: rgba(15, 23, 42, 0.95) !important;
-        border: 1px solid rgba(148, 163, 184, 0.3) !important;
-        border-radius: 8px !important;
-        padding: 0.5rem 0.75rem !important;
-        font-size: 0.85rem !important;
-        color: #e2e8f0 !important;
-        font-weight: 500 !important;
-        box-shadow: 0 4px 12px rgba(0, 0, 0, 0.3) !important;
-        pointer-events: none !important;
-      }
-      .map-legend-swatch {
-        width: 14px;
-        height: 14px;
-        border-radius: 4px;
-        border: 1px solid rgba(148, 163, 184, 0.35);
-      }
-      .need-layout {
-        width: 100%;
-        display: grid;
-        grid-template-columns: minmax(260px, 320px) 1fr;
-        gap: 1.2rem;
-      }
-      table {
-        width: 100%;
-        border-collapse: collapse;
-        font-size: 0.85rem;
-      }
-      thead {
-        font-size: 0.78rem;
-        letter-spacing: 0.05em;
-        text-transform: uppercase;
-        color: rgba(148, 163, 184, 0.85);
-      }
-      th, td {
-        text-align: left;
-        padding: 0.4rem 0.35rem;
-      }
-      tbody tr:nth-child(odd) {
-        background: rgba(255, 255, 255, 0.04);
-      }
-      button {
-        border-radius: 14px;
-        border: none;
-        padding: 0.65rem 1rem;
-        font-weight: 600;
-        font-size: 0.93rem;
-        cursor: pointer;
-        background: #5b63f4;
-        color: #f8fafc;
-        margin-top: 0.8rem;
-      }
-      button:hover {
-        background: #4f54d6;
-      }
-      .analytics-card {
-        background: rgba(15, 23, 42, 0.8);
-        border: 1px solid rgba(148, 163, 184, 0.18);
-        border-radius: 18px;
-        padding: 1rem;
-        display: grid;
-        gap: 0.9rem;
-      }
-      .detail-section {
-        padding: 1.1rem 1.4rem;
-        border-bottom: 1px solid rgba(148, 163, 184, 0.16);
-      }
-      .detail-section:last-child {
-        border-bottom: none;
-      }
-      .detail-section h3 {
-        margin: 0 0 0.4rem;
-        font-size: 0.9rem;
-        letter-spacing: 0.05em;
-        text-transform: uppercase;
-        color: rgba(186, 201, 255, 0.85);
-      }
-      .kv-list {
-        display: grid;
-        gap: 0.45rem;
-      }
-      .kv {
-        display: grid;
-        grid-template-columns: 1fr auto;
-        gap: 0.4rem;
-        font-size: 0.88rem;
-      }
-      .kv span.label {
-        color: rgba(148, 163, 184, 0.85);
-        letter-spacing: 0.04em;
-        text-transform: uppercase;
-        font-size: 0.75rem;
-      }
-      .pill {
-        display: inline-flex;
-        align-items: center;
-        border-radius: 999px;
-        padding: 0.3rem 0.7rem;
-        background: rgba(91, 99, 244, 0.2);
-        color: #cbd5ff;
-        font-size: 0.78rem;
-        letter-spacing: 0.05em;
-        text-transform: uppercase;
-      }
-      .site-list {
-        display: grid;
-        gap: 0.7rem;
-      }
-      .site-card {
-        border-radius: 16px;
-        padding: 0.75rem 0.9rem;
-        background: rgba(255, 255, 255, 0.08);
-        border: 1px solid transparent;
-        cursor: pointer;
-        display: grid;
-        gap: 0.25rem;
-        transition: transform 0.15s ease, border 0.15s ease;
-      }
-      .site-card[data-selected="true"] {
-        border-color: rgba(255, 255, 255, 0.45);
-        transform: translateY(-2px);
-      }
-      .site-card h4 {
-        margin: 0;
-        font-size: 0.98rem;
-      }
-      .site-card p {
-        margin: 0;
-        font-size: 0.82rem;
-        color: rgba(226, 232, 240, 0.75);
-      }
-      .search {
-        margin-bottom: 1rem;
-      }
-      .search input {
-        width: 100%;
-        padding: 0.6rem 0.9rem;
-        font-size: 0.95rem;
-        border-radius: 14px;
-        border: 1px solid rgba(255, 255, 255, 0.2);
-        background: rgba(255, 255, 255, 0.1);
-        color: inherit;
-        outline: none;
-      }
-      .empty-state {
-        padding: 1rem;
-        text-align: center;
-        background: rgba(255, 255, 255, 0.06);
-        border-radius: 14px;
-        font-size: 0.85rem;
-        color: rgba(226, 232, 240, 0.7);
-      }
-      .selector-note {
-        font-size: 0.85rem;
-        color: rgba(226, 232, 240, 0.7);
-        margin-top: 0.5rem;
-        text-align: center;
-      }
-    </style>
-  </head>
-  <body>
-    <div class="app" data-state="map">
-      <section class="panel" id="controls-panel">
-        <header>
-          <h2>Data & Layer Controls</h2>
-          <p>Select a site dataset, choose styling variables, and configure grid overlays.</p>
-        </header>
-        <div class="panel__body">
-          <div class="section" id="site-selector">
-            <h3>Site dataset</h3>
-            <label>
-              Dataset
-              <select id="site-dataset"></select>
-            </label>
-            <label>
-              Colour by
-              <select id="site-variable"></select>
-            </label>
-            
-            <!-- Site Styling Controls -->
-            <details class="styling-panel" style="margin-top: 0.75rem;">
-              <summary style="cursor: pointer; font-size: 0.85rem; letter-spacing: 0.05em; text-transform: uppercase; color: rgba(186, 201, 255, 0.85); font-weight: 600; padding: 0.5rem 0; list-style: none;">
-                Site Styling
-              </summary>
-              <div class="styling-controls" style="margin-top: 0.75rem;">
-                <div class="styling-control-item">
-                  <label for="toggle-sites" style="font-size: 0.82rem; display: flex; align-items: center; gap: 0.5rem; cursor: pointer;">
-                    <input id="toggle-sites" type="checkbox" checked style="cursor: pointer;" />
-                    <span>Show sites</span>
-                  </label>
-                </div>
-                <div class="styling-control-item">
-                  <label for="color-map" style="font-size: 0.82rem; display: grid; gap: 0.4rem;">
-                    <span>Color scheme</span>
-                    <select id="color-map" style="width: 100%;"></select>
-                  </label>
-                </div>
-                <div class="styling-control-item">
-                  <label for="marker-size" style="font-size: 0.82rem; display: grid; gap: 0.4rem;">
-                    <span>Size</span>
-                    <div style="display: flex; align-items: center; gap: 0.5rem;">
-                      <input id="marker-size" type="range" min="1" max="18" step="1" value="1" style="flex: 1;" />
-                      <span id="marker-size-value" style="min-width: 2rem; text-align: right; font-size: 0.85rem; color: rgba(226, 232, 240, 0.8);">3</span>
-                    </div>
-                  </label>
-                </div>
-              </div>
-            </details>
-          </div>
-
-          <div class="section" id="grid-selector">
-            <h3>Grid layer</h3>
-            <label>
-              Layer
-              <select id="grid-layer"></select>
-            </label>
-            <label>
-              Metric
-              <select id="grid-variable"></select>
-            </label>
-            <label style="font-size:0.82rem;align-items:center;gap:0.5rem;display:flex;margin-top:0.5rem;">
-              <input id="toggle-log-scale" type="checkbox" />
-              <span>Scale with log(1-p)</span>
-            </label>
-            <div class="legend" id="grid-legend">
-              <span>Min —</span>
-              <span>Max —</span>
-            </div>
-            <label style="font-size:0.82rem;align-items:center;gap:0.5rem;display:flex;">
-              <input id="toggle-grid" type="checkbox" checked />
-              Show grid overlay
-            </label>
-            <label style="font-size:0.82rem;align-items:center;gap:0.5rem;display:flex;">
-              <input id="toggle-need" type="checkbox" />
-              Enable derived need & opportunity layer
-            </label>
-          </div>
-        </div>
-      </section>
-
-      <section class="panel" id="analysis-panel">
-        <header>
-          <h2>Spatial Analysis</h2>
-          <p>Map views and derived Need & Opportunity analytics.</p>
-        </header>
-        <div class="tabs">
-          <div class="tab" data-tab="map" data-active="true">Map view</div>
-          <div class="tab" data-tab="need">Need & Opportunity</div>
-        </div>
-        <div class="map-container" id="map-container">
-          <div id="map-root"></div>
-          <div class="map-site-legend hidden" id="map-site-legend"></div>
-          <div class="map-grid-legend hidden" id="map-grid-legend"></div>
-        </div>
-        <div class="need-container" id="need-view" style="display:none;">
-          <div class="need-layout">
-            <div>
-              <h3 style="margin:0 0 0.8rem;font-size:1rem;">Weight configuration</h3>
-              <table>
-                <thead>
-                  <tr>
-                    <th>PTI score</th>
-                    <th>Need</th>
-                    <th>Opportunity</th>
-                  </tr>
-                </thead>
-                <tbody id="weights-table"></tbody>
-              </table>
-              <button id="recompute-btn">Generate scores</button>
-              <p id="score-summary" style="margin:0.7rem 0 0;font-size:0.85rem;color:rgba(226,232,240,0.75);">
-                Need: 0.00 • Opportunity: 0.00 • Combined: 0.00
-              </p>
-            </div>
-            <div class="analytics-card">
-              <div>
-                <h4 style="margin:0 0 0.4rem;font-size:0.95rem;">Need vs Opportunity</h4>
-                <div id="scatter-placeholder" style="height:180px;display:flex;align-items:center;justify-content:center;background:rgba(255,255,255,0.04);border-radius:12px;">
-                  Scatter plot placeholder
-                </div>
-              </div>
-              <div>
-                <h4 style="margin:0 0 0.4rem;font-size:0.95rem;">Combined score distribution</h4>
-                <div id="hist-placeholder" style="height:160px;display:flex;align-items:center;justify-content:center;background:rgba(255,255,255,0.04);border-radius:12px;">
-                  Histogram placeholder
-                </div>
-              </div>
-            </div>
-          </div>
-        </div>
-      </section>
-
-      <section class="panel" id="detail-panel">
-        <header>
-          <h2>Selection Details</h2>
-          <p>Contextual information for the active site or grid cell.</p>
-        </header>
-        <div class="panel__body" style="padding:1.1rem 0 0;">
-          <div class="detail-section" id="detail-header">
-            <div class="pill" id="detail-type">Site</div>
-            <h3 id="detail-title" style="margin-top:0.6rem;font-size:1.05rem;letter-spacing:0;">–</h3>
-            <p id="detail-subtitle" style="margin:0.35rem 1.4rem 0;font-size:0.9rem;color:rgba(226,232,240,0.75);">
-              Select a site to view attributes.
-            </p>
-          </div>
-          <div class="detail-section" id="detail-core">
-            <h3>Site attributes</h3>
-            <div class="kv-list" id="site-attributes"></div>
-          </div>
-          <div class="detail-section" id="detail-grid">
-            <h3>H3 context</h3>
-            <div class="kv-list" id="grid-attributes"></div>
-          </div>
-        </div>
-      </section>
-    </div>
-
-    <script id="site-datasets-data" type="application/json">__SITE_DATASETS__</script>
-    <script id="site-features-data" type="application/json">__SITE_FEATURES__</script>
-    <script id="grid-datasets-data" type="application/json">__GRID_DATASETS__</script>
-    <script id="grid-values-data" type="application/json">__GRID_VALUES__</script>
-    <script id="grid-geometry-data" type="application/json">__GRID_GEOMETRY__</script>
-
-    <script>
-      const SITE_DATASETS = JSON.parse(document.getElementById("site-datasets-data").textContent);
-      const SITE_FEATURES = JSON.parse(document.getElementById("site-features-data").textContent);
-      const GRID_DATASETS_META = JSON.parse(document.getElementById("grid-datasets-data").textContent);
-      const GRID_VALUES = JSON.parse(document.getElementById("grid-values-data").textContent);
-      const GRID_GEOMETRY = JSON.parse(document.getElementById("grid-geometry-data").textContent);
-      const GRID_LAYERS = Object.entries(GRID_DATASETS_META.feature_sets).map(([id, config]) => ({
-        id,
-        name: config.label,
-        path: config.path,
-        variables: config.variables,
-      }));
-
-      const PTI_SCORES = [
-        { id: "population_score", label: "Population pressure" },
-        { id: "displacement_score", label: "Displacement" },
-        { id: "climate_score", label: "Climate exposure" },
-        { id: "conflict_score", label: "Conflict" },
-        { id: "food_nutrition_security_score", label: "Food & nutrition" },
-        { id: "access_services_score", label: "Access to services" },
-        { id: "economic_activity_score", label: "Economic activity" },
-      ];
-
-      const CATEGORY_COLORS = [
-        "#5b63f4",
-        "#22d3ee",
-        "#34d399",
-        "#facc15",
-        "#f97316",
-        "#f472b6",
-        "#14b8a6",
-        "#ef4444",
-        "#a855f7",
-        "#0ea5e9",
-      ];
-
-      const COLOR_MAPS = {
-        continuous: [
-          { id: "blue-red", name: "Blue to Red", start: [91, 99, 244], end: [239, 68, 68] },
-          { id: "viridis", name: "Viridis", start: [68, 1, 84], end: [253, 231, 37] },
-          { id: "plasma", name: "Plasma", start: [13, 8, 135], end: [240, 249, 33] },
-          { id: "green-blue", name: "Green to Blue", start: [34, 211, 153], end: [14, 165, 233] },
-          { id: "purple-orange", name: "Purple to Orange", start: [168, 85, 247], end: [249, 115, 22] },
-        ],
-        categorical: [
-          { id: "default", name: "Default", colors: CATEGORY_COLORS },
-          { id: "pastel", name: "Pastel", colors: ["#a8e6cf", "#ffd3b6", "#ffaaa5", "#ff8b94", "#c7ceea", "#b4a7d6", "#dda0dd", "#98d8c8"] },
-          { id: "bright", name: "Bright", colors: ["#ff6b6b", "#4ecdc4", "#45b7d1", "#f9ca24", "#f0932b", "#eb4d4b", "#6c5ce7", "#a29bfe"] },
-          { id: "earth", name: "Earth tones", colors: ["#8b4513", "#cd853f", "#daa520", "#b8860b", "#9acd32", "#6b8e23", "#556b2f", "#2f4f2f"] },
+        features_dict[dataset_id] = _encode_site_columns(
+            _load_dataset_features(dataset_id), _site_fields(SITE_DATASETS[dataset_id])
+        )
+    grid_meta, grid_values, grid_cells = _load_grid_datasets()
+    with span("grid_rollups"):
+        grid_levels = _grid_levels(grid_values, grid_cells)
+    weight_layer, weight_column = GRID_POPULATION_WEIGHT
+    grid_meta = {
+        **grid_meta,
+        "population_weight": {"layerId": weight_layer, "variableId": weight_column},
+        "viewport_levels": [
+            {"resolution": resolution, "minZoom": GRID_RESOLUTIONS[resolution]["min_zoom"]}
+            for resolution in _viewport_resolutions()
         ],
-      };
-
-      function toNumber(value) {
-        if (value === null || value === undefined || value === "") return null;
-        const num = Number(value);
-        return Number.isFinite(num) ? num : null;
-      }
-
-      function getFeatureValue(feature, variable) {
-        if (!variable) return null;
-        const raw = feature?.properties?.[variable.id];
-        if (raw === undefined || raw === null || raw === "") return null;
-        return variable.type === "numeric" ? toNumber(raw) : String(raw);
-      }
-
-      function computeLegendData(features, variable, colorMapId) {
-        if (!variable) return null;
-        if (variable.type === "categorical") {
-          const seen = new Map();
-          const categories = [];
-          const map = COLOR_MAPS.categorical.find(m => m.id === colorMapId) || COLOR_MAPS.categorical[0];
-          const colors = map.colors || CATEGORY_COLORS;
-          const register = (value) => {
-            const key = value === null || value === undefined || value === "" ? "Unknown" : String(value);
-            if (seen.has(key) || categories.length >= colors.length) {
-              return;
-            }
-            const color = colors[categories.length % colors.length];
-            const entry = { value: key, color };
-            seen.set(key, entry);
-            categories.push(entry);
-          };
-          features.forEach((feature) => register(feature?.properties?.[variable.id]));
-          if (!categories.length) {
-            register("Unknown");
-          }
-          return { type: "categorical", categories, colorMap: Object.fromEntries(categories.map((entry) => [entry.value, entry.color])) };
-        }
-        let min = Infinity;
-        let max = -Infinity;
-        features.forEach((feature) => {
-          const value = toNumber(feature?.properties?.[variable.id]);
-          if (value === null) return;
-          if (value < min) min = value;
-          if (value > max) max = value;
-        });
-        if (!Number.isFinite(min) || !Number.isFinite(max)) {
-          return null;
-        }
-        if (min === max) {
-          max = min + 1;
-        }
-        return { type: "numeric", min, max };
-      }
-
-      function applyLogScale(value) {
-        if (value === null || value === undefined) return null;
-        const numValue = toNumber(value);
-        if (numValue === null || !Number.isFinite(numValue)) return null;
-        // Apply log(1-p) transformation: log(1 + value) to handle zeros
-        // Using log(1 + value) as standard approach for zero-handling
-        if (numValue < 0) return null; // Can't log negative values in this context
-        return Math.log(1 + numValue);
-      }
-
-      function computeLegendDataFromGrid(valuesMap, variable, useLogScale = false) {
-        if (!variable) return null;
-        if (variable.type === "categorical") {
-          const seen = new Map();
-          const categories = [];
-          Object.values(valuesMap).forEach((row) => {
-            const value = row?.[variable.id];
-            const key = value === null || value === undefined || value === "" ? "Unknown" : String(value);
-            if (seen.has(key) || categories.length >= CATEGORY_COLORS.length) {
-              return;
-            }
-            const color = CATEGORY_COLORS[categories.length % CATEGORY_COLORS.length];
-            const entry = { value: key, color };
-            seen.set(key, entry);
-            categories.push(entry);
-          });
-          if (!categories.length) {
-            const entry = { value: "Unknown", color: CATEGORY_COLORS[0] };
-            categories.push(entry);
-            seen.set("Unknown", entry);
-          }
-          return { type: "categorical", categories, colorMap: Object.fromEntries(categories.map((entry) => [entry.value, entry.color])) };
-        }
-        let min = Infinity;
-        let max = -Infinity;
-        let originalMin = Infinity;
-        let originalMax = -Infinity;
-        Object.values(valuesMap).forEach((row) => {
-          const originalValue = toNumber(row?.[variable.id]);
-          if (originalValue === null) return;
-          // Track original values
-          if (originalValue < originalMin) originalMin = originalValue;
-          if (originalValue > originalMax) originalMax = originalValue;
-          // Transform for color calculation
-          let value = originalValue;
-          if (useLogScale) {
-            value = applyLogScale(value);
-            if (value === null) return;
-          }
-          if (value < min) min = value;
-          if (value > max) max = value;
-        });
-        if (!Number.isFinite(min) || !Number.isFinite(max)) {
-          originalMin = toNumber(variable.min);
-          originalMax = toNumber(variable.max);
-          min = originalMin;
-          max = originalMax;
-          if (useLogScale && Number.isFinite(min) && Number.isFinite(max)) {
-            min = applyLogScale(min);
-            max = applyLogScale(max);
-          }
-        }
-        if (!Number.isFinite(min) || !Number.isFinite(max)) {
-          return null;
-        }
-        if (min === max) {
-          max = min + 1;
-        }
-        // If we didn't find original values from data, use variable metadata
-        if (!Number.isFinite(originalMin) || !Number.isFinite(originalMax)) {
-          originalMin = toNumber(variable.min);
-          originalMax = toNumber(variable.max);
-        }
-        return { type: "numeric", min, max, originalMin, originalMax, useLogScale };
-      }
-
-      function updateGridLegendPanel(legend, layerMeta, variable) {
-        if (!mapGridLegend) return;
-        if (!legend || !variable || !state.showGrid) {
-          mapGridLegend.classList.add("hidden");
-          mapGridLegend.innerHTML = "";
-          return;
-        }
-        mapGridLegend.classList.remove("hidden");
-        const datasetLabel = layerMeta?.name ?? "Grid layer";
-        const variableLabel = variable?.label ?? "Variable";
-        if (legend.type === "numeric") {
-          // Use original values for display if log scale is applied
-          const displayMin = legend.originalMin !== undefined ? legend.originalMin : legend.min;
-          const displayMax = legend.originalMax !== undefined ? legend.originalMax : legend.max;
-          mapGridLegend.innerHTML = `
-            <div class="map-legend-header">
-              <span>${datasetLabel}</span>
-              <strong>${variableLabel}</strong>
-            </div>
-            <div class="map-legend-title">Legend</div>
-            <div class="map-legend-gradient">
-              <div class="map-legend-gradient-bar"></div>
-              <div class="map-legend-gradient-labels">
-                <span>${formatLegendValue(displayMin)}</span>
-                <span>${formatLegendValue(displayMax)}</span>
-              </div>
-            </div>
-          `;
-        } else {
-          const items = legend.categories
-            .map((entry) => `
-              <div class="map-legend-item">
-                <span class="map-legend-swatch" style="background:${entry.color};"></span>
-                <span>${entry.value}</span>
-              </div>
-            `)
-            .join("");
-          mapGridLegend.innerHTML = `
-            <div class="map-legend-header">
-              <span>${datasetLabel}</span>
-              <strong>${variableLabel}</strong>
-            </div>
-            <div class="map-legend-title">Legend</div>
-            <div class="map-legend-items">${items}</div>
-          `;
-        }
-      }
-
-      function interpolateColor(t, colorMap) {
-        const clamp = Math.min(1, Math.max(0, t));
-        const start = colorMap?.start || [91, 99, 244];
-        const end = colorMap?.end || [239, 68, 68];
-        const channel = (index) => Math.round(start[index] + (end[index] - start[index]) * clamp);
-        return `rgb(${channel(0)}, ${channel(1)}, ${channel(2)})`;
-      }
-
-      function colorForValue(value, legend, colorMapId) {
-        if (!legend) {
-          return "#000000";
-        }
-        if (legend.type === "numeric") {
-          if (value === null) return "#94a3b8";
-          const t = (value - legend.min) / (legend.max - legend.min);
-          const map = COLOR_MAPS.continuous.find(m => m.id === colorMapId) || COLOR_MAPS.continuous[0];
-          return interpolateColor(t, map);
-        }
-        const key = value === null || value === undefined || value === "" ? "Unknown" : String(value);
-        const map = COLOR_MAPS.categorical.find(m => m.id === colorMapId) || COLOR_MAPS.categorical[0];
-        const colorIndex = legend.categories.findIndex(c => c.value === key);
-        if (colorIndex >= 0 && map.colors) {
-          return map.colors[colorIndex % map.colors.length];
-        }
-        return legend.colorMap?.[key] || "#94a3b8";
-      }
-
-      function updateLegend(legend, variable, colorMapId) {
-        if (!mapLegend) return;
-        const dataset = getActiveDataset();
-        const variableLabel = variable ? variable.label : "None";
-        mapLegend.classList.remove("hidden");
-        if (!legend || !variable) {
-          mapLegend.innerHTML = `
-            <div class="map-legend-header">
-              <span>${dataset?.label ?? "Sites"}</span>
-              <strong>${variableLabel}</strong>
-            </div>
-            <div class="map-legend-title">Legend</div>
-            <div class="empty-state" style="background:rgba(255,255,255,0.04);border-radius:12px;padding:0.5rem;text-align:center;">No color mapping</div>
-          `;
-          return;
-        }
-        if (legend.type === "numeric") {
-          const map = COLOR_MAPS.continuous.find(m => m.id === colorMapId) || COLOR_MAPS.continuous[0];
-          const startColor = `rgb(${map.start[0]}, ${map.start[1]}, ${map.start[2]})`;
-          const endColor = `rgb(${map.end[0]}, ${map.end[1]}, ${map.end[2]})`;
-          mapLegend.innerHTML = `
-            <div class="map-legend-header">
-              <span>${dataset.label}</span>
-              <strong>${variableLabel}</strong>
-            </div>
-            <div class="map-legend-title">Legend</div>
-            <div class="map-legend-gradient">
-              <div class="map-legend-gradient-bar" style="background: linear-gradient(90deg, ${startColor} 0%, ${endColor} 100%);"></div>
-              <div class="map-legend-gradient-labels">
-                <span>${formatLegendValue(legend.min)}</span>
-                <span>${formatLegendValue(legend.max)}</span>
-              </div>
-            </div>
-          `;
-        } else {
-          const items = legend.categories
-            .map((entry) => `
-              <div class="map-legend-item">
-                <span class="map-legend-swatch" style="background:${entry.color};"></span>
-                <span>${entry.value}</span>
-              </div>
-            `)
-            .join("");
-          mapLegend.innerHTML = `
-            <div class="map-legend-header">
-              <span>${dataset.label}</span>
-              <strong>${variableLabel}</strong>
-            </div>
-            <div class="map-legend-title">Legend</div>
-            <div class="map-legend-items">${items}</div>
-          `;
-        }
-      }
-
-      const datasetIds = Object.keys(SITE_DATASETS);
-      const initialDatasetId = datasetIds[0];
-      const initialDatasetConfig = SITE_DATASETS[initialDatasetId];
-
-      const state = {
-        siteDataset: initialDatasetId,
-        siteVariable: "__none__",
-        gridLayer: GRID_LAYERS[0].id,
-        gridVariable: GRID_LAYERS[0].variables[0].id,
-        features: SITE_FEATURES[initialDatasetId] || [],
-        selectedIndex: 0,
-        markerSize: 3,
-        showSites: true,
-        showGrid: true,
-        colorMap: "blue-red",
-        useLogScale: false,
-        gridMeta: GRID_DATASETS_META,
-        weights: PTI_SCORES.reduce((acc, item) => {
-          acc[item.id] = {
-            need: item.id === "population_score" || item.id === "displacement_score" ? 1 : 0,
-            opp: item.id === "access_services_score" || item.id === "economic_activity_score" ? 1 : 0,
-          };
-          return acc;
-        }, {}),
-      };
-
-      const siteDatasetSelect = document.getElementById("site-dataset");
-      const siteVariableSelect = document.getElementById("site-variable");
-      const colorMapSelect = document.getElementById("color-map");
-      const toggleSites = document.getElementById("toggle-sites");
-      const markerSizeValue = document.getElementById("marker-size-value");
-      const siteLegend = document.getElementById("site-legend");
-      const gridLayerSelect = document.getElementById("grid-layer");
-      const gridVariableSelect = document.getElementById("grid-variable");
-      const gridLegend = document.getElementById("grid-legend");
-      const toggleGrid = document.getElementById("toggle-grid");
-      const toggleNeed = document.getElementById("toggle-need");
-      const toggleLogScale = document.getElementById("toggle-log-scale");
-      const tabButtons = document.querySelectorAll(".tab");
-      const mapContainer = document.getElementById("map-container");
-      const mapLegend = document.getElementById("map-site-legend");
-      const mapGridLegend = document.getElementById("map-grid-legend");
-      const markerSizeInput = document.getElementById("marker-size");
-      const weightsTable = document.getElementById("weights-table");
-      const scoreSummary = document.getElementById("score-summary");
-      const detailType = document.getElementById("detail-type");
-      const detailTitle = document.getElementById("detail-title");
-      const detailSubtitle = document.getElementById("detail-subtitle");
-      const siteAttributesEl = document.getElementById("site-attributes");
-      const gridAttributesEl = document.getElementById("grid-attributes");
-
-      if (markerSizeInput) {
-        markerSizeInput.value = state.markerSize;
-        markerSizeInput.min = 1;
-        markerSizeInput.max = 18;
-        if (markerSizeValue) {
-          markerSizeValue.textContent = state.markerSize;
-        }
-      }
-      if (toggleSites) {
-        toggleSites.checked = state.showSites;
-      }
-      if (toggleGrid) {
-        toggleGrid.checked = state.showGrid;
-      }
-
-      let map = null;
-      let markersLayer = null;
-      let gridOverlayLayer = null;
-
-      function getActiveDataset() {
-        return SITE_DATASETS[state.siteDataset];
-      }
-
-      function getActiveSiteVariable() {
-        if (state.siteVariable === "__none__" || !state.siteVariable) {
-          return null;
-        }
-        const dataset = getActiveDataset();
-        return dataset.color_fields.find((field) => field.id === state.siteVariable) ?? null;
-      }
-
-      function formatLegend(variable) {
-        if (!variable) return ["–", "–"];
-        if (variable.type === "categorical") {
-          const size = variable.categories ? variable.categories.length : "";
-          return ["Categorical", size ? `${size} values` : "—"];
-        }
-        const formatter = new Intl.NumberFormat("en-US", { maximumFractionDigits: variable.max > 10 ? 0 : 2 });
-        return [formatter.format(variable.min ?? 0), formatter.format(variable.max ?? 0)];
-      }
-
-      function formatLegendValue(value) {
-        if (value === null || value === undefined) return "—";
-        if (typeof value === "number") {
-          const formatter = new Intl.NumberFormat("en-US", { maximumFractionDigits: Math.abs(value) < 1 ? 2 : 0 });
-          return formatter.format(value);
-        }
-        return String(value);
-      }
-
-      function renderSiteSelectors() {
-        siteDatasetSelect.innerHTML = datasetIds
-          .map((id) => `<option value="${id}">${SITE_DATASETS[id].label}</option>`)
-          .join("");
-        siteDatasetSelect.value = state.siteDataset;
-        updateSiteVariables();
-      }
-
-      function updateSiteVariables() {
-        const dataset = getActiveDataset();
-        siteVariableSelect.innerHTML = `<option value="__none__">None</option>` + dataset.color_fields
-          .map((variable) => `<option value="${variable.id}">${variable.label}</option>`)
-          .join("");
-        if (state.siteVariable === "__none__" || !dataset.color_fields.find((field) => field.id === state.siteVariable)) {
-          state.siteVariable = "__none__";
-        }
-        siteVariableSelect.value = state.siteVariable ?? "__none__";
-        const variable = getActiveSiteVariable();
-        updateColorMapOptions(variable);
-      }
-
-      function updateColorMapOptions(variable) {
-        if (!colorMapSelect) return;
-        if (!variable) {
-          colorMapSelect.disabled = true;
-          colorMapSelect.style.opacity = "0.5";
-          colorMapSelect.style.cursor = "not-allowed";
-          return;
-        }
-        colorMapSelect.disabled = false;
-        colorMapSelect.style.opacity = "1";
-        colorMapSelect.style.cursor = "pointer";
-        const maps = variable.type === "categorical" ? COLOR_MAPS.categorical : COLOR_MAPS.continuous;
-        colorMapSelect.innerHTML = maps
-          .map((map) => `<option value="${map.id}">${map.name}</option>`)
-          .join("");
-        if (!maps.find(m => m.id === state.colorMap)) {
-          state.colorMap = maps[0].id;
-        }
-        colorMapSelect.value = state.colorMap;
-      }
-
-      function renderGridSelectors() {
-        gridLayerSelect.innerHTML = GRID_LAYERS.map(
-          (layer) => `<option value="${layer.id}">${layer.name}</option>`
-        ).join("");
-        gridLayerSelect.value = state.gridLayer;
-        updateGridVariables();
-      }
-
-      function updateGridVariables() {
-        const layer = GRID_LAYERS.find((item) => item.id === state.gridLayer);
-        gridVariableSelect.innerHTML = layer.variables
-          .map((variable) => `<option value="${variable.id}">${variable.label}</option>`)
-          .join("");
-        if (!layer.variables.find((item) => item.id === state.gridVariable)) {
-          state.gridVariable = layer.variables[0].id;
-        }
-        gridVariableSelect.value = state.gridVariable;
-        const variable = layer.variables.find((item) => item.id === state.gridVariable);
-        if (variable) {
-          const minText = formatLegendValue(variable.min);
-          const maxText = formatLegendValue(variable.max);
-          gridLegend.children[0].textContent = `Min ${minText}`;
-          gridLegend.children[1].textContent = `Max ${maxText}`;
-        } else {
-          gridLegend.children[0].textContent = "Min —";
-          gridLegend.children[1].textContent = "Max —";
+        "catchment_radii_km": list(CATCHMENT_RADII_KM),
+        "coverage": {
+            "populations": [
+                {"id": name, "label": GRID_FEATURE_CONFIG[layer_id]["labels"].get(column, column)}
+                for name, (layer_id, column) in COVERAGE_POPULATIONS.items()
+            ],
+            "existing": SITE_DATASETS[COVERAGE_EXISTING_DATASET]["label"],
+            "maxSites": COVERAGE_MAX_SITES,
+        },
+        "hotspots": {"rings": list(HOTSPOT_RINGS), "alpha": HOTSPOT_ALPHA, "permutations": HOTSPOT_PERMUTATIONS},
+        "expression_layer": {"id": GRID_EXPRESSION_LAYER, "label": "Derived variables"},
+    }
+
+    with span("serialize_payload") as record:
+        payload = {
+            "siteDatasets": json.dumps({k: {**v, "path": str(v["path"])} for k, v in SITE_DATASETS.items()}),
+            "siteFeatures": json.dumps(features_dict),
+            "gridDatasets": json.dumps(grid_meta),
+            "gridLevels": json.dumps(grid_levels),
         }
-        renderGridOverlay();
-      }
+        record.fields["payload_bytes"] = sum(len(value) for value in payload.values())
+
+    digest = hashlib.sha1()
+    for name, value in payload.items():
+        digest.update(name.encode("utf-8"))
+        digest.update(value.encode("utf-8"))
+    return {**payload, "version": digest.hexdigest()}
+
+
+def _viewport_resolutions() -> list[int]:
+    """Resolutions finer than the base whose cell polygons are on disk, finest first."""
+    return sorted(
+        (
+            resolution
+            for resolution, settings in GRID_RESOLUTIONS.items()
+            if resolution > GRID_BASE_RESOLUTION and settings["geometry"].exists()
+        ),
+        reverse=True,
+    )
 
-      function formatValue(value) {
-        if (value === null || value === undefined || value === "") {
-          return "—";
-        }
-        if (typeof value === "number") {
-          const formatter = new Intl.NumberFormat("en-US", { maximumFractionDigits: Math.abs(value) < 1 ? 2 : 0 });
-          return formatter.format(value);
-        }
-        return value;
-      }
-
-      function getFeatureTitle(feature, dataset) {
-        const field = dataset.display?.title_field;
-        return field ? feature.properties[field] ?? feature.properties.name ?? "Untitled" : feature.properties.name ?? "Untitled";
-      }
-
-      function getFeatureSubtitle(feature, dataset) {
-        const fields = dataset.display?.subtitle_fields ?? [];
-        const parts = fields
-          .map((field) => feature.properties[field])
-          .filter(Boolean)
-          .join(" • ");
-        return parts || feature.summary || "";
-      }
-
-      function getFeatureMeta(feature, dataset) {
-        const metaField = dataset.display?.meta_field;
-        if (!metaField) return "";
-        const raw = feature.properties[metaField];
-        if (raw === undefined || raw === null || raw === "") return "";
-        const label = dataset.display.meta_label ? ` ${dataset.display.meta_label}` : "";
-        return `${formatValue(raw)}${label}`;
-      }
-
-      function renderWeightsTable() {
-        weightsTable.innerHTML = PTI_SCORES.map((score) => {
-          const values = state.weights[score.id];
-          return `
-            <tr data-score="${score.id}">
-              <td>${score.label}</td>
-              <td><input type="number" step="0.1" min="-1" max="1" value="${values.need}" data-kind="need" /></td>
-              <td><input type="number" step="0.1" min="-1" max="1" value="${values.opp}" data-kind="opp" /></td>
-            </tr>
-          `;
-        }).join("");
-      }
-
-      function recomputeScores() {
-        const need = Object.entries(state.weights).reduce((sum, [_, values], index) => sum + values.need * (0.1 * (index + 1)), 0);
-        const opportunity = Object.entries(state.weights).reduce((sum, [_, values], index) => sum + values.opp * (0.08 * (index + 1)), 0);
-        const combined = need + opportunity;
-        scoreSummary.textContent = `Need: ${need.toFixed(2)} • Opportunity: ${opportunity.toFixed(2)} • Combined: ${combined.toFixed(2)}`;
-      }
-
-      function ensureMap() {
-        if (map || typeof L === "undefined") {
-          if (!map && typeof L === "undefined") {
-            const fallback = document.createElement("div");
-            fallback.id = "map-fallback";
-            fallback.style.position = "absolute";
-            fallback.style.inset = "0";
-            fallback.style.display = "flex";
-            fallback.style.alignItems = "center";
-            fallback.style.justifyContent = "center";
-            fallback.style.padding = "1rem";
-            fallback.style.textAlign = "center";
-            fallback.style.background = "rgba(7, 10, 22, 0.8)";
-            fallback.textContent = "Leaflet failed to load. Check network access.";
-            mapContainer.appendChild(fallback);
-          }
-          return;
-        }
-        map = L.map("map-root", {
-          attributionControl: true,
-          zoomControl: true,
-        }).setView([15.5, 44], 6);
-        L.tileLayer("https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png", {
-          maxZoom: 18,
-          attribution: "&copy; OpenStreetMap contributors",
-        }).addTo(map);
-        markersLayer = L.layerGroup().addTo(map);
-      }
-
-      function refreshMarkers(shouldFit = false) {
-        ensureMap();
-        if (!map || !markersLayer) return;
-        markersLayer.clearLayers();
-        if (!state.showSites) {
-          renderGridOverlay();
-          return;
-        }
-        const features = state.features;
-        const variable = getActiveSiteVariable();
-        const legendData = variable ? computeLegendData(features, variable, state.colorMap) : null;
-        updateLegend(legendData, variable, state.colorMap);
-        if (!features.length) {
-          renderGridOverlay();
-          return;
-        }
-        const latLngs = [];
-        const baseSize = state.markerSize || 3;
-        features.forEach((feature, index) => {
-          const latLng = [feature.lat, feature.lon];
-          latLngs.push(latLng);
-          const value = variable ? getFeatureValue(feature, variable) : null;
-          const color = colorForValue(value, legendData, state.colorMap);
-          const isSelected = index === state.selectedIndex;
-          const marker = L.circleMarker(latLng, {
-            radius: isSelected ? baseSize + 3 : baseSize,
-            color: isSelected ? "#ffffff" : color,
-            weight: isSelected ? 2.5 : 1.5,
-            fillColor: color,
-            fillOpacity: 0.9,
-          }).on("click", () => {
-            state.selectedIndex = index;
-            updatePanels();
-            refreshMarkers();
-          });
-          const title = getFeatureTitle(feature, getActiveDataset());
-          marker.bindTooltip(title, { direction: "top" });
-          marker.addTo(markersLayer);
-        });
-        if (shouldFit && latLngs.length) {
-          if (latLngs.length > 1) {
-            map.fitBounds(latLngs, { padding: [30, 30] });
-          } else {
-            map.setView(latLngs[0], 10);
-          }
-        }
-        renderGridOverlay();
-      }
-
-      function renderGridOverlay() {
-        ensureMap();
-        if (!map) return;
-        if (gridOverlayLayer) {
-          gridOverlayLayer.remove();
-          gridOverlayLayer = null;
-        }
-        if (!state.showGrid) {
-          updateGridLegendPanel(null, null, null);
-          return;
-        }
-        const layerMeta = GRID_LAYERS.find((layer) => layer.id === state.gridLayer);
-        if (!layerMeta) {
-          updateGridLegendPanel(null, null, null);
-          return;
-        }
-        const variable = layerMeta.variables.find((item) => item.id === state.gridVariable) ?? layerMeta.variables[0];
-        if (!variable) {
-          updateGridLegendPanel(null, layerMeta, null);
-          return;
+
+@timed_cache("grid_viewport_tile", st.cache_data(ttl=3600, max_entries=64, show_spinner=False))
+def _grid_viewport_tile(
+    resolution: int, west: float, south: float, east: float, north: float
+) -> Optional[Dict[str, Any]]:
+    """Cells of a fine resolution intersecting a tile-aligned box, or ``None`` above the cell limit."""
+    _, frames, cells = _load_grid_datasets(resolution)
+    positions = cells.intersecting(west, south, east, north)
+    if len(positions) > GRID_VIEWPORT_MAX_CELLS:
+        return None
+    return {
+        "key": f"{resolution}:{west},{south},{east},{north}",
+        "resolution": resolution,
+        "bounds": [south, west, north, east],
+        "cellIds": [cells.cell_ids[position] for position in positions],
+        "geometry": cells.to_geojson(GRID_RESOLUTIONS[resolution]["id_field"], positions, decimals=6),
+        "values": _encoded_columns({layer_id: frame.iloc[positions] for layer_id, frame in frames.items()}),
+    }
+
+
+def _grid_viewport(view: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Fine-resolution cells around the explorer's viewport, when its zoom calls for them.
+
+    The reported bounds are padded by a quarter of the view and snapped outwards to the
+    resolution's tile size, so small pans stay inside the delivered area and nearby views share
+    cached tiles.
+    """
+    if not view or not view.get("showGrid") or not view.get("bounds") or view.get("zoom") is None:
+        return None
+    resolution = next(
+        (res for res in _viewport_resolutions() if view["zoom"] >= GRID_RESOLUTIONS[res]["min_zoom"]), None
+    )
+    if resolution is None:
+        return None
+    tile = GRID_RESOLUTIONS[resolution]["tile_degrees"]
+    south, west, north, east = view["bounds"]
+    pad_lat, pad_lon = (north - south) / 4, (east - west) / 4
+    with span("grid_viewport", resolution=resolution):
+        return _grid_viewport_tile(
+            resolution,
+            math.floor((west - pad_lon) / tile) * tile,
+            math.floor((south - pad_lat) / tile) * tile,
+            math.ceil((east + pad_lon) / tile) * tile,
+            math.ceil((north + pad_lat) / tile) * tile,
+        )
+
+
+@st.cache_resource(ttl=3600, show_spinner=False)
+def _grid_context_index() -> Dict[str, Any]:
+    """Grid cells for point lookup, their adjacency and the per-layer value frames, shared by all sessions."""
+    _, grid_values, grid_cells = _load_grid_datasets()
+    with span("grid_adjacency", cells=len(grid_cells)):
+        adjacency = CellAdjacency.from_cells(grid_cells)
+    return {"cells": grid_cells, "adjacency": adjacency, "values": grid_values}
+
+
+@st.cache_resource(ttl=3600, show_spinner=False)
+def _site_detail_index(dataset_id: str) -> Dict[str, Any]:
+    """Position of every site by id, its properties and the grid cell it falls in.
+
+    Held as a shared resource rather than in ``st.cache_data``, which would copy the columns on
+    every lookup; the returned objects must be treated as read-only.
+    """
+    columns = _load_dataset_features(dataset_id)
+    cells = _grid_context_index()["cells"]
+    return {
+        "positions": {site_id: position for position, site_id in enumerate(columns["ids"])},
+        "properties": columns["properties"],
+        "lon": columns["lon"],
+        "lat": columns["lat"],
+        "cells": cells.locate(columns["lon"], columns["lat"]),
+    }
+
+
+@st.cache_resource(ttl=3600, show_spinner=False)
+def _catchment_index() -> CentroidIndex:
+    """Centroid index of the base grid for catchment queries, shared by all sessions."""
+    return CentroidIndex.from_cells(_grid_context_index()["cells"])
+
+
+def grid_catchments(lon: Any, lat: Any, radius_km: float, partial: bool = True) -> pd.DataFrame:
+    """Catchment statistics of ``CATCHMENT_LAYERS`` within ``radius_km`` of each point.
+
+    One row per point: ``cells`` (the share-weighted cell count) and one column per variable,
+    combined with its rollup operator. With ``partial`` cells straddling the radius count in
+    proportion to their overlap, which matters at radii close to the res-5 cell size.
+    """
+    grid = _grid_context_index()
+    frames = {layer_id: grid["values"][layer_id] for layer_id in CATCHMENT_LAYERS if layer_id in grid["values"]}
+    weight_layer, weight_column = GRID_POPULATION_WEIGHT
+    weights = grid["values"][weight_layer][weight_column].to_numpy() if weight_layer in grid["values"] else None
+    overrides = {layer_id: GRID_FEATURE_CONFIG[layer_id].get("aggregations") for layer_id in frames}
+    with span("grid_catchments", radius_km=radius_km, points=int(np.size(lon))):
+        index = _catchment_index()
+        tables = catchment_statistics(index, frames, lon, lat, radius_km * 1000.0, partial, overrides, weights)
+    return pd.concat(tables.values(), axis="columns")
+
+
+def site_catchments(dataset_id: str, radius_km: float, partial: bool = True) -> pd.DataFrame:
+    """:func:`grid_catchments` for every site of a dataset in one batch, indexed by site id."""
+    columns = _load_dataset_features(dataset_id)
+    table = grid_catchments(columns["lon"], columns["lat"], radius_km, partial)
+    table.index = pd.Index(columns["ids"], name="id")
+    return table
+
+
+def _point_catchments(lon: float, lat: float) -> Dict[str, Any]:
+    """Catchments around one point at every radius in ``CATCHMENT_RADII_KM``, JSON-ready by layer."""
+    grid = _grid_context_index()["values"]
+    catchments = {}
+    for radius_km in CATCHMENT_RADII_KM:
+        row = grid_catchments(lon, lat, radius_km).iloc[0]
+        catchments[str(radius_km)] = {
+            "cells": float(row["cells"]),
+            "values": {
+                layer_id: {
+                    column: None if np.isnan(row[column]) else float(row[column]) for column in grid[layer_id].columns
+                }
+                for layer_id in CATCHMENT_LAYERS
+                if layer_id in grid
+            },
         }
-        const valuesMap = GRID_VALUES[layerMeta.id] || {};
-        const legendData = computeLegendDataFromGrid(valuesMap, variable, state.useLogScale);
-        updateGridLegendPanel(legendData, layerMeta, variable);
-        if (!legendData) {
-          return;
+    return catchments
+
+
+@timed_cache("suggest_new_sites", st.cache_data(ttl=3600, max_entries=32, show_spinner=False))
+def suggest_new_sites(
+    k: int = 10,
+    radius_km: float = 10.0,
+    population: str = "worldpop2023_sum",
+    existing: Optional[str] = COVERAGE_EXISTING_DATASET,
+) -> Dict[str, Any]:
+    """Up to ``k`` new sites on base-grid cell centroids covering the most population within ``radius_km``.
+
+    ``population`` names an entry of ``COVERAGE_POPULATIONS``; cells within reach of the sites of
+    the ``existing`` dataset count as covered already. ``k`` is clamped to 1 to
+    ``COVERAGE_MAX_SITES`` and ``radius_km`` to the range of ``CATCHMENT_RADII_KM``. Returns
+    ``{"sites": DataFrame, "existing": population already covered, "total": population of the
+    grid, "radius_km": radius used}``; the frame lists the picks in order with their cell,
+    position and newly covered population.
+    """
+    if population not in COVERAGE_POPULATIONS:
+        raise ValueError(f"unknown coverage population {population!r}")
+    if not math.isfinite(radius_km):
+        raise ValueError("the service radius must be a finite number of km")
+    k = min(max(int(k), 1), COVERAGE_MAX_SITES)
+    radius_km = min(max(float(radius_km), min(CATCHMENT_RADII_KM)), max(CATCHMENT_RADII_KM))
+    grid = _grid_context_index()
+    cells = grid["cells"]
+    layer_id, column = COVERAGE_POPULATIONS[population]
+    weights = grid["values"][layer_id][column].to_numpy()
+    sites = _load_dataset_features(existing) if existing else None
+    centroids = cells.centroids
+    with span("suggest_new_sites", k=k, radius_km=radius_km):
+        chosen, gains, covered = optimize_coverage(
+            _catchment_index(),
+            centroids[:, 0],
+            centroids[:, 1],
+            weights,
+            radius_km * 1000.0,
+            k,
+            None if sites is None else sites["lon"],
+            None if sites is None else sites["lat"],
+        )
+    table = pd.DataFrame(
+        {
+            "cell": [cells.cell_ids[position] for position in chosen],
+            "lon": centroids[chosen, 0],
+            "lat": centroids[chosen, 1],
+            "population": gains,
+            "cumulative": np.cumsum(gains),
         }
-        gridOverlayLayer = L.geoJSON(GRID_GEOMETRY, {
-          style: (feature) => {
-            const h3 = feature?.properties?.h3_05;
-            const row = valuesMap[h3] || {};
-            const originalValue = row?.[variable.id] ?? null;
-            // Store original value in feature properties for tooltip
-            feature.properties._originalValue = originalValue;
-            feature.properties._variableLabel = variable.label;
-            // Transform for color calculation
-            let value = originalValue;
-            if (state.useLogScale && value !== null) {
-              value = applyLogScale(value);
+    )
+    return {"sites": table, "existing": covered, "total": float(np.nansum(weights)), "radius_km": radius_km}
+
+
+def _coverage_suggestions(request: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """JSON-ready :func:`suggest_new_sites` for the frontend's request, echoing the request.
+
+    Invalid requests are returned as ``{"request", "error"}`` for the explorer to show.
+    """
+    if not request:
+        return None
+    try:
+        k = int(request.get("k", 10))
+        radius_km = float(request.get("radiusKm", 10))
+        result = suggest_new_sites(k, radius_km, str(request.get("population")))
+    except (TypeError, ValueError, OverflowError) as error:
+        return {"request": request, "error": str(error)}
+    return {
+        "request": request,
+        "sites": result["sites"].round({"lon": 5, "lat": 5}).to_dict(orient="records"),
+        "existing": result["existing"],
+        "total": result["total"],
+        "radiusKm": result["radius_km"],
+    }
+
+
+def grid_spatial_lag(layer_id: str, column: str, k: int = 1) -> pd.Series:
+    """Mean of ``column`` over each base-grid cell's neighbours within ``k`` rings, by cell id.
+
+    The cell itself is left out; missing neighbour values are skipped.
+    """
+    grid = _grid_context_index()
+    adjacency = grid["adjacency"] if k == 1 else grid["adjacency"].k_ring(k, include_self=False)
+    values = grid["values"][layer_id][column]
+    return pd.Series(adjacency.lag(values.to_numpy()), index=values.index, name=f"{column}_lag{k}")
+
+
+def _grid_variable_label(layer_id: str, column: str) -> str:
+    if layer_id == GRID_EXPRESSION_LAYER:
+        return column
+    return GRID_FEATURE_CONFIG.get(layer_id, {}).get("labels", {}).get(column, _humanize_column(column))
+
+
+@timed_cache("grid_expression", st.cache_data(ttl=3600, max_entries=64, show_spinner=False))
+def grid_expression(expression: str) -> pd.Series:
+    """Value of a derived-variable expression over the base-grid layers, by cell id.
+
+    See :mod:`src.grid_expressions` for the syntax; columns of every ``GRID_FEATURE_CONFIG`` layer
+    can be used. Raises :class:`src.grid_expressions.ExpressionError` (a ``ValueError``) for
+    invalid expressions.
+    """
+    compiled = compile_expression(expression)
+    frames = _grid_context_index()["values"]
+    with span("grid_expression", columns=len(compiled.references)):
+        values = compiled.evaluate(frames)
+    return pd.Series(values, index=next(iter(frames.values())).index, name=compiled.text)
+
+
+def _grid_column(layer_id: str, column: str) -> pd.Series:
+    """A base-grid column by cell id: a layer variable, or an expression of the expression layer."""
+    if layer_id == GRID_EXPRESSION_LAYER:
+        return grid_expression(column)
+    frame = _grid_context_index()["values"].get(layer_id)
+    if frame is None or column not in frame.columns:
+        raise ValueError(f"unknown grid variable {layer_id}.{column}")
+    return frame[column]
+
+
+@timed_cache("grid_hotspots", st.cache_data(ttl=3600, max_entries=64, show_spinner=False))
+def grid_hotspots(
+    layer_id: str, column: str, rings: int = 1, permutations: int = HOTSPOT_PERMUTATIONS
+) -> pd.DataFrame:
+    """Getis-Ord Gi* of a base-grid variable: ``gi_z`` and ``p_value`` per cell, indexed by cell id.
+
+    Weights are binary ``rings``-ring neighbourhoods including the cell; p-values come from
+    ``permutations`` conditional permutations (none, and NaN p-values, with 0). ``layer_id`` may be
+    ``GRID_EXPRESSION_LAYER`` with an expression as ``column``. Raises ``ValueError`` for an
+    unknown layer or variable.
+    """
+    grid = _grid_context_index()
+    column_values = _grid_column(layer_id, column)
+    values = column_values.to_numpy(dtype=np.float64)
+    with span("grid_hotspots", rings=rings, permutations=permutations):
+        weights = grid["adjacency"].k_ring(rings)
+        z = gi_star(weights, values)
+        p = gi_star_pseudo_p(weights, values, permutations) if permutations else np.full(len(values), np.nan)
+    return pd.DataFrame({"gi_z": z, "p_value": p}, index=column_values.index)
+
+
+def _derived_grid_column(request: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Base-grid columns the explorer asked for that are computed on demand, echoing the request.
+
+    A ``{"kind": "hotspot", "layerId", "variableId", "rings"}`` request gives the variable's Gi*
+    z-scores (``z``) and p-values (``p``); ``{"kind": "expression", "expression"}`` gives the
+    expression's ``value``. Columns are base64 float32. Errors are returned as ``{"request",
+    "error"}`` for the explorer to show.
+    """
+    if not request:
+        return None
+    try:
+        if request.get("kind") == "hotspot":
+            rings = int(request.get("rings", 1))
+            if rings not in HOTSPOT_RINGS:
+                raise ValueError(f"unsupported hotspot neighbourhood of {rings} rings")
+            layer_id, column = str(request.get("layerId")), str(request.get("variableId"))
+            table = grid_hotspots(layer_id, column, rings)
+            label = f"Gi* z-score of {_grid_variable_label(layer_id, column)} ({rings}-ring)"
+            columns = {"z": table["gi_z"], "p": table["p_value"]}
+        elif request.get("kind") == "expression":
+            values = grid_expression(str(request.get("expression", "")))
+            label = str(values.name)
+            columns = {"value": values}
+        else:
+            raise ValueError(f"unknown derived column kind {request.get('kind')!r}")
+    except ValueError as error:
+        return {"request": request, "error": str(error)}
+    return {
+        "request": request,
+        "label": label,
+        "columns": {name: _encode_float32(values.to_numpy()) for name, values in columns.items()},
+    }
+
+
+def grid_zonal_statistics(geometry: Dict[str, Any]) -> Dict[str, Any]:
+    """Aggregate every base-grid layer over a GeoJSON Polygon or MultiPolygon.
+
+    A cell belongs to the area when its centroid does. Variables are combined with the same
+    operators as the zoomed-out rollups. Returns ``{"cells": count, "values": {layer: {variable:
+    value}}}``; the explorer computes the same statistics in the browser for drawn areas.
+    """
+    if geometry.get("type") == "Polygon":
+        polygons = [geometry["coordinates"]]
+    elif geometry.get("type") == "MultiPolygon":
+        polygons = geometry["coordinates"]
+    else:
+        raise ValueError(f"expected a Polygon or MultiPolygon, got {geometry.get('type')!r}")
+    grid = _grid_context_index()
+    with span("zonal_statistics", polygons=len(polygons)):
+        positions = np.unique(np.concatenate([grid["cells"].within(polygon) for polygon in polygons]))
+        weight_layer, weight_column = GRID_POPULATION_WEIGHT
+        frames = grid["values"]
+        weights = frames[weight_layer][weight_column].to_numpy() if weight_layer in frames else None
+        overrides = {layer_id: config.get("aggregations") for layer_id, config in GRID_FEATURE_CONFIG.items()}
+        return {"cells": len(positions), "values": zonal_statistics(frames, positions, overrides, weights)}
+
+
+def _site_details(selection: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """All properties and the grid context of the selected site, looked up by id."""
+    if not selection or selection.get("dataset") not in SITE_DATASETS:
+        return None
+    with span("site_details", dataset=selection["dataset"]):
+        index = _site_detail_index(selection["dataset"])
+        position = index["positions"].get(selection.get("id"))
+        if position is None:
+            return None
+        row = index["properties"].iloc[position]
+        grid = _grid_context_index()
+        cell_position = int(index["cells"][position])
+        cell_id = grid["cells"].cell_ids[cell_position] if cell_position >= 0 else None
+        cell_values = (
+            {
+                # str() of a float32 is its shortest round-trip form, so 0.35 does not become 0.3499999940395355
+                layer_id: {
+                    name: None if np.isnan(value) else float(str(value))
+                    for name, value in frame.iloc[cell_position].items()
+                }
+                for layer_id, frame in grid["values"].items()
             }
-            const color = colorForValue(value, legendData);
-            return {
-              color: "#1e293b",
-              weight: 0.4,
-              fillColor: color,
-              fillOpacity: value === null ? 0 : 0.65,
-            };
-          },
-        }).addTo(map);
-        // Add tooltips to grid cells
-        gridOverlayLayer.eachLayer((layer) => {
-          if (layer.bringToBack) {
-            layer.bringToBack();
-          }
-          const originalValue = layer.feature?.properties?._originalValue;
-          const variableLabel = layer.feature?.properties?._variableLabel || variable.label;
-          if (originalValue !== null && originalValue !== undefined) {
-            const tooltipText = `${variableLabel}: ${formatValue(originalValue)}`;
-            layer.bindTooltip(tooltipText, {
-              permanent: false,
-              direction: "center",
-              className: "grid-tooltip",
-            });
-          }
-        });
-      }
-
-      function updateDetailAttributes(container, fields, featureProperties) {
-        container.innerHTML = "";
-        if (!fields.length) {
-          const empty = document.createElement("div");
-          empty.className = "empty-state";
-          empty.textContent = "No attributes configured.";
-          container.appendChild(empty);
-          return;
-        }
-        fields.forEach((field) => {
-          const row = document.createElement("div");
-          row.className = "kv";
-          const label = document.createElement("span");
-          label.className = "label";
-          label.textContent = field.label;
-          const value = document.createElement("span");
-          value.textContent = formatValue(featureProperties[field.id]);
-          row.appendChild(label);
-          row.appendChild(value);
-          container.appendChild(row);
-        });
-      }
-
-      function updateGridContext(feature) {
-        gridAttributesEl.innerHTML = "";
-        const gridContext = feature.gridContext || {};
-        if (!Object.keys(gridContext).length) {
-          const empty = document.createElement("div");
-          empty.className = "empty-state";
-          empty.textContent = "No grid context available.";
-          gridAttributesEl.appendChild(empty);
-          return;
-        }
-        Object.entries(gridContext).forEach(([label, value]) => {
-          const row = document.createElement("div");
-          row.className = "kv";
-          const labelEl = document.createElement("span");
-          labelEl.className = "label";
-          labelEl.textContent = label.split("_").join(" ");
-          const valueEl = document.createElement("span");
-          valueEl.textContent = value;
-          row.appendChild(labelEl);
-          row.appendChild(valueEl);
-          gridAttributesEl.appendChild(row);
-        });
-      }
-
-      function updatePanels() {
-        const dataset = getActiveDataset();
-        const variable = getActiveSiteVariable();
-        const features = state.features;
-        if (!features.length) {
-          detailType.textContent = "Site";
-          detailTitle.textContent = "No sample data";
-          detailSubtitle.textContent = "Load a dataset to view site details.";
-          siteAttributesEl.innerHTML = "";
-          gridAttributesEl.innerHTML = "";
-          return;
-        }
-        if (state.selectedIndex >= features.length) {
-          state.selectedIndex = 0;
+            if cell_id
+            else {}
+        )
+        return {
+            "dataset": selection["dataset"],
+            "id": selection["id"],
+            # .item() turns numpy scalars into plain Python values for JSON
+            "properties": {
+                name: None if pd.isna(value) else getattr(value, "item", lambda: value)()
+                for name, value in row.items()
+            },
+            "gridContext": {"cell": cell_id, "values": cell_values},
+            "catchments": _point_catchments(float(index["lon"][position]), float(index["lat"][position])),
         }
-        const feature = features[state.selectedIndex];
-        const title = getFeatureTitle(feature, dataset);
-        const subtitle = getFeatureSubtitle(feature, dataset);
-        const fallbackSummary = feature.summary || "";
-
-        detailType.textContent = dataset.label || "Site";
-        detailTitle.textContent = title;
-        detailSubtitle.textContent = subtitle || fallbackSummary;
-        updateDetailAttributes(siteAttributesEl, dataset.detail_fields, feature.properties);
-        updateGridContext(feature);
-      }
-
-      siteDatasetSelect.addEventListener("change", (event) => {
-        state.siteDataset = event.target.value;
-        state.features = SITE_FEATURES[state.siteDataset] || [];
-        state.selectedIndex = 0;
-        updateSiteVariables();
-        updatePanels();
-        markerSizeInput.value = state.markerSize;
-        refreshMarkers(true);
-      });
-
-      siteVariableSelect.addEventListener("change", (event) => {
-        state.siteVariable = event.target.value;
-        updateSiteVariables();
-        refreshMarkers();
-      });
-
-      if (colorMapSelect) {
-        colorMapSelect.addEventListener("change", (event) => {
-          state.colorMap = event.target.value;
-          refreshMarkers();
-        });
-      }
-
-      if (toggleSites) {
-        toggleSites.addEventListener("change", () => {
-          state.showSites = toggleSites.checked;
-          refreshMarkers();
-        });
-      }
-
-      if (markerSizeInput) {
-        markerSizeInput.addEventListener("input", (event) => {
-          const value = Math.max(1, Math.min(18, parseInt(event.target.value, 10) || 3));
-          state.markerSize = value;
-          if (markerSizeValue) {
-            markerSizeValue.textContent = value;
-          }
-          refreshMarkers();
-        });
-      }
-
-      gridLayerSelect.addEventListener("change", (event) => {
-        state.gridLayer = event.target.value;
-        updateGridVariables();
-      });
-
-      gridVariableSelect.addEventListener("change", (event) => {
-        state.gridVariable = event.target.value;
-        updateGridVariables();
-      });
-
-      if (toggleGrid) {
-        toggleGrid.addEventListener("change", () => {
-          state.showGrid = toggleGrid.checked;
-          renderGridOverlay();
-        });
-      }
-
-      if (toggleLogScale) {
-        toggleLogScale.checked = state.useLogScale;
-        toggleLogScale.addEventListener("change", () => {
-          state.useLogScale = toggleLogScale.checked;
-          renderGridOverlay();
-        });
-      }
-
-      if (toggleNeed) {
-        toggleNeed.addEventListener("change", () => {
-          // Placeholder: need & opportunity layer rendering will respect this state in future iterations.
-        });
-      }
-
-      tabButtons.forEach((button) => {
-        button.addEventListener("click", () => {
-          tabButtons.forEach((item) => (item.dataset.active = "false"));
-          button.dataset.active = "true";
-          const tab = button.dataset.tab;
-          if (tab === "map") {
-            document.getElementById("map-container").style.display = "flex";
-            document.getElementById("need-view").style.display = "none";
-          } else {
-            document.getElementById("map-container").style.display = "none";
-            document.getElementById("need-view").style.display = "flex";
-          }
-        });
-      });
-
-      weightsTable.addEventListener("input", (event) => {
-        if (event.target.tagName !== "INPUT") return;
-        const row = event.target.closest("tr");
-        const scoreId = row.dataset.score;
-        const kind = event.target.dataset.kind;
-        const value = Math.max(-1, Math.min(1, parseFloat(event.target.value) || 0));
-        state.weights[scoreId][kind] = value;
-      });
-
-      document.getElementById("recompute-btn").addEventListener("click", recomputeScores);
-
-      renderSiteSelectors();
-      renderGridSelectors();
-      renderWeightsTable();
-      updateSiteVariables();
-      updatePanels();
-      refreshMarkers(true);
-      recomputeScores();
-    </script>
-  </body>
-</html>
-    """
 
-    # Build final HTML with data replacements
-    # Data is already cached via @st.cache_data, so this is fast
-    final_html = template.replace("__SITE_DATASETS__", datasets_json) \
-                         .replace("__SITE_FEATURES__", features_json) \
-                         .replace("__GRID_DATASETS__", grid_datasets_json) \
-                         .replace("__GRID_VALUES__", grid_values_json) \
-                         .replace("__GRID_GEOMETRY__", grid_geometry_json)
-    
-    # Render the HTML component directly
-    # The iframe will reload on each Streamlit rerun, but data loading is cached
-    html(
-        final_html,
-        height=920,
-        scrolling=False,
-    )
 
+def _point_catchments_result(point: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The clicked point with its catchments, or ``None`` without coordinates."""
+    if point.get("lon") is None or point.get("lat") is None:
+        return None
+    return {**point, "catchments": _point_catchments(point["lon"], point["lat"])}
+
+
+def _request_result(
+    name: str, request: Any, received: Dict[str, Any], respond: Callable[[Any], Any]
+) -> Optional[Dict[str, Any]]:
+    """``{"key", "result"}`` answering a frontend request, or just ``{"key"}`` when already received.
+
+    ``received`` maps argument names to the request key of the result the frontend reports holding
+    (as it does for ``gridViewport``), so each result is computed and sent once per request.
+    """
+    if not request:
+        return None
+    request_key = hashlib.sha1(json.dumps(request, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    if received.get(name) == request_key:
+        return {"key": request_key}
+    return {"key": request_key, "result": respond(request)}
+
+
+def render_site_selector_v2(key: str = "site_selector_v2") -> Optional[Dict[str, Any]]:
+    """Render the site selector v2 dashboard and return the frontend's current selection.
+
+    The explorer is a declared bidirectional component keyed by ``key``, so its iframe (map, tiles
+    and control state) survives reruns. The data payload is only sent when the frontend reports that
+    it does not hold the current version; otherwise a rerun ships a few small arguments. The full
+    properties, grid context and catchments of the selected site (and of a clicked point, when one
+    is picked), any requested new-site suggestions and the on-demand grid column (hotspots or a
+    derived-variable expression) the explorer shows are sent once per request, as are the cells of
+    resolutions finer than the base grid for the reported viewport: later reruns only confirm the
+    key of what the frontend reports holding.
+    """
 
+    # Get cached data (this function caches the entire data preparation)
+    # Wrap in try-except to handle initialization errors gracefully
+    try:
+        payload = _prepare_site_selector_data()
+    except Exception as e:
+        st.error(f"Error loading geospatial data: {str(e)}")
+        st.info("Please refresh the page. If the problem persists, the data files may be missing or corrupted.")
+        return None
+
+    version = payload["version"]
+    previous = st.session_state.get(key) or {}
+    needs_payload = previous.get("payloadVersion") != version
+
+    component_payload = {name: data for name, data in payload.items() if name != "version"} if needs_payload else None
+    grid_viewport = _grid_viewport(previous.get("view"))
+    if grid_viewport and previous.get("gridViewport") == grid_viewport["key"]:
+        # The frontend already holds these cells; only confirm which tile is current
+        grid_viewport = {"key": grid_viewport["key"]}
+    received = previous.get("received") or {}
+    detail = _request_result("detail", previous.get("selection"), received, _site_details)
+    point_catchments = _request_result(
+        "pointCatchments", previous.get("catchmentPoint"), received, _point_catchments_result
+    )
+    coverage = _request_result("coverageSites", previous.get("coverageRequest"), received, _coverage_suggestions)
+    derived_column = _request_result("derivedColumn", previous.get("derivedRequest"), received, _derived_grid_column)
+    payload_bytes = sum(len(data) for data in component_payload.values()) if component_payload else 0
+    with span("emit_component", payload_bytes=payload_bytes):
+        value = _site_selector_component(
+            version=version,
+            payload=component_payload,
+            view=previous.get("view"),
+            detail=detail,
+            gridViewport=grid_viewport,
+            pointCatchments=point_catchments,
+            coverageSites=coverage,
+            derivedColumn=derived_column,
+            height=920,
+            key=key,
+            default=None,
+        )
+    if not value:
+        return None
+    return value.get("selection")
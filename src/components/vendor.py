@@ -0,0 +1,53 @@
+"""Locally vendored frontend assets (Leaflet, Inter) served by the Streamlit server itself."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import streamlit as st
+import streamlit.components.v1 as components
+from streamlit.web.server.component_request_handler import ComponentRequestHandler
+
+VENDOR_DIR = Path(__file__).parent / "frontend" / "vendor"
+
+# Declaring a component is how Streamlit serves a directory with proper content types; nothing
+# renders it. Files are reachable at /component/<name>/<relative path>.
+_vendor_component = components.declare_component("vendor", path=str(VENDOR_DIR))
+
+LEAFLET_CSS = "leaflet-1.9.3/leaflet.css"
+LEAFLET_JS = "leaflet-1.9.3/leaflet.js"
+INTER_CSS = "inter-4.001/inter.css"
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def vendor_url(relative_path: str) -> str:
+    """Return the absolute URL path of a vendored file, honouring ``server.baseUrlPath``."""
+    base_path = (st.get_option("server.baseUrlPath") or "").strip("/")
+    prefix = f"/{base_path}" if base_path else ""
+    return f"{prefix}/component/{_vendor_component.name}/{relative_path}"
+
+
+def _install_immutable_cache_headers() -> None:
+    """Serve vendored files with an immutable cache header.
+
+    Streamlit only sends ``Cache-Control: public`` for component files and has no hook for
+    changing it, so the handler is wrapped once per process. Vendored directories are
+    versioned, which is what makes an immutable lifetime safe.
+    """
+    original = ComponentRequestHandler.set_extra_headers
+    if getattr(original, "_vendor_immutable", False):
+        return
+
+    prefix = f"{_vendor_component.name}/"
+
+    def set_extra_headers(self: ComponentRequestHandler, path: str) -> None:
+        original(self, path)
+        if path.startswith(prefix):
+            self.set_header("Cache-Control", IMMUTABLE_CACHE_CONTROL)
+
+    set_extra_headers._vendor_immutable = True  # type: ignore[attr-defined]
+    ComponentRequestHandler.set_extra_headers = set_extra_headers  # type: ignore[method-assign]
+
+
+_install_immutable_cache_headers()
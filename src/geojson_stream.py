@@ -0,0 +1,134 @@
+"""Incremental reader for GeoJSON FeatureCollections.
+
+``json.load`` materialises the whole document before anything can be projected out of it, so peak
+memory grows with the input file. :func:`iter_features` instead reads the file in chunks and
+decodes one feature at a time with ``json.JSONDecoder.raw_decode``. Only the current feature and a
+small read buffer are held at once, so a caller that keeps a projection of each feature uses memory
+proportional to its output.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, TextIO, Tuple
+
+CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = " \t\n\r"
+# Characters that can continue a JSON number
+_NUMBER_CHARS = "0123456789+-.eE"
+
+
+class _Reader:
+    """Character buffer over a text file with incremental refills and prefix trimming."""
+
+    def __init__(self, handle: TextIO, chunk_size: int) -> None:
+        self._handle = handle
+        self._chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, minimum: int = 1) -> bool:
+        """Read until at least ``minimum`` unread characters are buffered; ``False`` at end of file."""
+        while len(self.buffer) - self.pos < minimum and not self.eof:
+            if self.pos > self._chunk_size:
+                # Drop the consumed prefix so the buffer never grows beyond roughly one feature.
+                self.buffer = self.buffer[self.pos :]
+                self.pos = 0
+            chunk = self._handle.read(max(self._chunk_size, minimum))
+            if chunk:
+                self.buffer += chunk
+            else:
+                self.eof = True
+        return len(self.buffer) - self.pos >= minimum
+
+    def skip_whitespace(self) -> None:
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self.fill():
+                return
+
+    def peek(self) -> str:
+        self.skip_whitespace()
+        if not self.fill():
+            raise ValueError("unexpected end of GeoJSON document")
+        return self.buffer[self.pos]
+
+    def expect(self, characters: str) -> str:
+        char = self.peek()
+        if char not in characters:
+            raise ValueError(f"expected one of {characters!r} at offset {self.pos}, found {char!r}")
+        self.pos += 1
+        return char
+
+    def decode(self, decoder: json.JSONDecoder) -> Any:
+        """Decode the next JSON value, reading more input until it is complete."""
+        self.skip_whitespace()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                value, end = None, -1
+            # A number can look complete at a chunk boundary ("12." or "-0.5e" decode as 12 and -0.5),
+            # so it is only accepted once a character that cannot continue it, or the end of the
+            # file, has been seen. Other values have an unambiguous end.
+            if end != -1 and (self.eof or end < len(self.buffer) and self.buffer[end] not in _NUMBER_CHARS):
+                self.pos = end
+                return value
+            self.fill(len(self.buffer) - self.pos + self._chunk_size)
+
+
+def _open_features(reader: _Reader, decoder: json.JSONDecoder) -> Dict[str, Any]:
+    """Consume the document up to the opening ``[`` of ``features``; return the members before it."""
+    members: Dict[str, Any] = {}
+    reader.expect("{")
+    if reader.peek() == "}":
+        raise ValueError("GeoJSON document has no features member")
+    while True:
+        key = reader.decode(decoder)
+        reader.expect(":")
+        if key == "features":
+            reader.expect("[")
+            return members
+        members[key] = reader.decode(decoder)
+        if reader.expect(",}") == "}":
+            raise ValueError("GeoJSON document has no features member")
+
+
+def _iter_array(reader: _Reader, decoder: json.JSONDecoder) -> Iterator[Dict[str, Any]]:
+    if reader.peek() == "]":
+        reader.pos += 1
+        return
+    while True:
+        yield reader.decode(decoder)
+        if reader.expect(",]") == "]":
+            return
+
+
+def iter_features(path: Path, chunk_size: int = CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """Yield the features of the FeatureCollection at ``path`` one at a time.
+
+    Members after the ``features`` array are not read.
+    """
+    decoder = json.JSONDecoder()
+    with path.open("r", encoding="utf-8") as handle:
+        reader = _Reader(handle, chunk_size)
+        _open_features(reader, decoder)
+        yield from _iter_array(reader, decoder)
+
+
+def iter_point_features(path: Path) -> Iterator[Tuple[float, float, Dict[str, Any]]]:
+    """Yield ``(lon, lat, properties)`` for every feature with a usable Point geometry."""
+    for feature in iter_features(path):
+        geom = feature.get("geometry")
+        if not geom or geom.get("type") != "Point":
+            continue
+        coords = geom.get("coordinates")
+        if not isinstance(coords, (list, tuple)) or len(coords) < 2:
+            continue
+        yield coords[0], coords[1], feature.get("properties") or {}
@@ -0,0 +1,122 @@
+"""Per-variable aggregation of grid cell values into larger areas.
+
+Grid variables mix extensive quantities (populations, counts), intensive ones (percentages, scores,
+densities) and distances, so each is combined with its own operator: sums for the first,
+population-weighted means for the second and the minimum for distances to the nearest site. The
+same operators serve rollups to parent cells and zonal statistics over drawn areas.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.h3_grid import cell_parents
+
+AGGREGATION_OPERATORS = ("sum", "mean", "min", "max")
+
+
+def aggregation_for(column: str, overrides: Optional[Mapping[str, str]] = None) -> str:
+    """Operator used to combine ``column`` across cells; ``overrides`` maps columns to operators."""
+    if overrides and column in overrides:
+        return overrides[column]
+    if column.endswith("_distance_to_nearest_site_m"):
+        return "min"
+    if "pct" in column or column.endswith("_score") or "density" in column or "_per_" in column:
+        return "mean"
+    return "sum"
+
+
+def aggregate(
+    values: np.ndarray,
+    groups: np.ndarray,
+    group_count: int,
+    operator: str,
+    weights: Optional[np.ndarray] = None,
+    shares: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Combine ``values`` into ``group_count`` groups; cells in group ``-1`` are left out.
+
+    Missing values (NaN) are skipped, and a group without any value is NaN. ``mean`` is weighted by
+    ``weights`` when given, falling back to the plain mean in groups whose weights sum to zero.
+    ``shares`` is the fraction of each cell inside its group's area: it scales the cell's
+    contribution to sums and its weight in means.
+    """
+    if operator not in AGGREGATION_OPERATORS:
+        raise ValueError(f"unknown aggregation operator {operator!r}")
+    values = np.asarray(values, dtype=np.float64)
+    valid = (groups >= 0) & ~np.isnan(values)
+    groups, values = groups[valid], values[valid]
+    share = None if shares is None else np.asarray(shares, dtype=np.float64)[valid]
+    counts = np.bincount(groups, minlength=group_count)
+    result = np.full(group_count, np.nan)
+    present = counts > 0
+    if operator == "sum":
+        totals = np.bincount(groups, weights=values if share is None else values * share, minlength=group_count)
+        result[present] = totals[present]
+    elif operator == "mean":
+        base = np.ones(len(values)) if share is None else share
+        base_totals = np.bincount(groups, weights=base, minlength=group_count)
+        totals = np.bincount(groups, weights=values * base, minlength=group_count)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            result[present] = totals[present] / base_totals[present]
+        if weights is not None:
+            weight = np.nan_to_num(np.asarray(weights, dtype=np.float64)[valid]) * base
+            weight_totals = np.bincount(groups, weights=weight, minlength=group_count)
+            weighted = weight_totals > 0
+            weighted_totals = np.bincount(groups, weights=values * weight, minlength=group_count)
+            result[weighted] = weighted_totals[weighted] / weight_totals[weighted]
+    else:
+        extreme = np.full(group_count, np.inf if operator == "min" else -np.inf)
+        (np.minimum if operator == "min" else np.maximum).at(extreme, groups, values)
+        result[present] = extreme[present]
+    return result
+
+
+def aggregate_frame(
+    frame: pd.DataFrame,
+    groups: np.ndarray,
+    group_count: int,
+    overrides: Optional[Mapping[str, str]] = None,
+    weights: Optional[np.ndarray] = None,
+) -> pd.DataFrame:
+    """Aggregate every numeric column of ``frame`` (rows aligned with ``groups``) per group."""
+    return pd.DataFrame(
+        {
+            column: aggregate(
+                frame[column].to_numpy(), groups, group_count, aggregation_for(column, overrides), weights
+            )
+            for column in frame.columns
+        }
+    )
+
+
+def parent_groups(cell_ids: Sequence[str], resolution: int) -> Tuple[List[str], np.ndarray]:
+    """Parent cell ids at ``resolution`` and the parent position of every cell."""
+    parent_ids, groups = np.unique(cell_parents(cell_ids, resolution), return_inverse=True)
+    return parent_ids.tolist(), groups.astype(np.int64)
+
+
+def zonal_statistics(
+    frames: Mapping[str, pd.DataFrame],
+    positions: np.ndarray,
+    overrides: Optional[Mapping[str, Mapping[str, str]]] = None,
+    weights: Optional[np.ndarray] = None,
+) -> Dict[str, Dict[str, Optional[float]]]:
+    """Every layer's variables aggregated over the cells at ``positions``.
+
+    ``frames`` are cell-aligned layer frames, ``overrides`` maps layers to their per-column
+    operator overrides and ``weights`` is the cell population used for means. Values without any
+    data in the zone are ``None``.
+    """
+    groups = np.zeros(len(positions), dtype=np.int64)
+    zone_weights = None if weights is None else np.asarray(weights)[positions]
+    result: Dict[str, Dict[str, Optional[float]]] = {}
+    for layer_id, frame in frames.items():
+        totals = aggregate_frame(frame.iloc[positions], groups, 1, (overrides or {}).get(layer_id), zone_weights)
+        result[layer_id] = {
+            column: None if np.isnan(value) else float(value) for column, value in totals.iloc[0].items()
+        }
+    return result
@@ -0,0 +1,166 @@
+"""Radius catchments around points, over the centroids of the grid cells.
+
+Cell centroids are indexed in a regular longitude/latitude bin grid, so a query only measures
+great-circle distances to the cells in the bins its radius can reach. Every query of a batch is
+expanded to its candidate cells at once, which keeps catchments for all sites of a dataset a
+handful of array operations. Cells can optionally count in part: each is treated as a disk of its
+own area, and the share of that disk inside the catchment circle is its weight.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Dict, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.grid_aggregation import aggregate, aggregation_for
+from src.h3_grid import GridCells, ring_area
+
+EARTH_RADIUS_M = 6_371_008.8
+METRES_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180.0
+
+
+def haversine_m(lon1: np.ndarray, lat1: np.ndarray, lon2: np.ndarray, lat2: np.ndarray) -> np.ndarray:
+    """Great-circle distance in metres between points given in degrees."""
+    lon1, lat1, lon2, lat2 = (np.radians(np.asarray(value, dtype=np.float64)) for value in (lon1, lat1, lon2, lat2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def disk_overlap_share(distance: np.ndarray, cell_radius: np.ndarray, radius: float) -> np.ndarray:
+    """Share of a disk of ``cell_radius`` centred ``distance`` away that lies within ``radius``."""
+    distance = np.asarray(distance, dtype=np.float64)
+    cell_radius = np.asarray(cell_radius, dtype=np.float64)
+    share = (distance <= radius).astype(np.float64)
+    sized = cell_radius > 0
+    d, r = distance[sized], cell_radius[sized]
+    contained = np.minimum(r, radius) ** 2 / r**2
+    # Lens area of two intersecting circles, for the partly overlapping pairs
+    lens = (d > np.abs(radius - r)) & (d < radius + r)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        kite = (-d + r + radius) * (d + r - radius) * (d - r + radius) * (d + r + radius)
+        area = (
+            r**2 * np.arccos(np.clip((d**2 + r**2 - radius**2) / (2 * d * r), -1.0, 1.0))
+            + radius**2 * np.arccos(np.clip((d**2 + radius**2 - r**2) / (2 * d * radius), -1.0, 1.0))
+            - 0.5 * np.sqrt(np.clip(kite, 0.0, None))
+        )
+    share[sized] = np.where(lens, area / (math.pi * r**2), np.where(d <= np.abs(radius - r), contained, 0.0))
+    return share
+
+
+class CentroidIndex:
+    """Bin-grid index over cell centroids, with each cell's equivalent-disk radius in metres."""
+
+    def __init__(self, lon: np.ndarray, lat: np.ndarray, radius_m: np.ndarray, bin_degrees: float = 0.25) -> None:
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.radius_m = np.asarray(radius_m, dtype=np.float64)
+        self.bin_degrees = bin_degrees
+        self._west = float(self.lon.min()) if len(self.lon) else 0.0
+        self._south = float(self.lat.min()) if len(self.lat) else 0.0
+        bins_x = np.floor((self.lon - self._west) / bin_degrees).astype(np.int64)
+        bins_y = np.floor((self.lat - self._south) / bin_degrees).astype(np.int64)
+        self._columns = int(bins_x.max()) + 1 if len(bins_x) else 0
+        self._rows = int(bins_y.max()) + 1 if len(bins_y) else 0
+        keys = bins_y * self._columns + bins_x
+        self._order = np.argsort(keys, kind="stable")
+        self._keys = keys[self._order]
+
+    @classmethod
+    def from_cells(cls, cells: GridCells, bin_degrees: float = 0.25) -> "CentroidIndex":
+        """Index the centroids of ``cells``; their areas come from the rings, projected locally."""
+        centroids = cells.centroids
+        scale = METRES_PER_DEGREE**2 * np.cos(np.radians(centroids[:, 1]))
+        areas = np.array([abs(ring_area(cells.ring(position))) for position in range(len(cells))]) * scale
+        return cls(centroids[:, 0], centroids[:, 1], np.sqrt(areas / math.pi), bin_degrees)
+
+    def __len__(self) -> int:
+        return len(self.lon)
+
+    def query(
+        self, lon: np.ndarray, lat: np.ndarray, radius_m: float, partial: bool = False
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Cells within ``radius_m`` of each query point, as flat ``(query, cell, share, distance)`` arrays.
+
+        Rows are grouped by query, in ascending query order.
+
+        Without ``partial`` a cell is in (share 1) when its centroid is within the radius. With it,
+        the share is the part of the cell's equivalent disk inside the radius (see
+        :func:`disk_overlap_share`).
+        """
+        lon = np.atleast_1d(np.asarray(lon, dtype=np.float64))
+        lat = np.atleast_1d(np.asarray(lat, dtype=np.float64))
+        empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0), np.empty(0))
+        if not len(self) or not len(lon):
+            return empty
+        reach = radius_m + (float(self.radius_m.max()) if partial else 0.0)
+        lat_span = reach / METRES_PER_DEGREE
+        widest = min(89.0, float(np.abs(lat).max()) + lat_span)
+        lon_span = lat_span / math.cos(math.radians(widest))
+        steps_x = math.ceil(lon_span / self.bin_degrees)
+        steps_y = math.ceil(lat_span / self.bin_degrees)
+        offset_x, offset_y = np.meshgrid(np.arange(-steps_x, steps_x + 1), np.arange(-steps_y, steps_y + 1))
+        bins_x = np.floor((lon - self._west) / self.bin_degrees).astype(np.int64)[:, None] + offset_x.ravel()
+        bins_y = np.floor((lat - self._south) / self.bin_degrees).astype(np.int64)[:, None] + offset_y.ravel()
+        inside = (bins_x >= 0) & (bins_x < self._columns) & (bins_y >= 0) & (bins_y < self._rows)
+        keys = (bins_y * self._columns + bins_x)[inside]
+        owners = np.broadcast_to(np.arange(len(lon))[:, None], inside.shape)[inside]
+        starts = np.searchsorted(self._keys, keys, side="left")
+        counts = np.searchsorted(self._keys, keys, side="right") - starts
+        total = int(counts.sum())
+        if not total:
+            return empty
+        # Expand every (query, bin) range of the sorted keys into one row per candidate cell
+        run_starts = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+        cells = self._order[run_starts + np.arange(total)]
+        queries = np.repeat(owners, counts)
+        distances = haversine_m(lon[queries], lat[queries], self.lon[cells], self.lat[cells])
+        if partial:
+            shares = disk_overlap_share(distances, self.radius_m[cells], radius_m)
+        else:
+            shares = (distances <= radius_m).astype(np.float64)
+        keep = shares > 0
+        return queries[keep], cells[keep], shares[keep], distances[keep]
+
+
+def catchment_statistics(
+    index: CentroidIndex,
+    frames: Mapping[str, pd.DataFrame],
+    lon: np.ndarray,
+    lat: np.ndarray,
+    radius_m: float,
+    partial: bool = False,
+    overrides: Optional[Mapping[str, Mapping[str, str]]] = None,
+    weights: Optional[np.ndarray] = None,
+) -> Dict[str, pd.DataFrame]:
+    """Every layer's variables aggregated within ``radius_m`` of each point, one row per point.
+
+    ``frames`` are layer frames aligned with the indexed cells; variables use their rollup
+    operators, with partial cells contributing their share. The ``"cells"`` entry holds the
+    (share-weighted) number of cells in each catchment.
+    """
+    lon = np.atleast_1d(np.asarray(lon, dtype=np.float64))
+    queries, cells, shares, _ = index.query(lon, lat, radius_m, partial)
+    count = len(lon)
+    cell_weights = None if weights is None else np.asarray(weights)[cells]
+    result: Dict[str, pd.DataFrame] = {
+        "cells": pd.DataFrame({"cells": np.bincount(queries, weights=shares, minlength=count)})
+    }
+    for layer_id, frame in frames.items():
+        layer_overrides = (overrides or {}).get(layer_id)
+        result[layer_id] = pd.DataFrame(
+            {
+                column: aggregate(
+                    frame[column].to_numpy()[cells],
+                    queries,
+                    count,
+                    aggregation_for(column, layer_overrides),
+                    cell_weights,
+                    shares,
+                )
+                for column in frame.columns
+            }
+        )
+    return result
@@ -0,0 +1,123 @@
+"""Greedy maximal-coverage placement of new sites on the grid.
+
+A candidate site covers the cells whose centroid lies within the service radius. Coverage sets
+are held as a sparse matrix in CSR form (row pointers into one array of cell positions) built from
+the catchment index. Sites are picked greedily by the population they newly cover, which for this
+submodular objective is within ``1 - 1/e`` of the optimum. A candidate's gain can only shrink as
+cells get covered, so gains sit in a max-heap and only the top entry is re-evaluated when stale
+(lazy greedy): a pick typically recomputes a handful of candidates rather than all of them.
+"""
+
+from __future__ import annotations
+
+import heapq
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.grid_catchments import CentroidIndex
+
+
+def coverage_matrix(
+    index: CentroidIndex, lon: np.ndarray, lat: np.ndarray, radius_m: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """CSR ``(indptr, indices)`` of the cells within ``radius_m`` of each candidate point."""
+    lon = np.atleast_1d(np.asarray(lon, dtype=np.float64))
+    queries, cells, _, _ = index.query(lon, lat, radius_m)
+    return np.searchsorted(queries, np.arange(len(lon) + 1)), cells
+
+
+def covered_cells(index: CentroidIndex, lon: np.ndarray, lat: np.ndarray, radius_m: float) -> np.ndarray:
+    """Boolean mask of the indexed cells within ``radius_m`` of any of the points."""
+    covered = np.zeros(len(index), dtype=bool)
+    covered[index.query(lon, lat, radius_m)[1]] = True
+    return covered
+
+
+def greedy_max_coverage(
+    indptr: np.ndarray,
+    indices: np.ndarray,
+    weights: np.ndarray,
+    k: int,
+    covered: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Pick up to ``k`` rows of a CSR coverage matrix maximising the newly covered weight.
+
+    ``covered`` marks cells that already count as covered (by existing sites). Returns the chosen
+    rows in pick order and the weight each newly covered; picking stops early once no candidate
+    adds anything. The picks for a smaller ``k`` are a prefix of those for a larger one.
+    """
+    weights = np.clip(np.nan_to_num(np.asarray(weights, dtype=np.float64)), 0.0, None)
+    covered = np.zeros(len(weights), dtype=bool) if covered is None else np.array(covered, dtype=bool)
+    row_count = len(indptr) - 1
+    rows = np.repeat(np.arange(row_count), np.diff(indptr))
+    gains = np.bincount(rows, weights=weights[indices] * ~covered[indices], minlength=row_count)
+    heap = [(-gain, row) for row, gain in enumerate(gains.tolist()) if gain > 0]
+    heapq.heapify(heap)
+    chosen: List[int] = []
+    chosen_gains: List[float] = []
+    while heap and len(chosen) < k:
+        _, row = heapq.heappop(heap)
+        cells = indices[indptr[row] : indptr[row + 1]]
+        fresh = cells[~covered[cells]]
+        gain = float(weights[fresh].sum())
+        if heap and gain < -heap[0][0]:
+            # Stale: another candidate may now beat it; requeue with the current gain
+            if gain > 0:
+                heapq.heappush(heap, (-gain, row))
+            continue
+        if gain <= 0:
+            break
+        covered[fresh] = True
+        chosen.append(row)
+        chosen_gains.append(gain)
+    return np.array(chosen, dtype=np.int64), np.array(chosen_gains)
+
+
+def optimize_coverage(
+    index: CentroidIndex,
+    lon: np.ndarray,
+    lat: np.ndarray,
+    weights: np.ndarray,
+    radius_m: float,
+    k: int,
+    existing_lon: Optional[np.ndarray] = None,
+    existing_lat: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray, float]:
+    """Greedy placement of ``k`` sites among the candidate points, given the existing sites.
+
+    Returns the chosen candidate positions, the weight each newly covers and the weight already
+    covered by the existing sites.
+    """
+    covered = None
+    if existing_lon is not None and len(existing_lon):
+        covered = covered_cells(index, existing_lon, existing_lat, radius_m)
+    indptr, indices = coverage_matrix(index, lon, lat, radius_m)
+    chosen, gains = greedy_max_coverage(indptr, indices, weights, k, covered)
+    existing = 0.0 if covered is None else float(np.nansum(np.asarray(weights, dtype=np.float64)[covered]))
+    return chosen, gains, existing
+
+
+def coverage_sweep(
+    index: CentroidIndex,
+    lon: np.ndarray,
+    lat: np.ndarray,
+    weights: np.ndarray,
+    radii_m: Sequence[float],
+    k: int,
+    existing_lon: Optional[np.ndarray] = None,
+    existing_lat: Optional[np.ndarray] = None,
+    processes: Optional[int] = None,
+) -> Dict[float, Tuple[np.ndarray, np.ndarray, float]]:
+    """:func:`optimize_coverage` for every radius, in ``processes`` worker processes if given.
+
+    Smaller ``k`` need no runs of their own since greedy picks are prefixes of one another.
+    """
+    arguments = [(index, lon, lat, weights, radius_m, k, existing_lon, existing_lat) for radius_m in radii_m]
+    if not processes or processes <= 1:
+        results = [optimize_coverage(*args) for args in arguments]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = list(pool.map(optimize_coverage, *zip(*arguments)))
+    return dict(zip(radii_m, results))
@@ -0,0 +1,188 @@
+"""Safe arithmetic expressions over grid layer columns, evaluated for all cells at once.
+
+Expressions use Python syntax restricted to a whitelist: numbers, column names, arithmetic,
+comparisons, ``and``/``or``/``not``, conditional expressions and a few numeric functions. Columns
+are written as ``column`` when the name is unique across layers, or as ``layer.column``. The
+expression is parsed once into a tree of closures over numpy operations (nothing is passed to
+``eval``), so evaluating it is one vectorised pass over the cell columns. Divisions by zero and
+other undefined results are missing values (NaN).
+"""
+
+from __future__ import annotations
+
+import ast
+import operator
+from functools import lru_cache
+from typing import Callable, Dict, FrozenSet, Mapping, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Longest expression text and largest parse tree accepted
+MAX_EXPRESSION_LENGTH = 500
+MAX_EXPRESSION_NODES = 200
+
+_Columns = Mapping[Tuple[str, str], np.ndarray]
+_Evaluator = Callable[[_Columns], np.ndarray]
+
+_BINARY_OPERATORS = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.divide,
+    ast.FloorDiv: np.floor_divide,
+    ast.Mod: np.mod,
+    ast.Pow: np.power,
+    ast.BitAnd: np.logical_and,
+    ast.BitOr: np.logical_or,
+}
+_UNARY_OPERATORS = {ast.USub: np.negative, ast.UAdd: np.positive, ast.Not: np.logical_not}
+_COMPARISONS = {
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+}
+# Function name -> (implementation, number of arguments)
+_FUNCTIONS: Dict[str, Tuple[Callable[..., np.ndarray], int]] = {
+    "abs": (np.abs, 1),
+    "sqrt": (np.sqrt, 1),
+    "exp": (np.exp, 1),
+    "log": (np.log, 1),
+    "log10": (np.log10, 1),
+    "log1p": (np.log1p, 1),
+    "min": (np.fmin, 2),
+    "max": (np.fmax, 2),
+    "clip": (np.clip, 3),
+    "where": (np.where, 3),
+    "isnan": (np.isnan, 1),
+    "fillna": (lambda values, fill: np.where(np.isnan(values), fill, values), 2),
+}
+
+
+class ExpressionError(ValueError):
+    """The expression text is invalid, uses something outside the whitelist or an unknown column."""
+
+
+class GridExpression:
+    """A compiled expression: the ``(layer, column)`` pairs it reads and its evaluator."""
+
+    def __init__(self, text: str, references: FrozenSet[Tuple[str, str]], evaluator: _Evaluator) -> None:
+        self.text = text
+        self.references = references
+        self._evaluator = evaluator
+
+    def evaluate(self, frames: Mapping[str, pd.DataFrame]) -> np.ndarray:
+        """Value of the expression for every row of the (row-aligned) layer ``frames``.
+
+        References written as a bare column name (layer ``""``) resolve to the one layer holding
+        that column; raises :class:`ExpressionError` for unknown or ambiguous columns.
+        """
+        columns = {reference: resolve_column(frames, *reference) for reference in self.references}
+        with np.errstate(all="ignore"):
+            result = np.asarray(self._evaluator(columns), dtype=np.float64)
+        length = len(next(iter(frames.values()))) if frames else 0
+        result = np.broadcast_to(result, (length,)).copy()
+        result[~np.isfinite(result)] = np.nan
+        return result
+
+
+def resolve_column(frames: Mapping[str, pd.DataFrame], layer_id: str, column: str) -> np.ndarray:
+    """Values of ``layer_id.column``, or of the only layer holding ``column`` when ``layer_id`` is empty."""
+    if layer_id:
+        if layer_id not in frames or column not in frames[layer_id].columns:
+            raise ExpressionError(f"unknown column {layer_id}.{column}")
+        return frames[layer_id][column].to_numpy(dtype=np.float64)
+    layers = [name for name, frame in frames.items() if column in frame.columns]
+    if not layers:
+        raise ExpressionError(f"unknown column {column}")
+    if len(layers) > 1:
+        options = ", ".join(f"{name}.{column}" for name in layers)
+        raise ExpressionError(f"column {column} is in several layers; write it as one of {options}")
+    return frames[layers[0]][column].to_numpy(dtype=np.float64)
+
+
+def _compile(node: ast.AST, references: set) -> _Evaluator:
+    if isinstance(node, ast.Expression):
+        return _compile(node.body, references)
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise ExpressionError(f"unsupported constant {node.value!r}")
+        try:
+            value = np.float64(node.value)
+        except OverflowError:
+            raise ExpressionError("number out of range") from None
+        return lambda columns: value
+    if isinstance(node, ast.Name):
+        reference = ("", node.id)
+        references.add(reference)
+        return lambda columns: columns[reference]
+    if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name):
+        reference = (node.value.id, node.attr)
+        references.add(reference)
+        return lambda columns: columns[reference]
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+        function = _BINARY_OPERATORS[type(node.op)]
+        left, right = _compile(node.left, references), _compile(node.right, references)
+        return lambda columns: function(left(columns), right(columns))
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+        function = _UNARY_OPERATORS[type(node.op)]
+        operand = _compile(node.operand, references)
+        return lambda columns: function(operand(columns))
+    if isinstance(node, ast.BoolOp):
+        function = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+        operands = [_compile(value, references) for value in node.values]
+
+        def combine(columns: _Columns) -> np.ndarray:
+            result = operands[0](columns)
+            for operand in operands[1:]:
+                result = function(result, operand(columns))
+            return result
+
+        return combine
+    if isinstance(node, ast.Compare) and all(type(op) in _COMPARISONS for op in node.ops):
+        # a < b < c means a < b and b < c, as in Python
+        terms = [_compile(term, references) for term in [node.left, *node.comparators]]
+        comparisons = [_COMPARISONS[type(op)] for op in node.ops]
+
+        def compare(columns: _Columns) -> np.ndarray:
+            values = [term(columns) for term in terms]
+            result = comparisons[0](values[0], values[1])
+            for position, comparison in enumerate(comparisons[1:], start=1):
+                result = np.logical_and(result, comparison(values[position], values[position + 1]))
+            return result
+
+        return compare
+    if isinstance(node, ast.IfExp):
+        test, body, orelse = (_compile(part, references) for part in (node.test, node.body, node.orelse))
+        return lambda columns: np.where(test(columns), body(columns), orelse(columns))
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+        if node.func.id not in _FUNCTIONS:
+            raise ExpressionError(f"unknown function {node.func.id}(); use one of {', '.join(sorted(_FUNCTIONS))}")
+        function, arity = _FUNCTIONS[node.func.id]
+        if len(node.args) != arity:
+            raise ExpressionError(f"{node.func.id}() takes {arity} argument{'s' if arity > 1 else ''}")
+        arguments = [_compile(argument, references) for argument in node.args]
+        return lambda columns: function(*(argument(columns) for argument in arguments))
+    raise ExpressionError(f"unsupported syntax: {type(node).__name__}")
+
+
+@lru_cache(maxsize=256)
+def compile_expression(text: str) -> GridExpression:
+    """Parse and compile ``text`` once; repeated texts reuse the compiled expression."""
+    text = text.strip()
+    if not text:
+        raise ExpressionError("empty expression")
+    if len(text) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionError(f"expression longer than {MAX_EXPRESSION_LENGTH} characters")
+    try:
+        tree = ast.parse(text, mode="eval")
+    except SyntaxError as error:
+        raise ExpressionError(f"invalid expression: {error.msg}") from None
+    if sum(1 for _ in ast.walk(tree)) > MAX_EXPRESSION_NODES:
+        raise ExpressionError(f"expression has more than {MAX_EXPRESSION_NODES} parts")
+    references: set = set()
+    evaluator = _compile(tree, references)
+    return GridExpression(text, frozenset(references), evaluator)
@@ -0,0 +1,110 @@
+"""Cell adjacency of the polygon grid as sparse CSR arrays, with spatial operators on top.
+
+Neighbours are found from the cell polygons rather than the ``h3`` package: in a hexagonal
+tiling every vertex is shared by the (up to three) cells meeting there, all of which share edges,
+so cells sharing a vertex are edge neighbours. The adjacency is stored as CSR row pointers and
+column positions over the grid's cell order; k-rings are built by expanding neighbour lists, and
+operators such as the spatial lag are ``bincount`` matrix-vector products over the pairs.
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+
+from src.h3_grid import GridCells, vertex_keys
+
+
+def _csr_from_pairs(rows: np.ndarray, columns: np.ndarray, count: int) -> "CellAdjacency":
+    """CSR adjacency of the unique ``(row, column)`` pairs, columns ascending within each row."""
+    keys = np.unique(rows.astype(np.int64) * count + columns)
+    indptr = np.searchsorted(keys // count, np.arange(count + 1)) if count else np.zeros(1, dtype=np.int64)
+    return CellAdjacency(indptr.astype(np.int64), (keys % count).astype(np.int64))
+
+
+class CellAdjacency:
+    """Sparse cell adjacency: the neighbours of cell ``i`` are ``indices[indptr[i]:indptr[i + 1]]``."""
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray) -> None:
+        self.indptr = indptr
+        self.indices = indices
+
+    @classmethod
+    def from_cells(cls, cells: GridCells) -> "CellAdjacency":
+        """Edge neighbours of every cell of ``cells`` (the cell itself excluded)."""
+        count = len(cells)
+        if not count:
+            return cls(np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.int64))
+        # Rings repeat their first vertex at the end; leave the repeat out
+        keep = np.ones(len(cells.vertices), dtype=bool)
+        keep[cells.offsets[1:] - 1] = False
+        owners = np.repeat(np.arange(count), np.diff(cells.offsets))[keep]
+        _, vertex_ids = np.unique(vertex_keys(cells.vertices[keep]), axis=0, return_inverse=True)
+        vertex_ids = vertex_ids.ravel()
+        order = np.lexsort((owners, vertex_ids))
+        vertex_ids, owners = vertex_ids[order], owners[order]
+        rows, columns = [], []
+        # Pair every owner of a vertex with the owners after it in the same vertex group
+        shift = 1
+        while shift < len(vertex_ids):
+            grouped = vertex_ids[shift:] == vertex_ids[:-shift]
+            if not np.any(grouped):
+                break
+            same = grouped & (owners[shift:] != owners[:-shift])
+            rows.extend([owners[:-shift][same], owners[shift:][same]])
+            columns.extend([owners[shift:][same], owners[:-shift][same]])
+            shift += 1
+        if not rows:
+            return cls(np.zeros(count + 1, dtype=np.int64), np.empty(0, dtype=np.int64))
+        return _csr_from_pairs(np.concatenate(rows), np.concatenate(columns), count)
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def rows(self) -> np.ndarray:
+        """Row (cell) position of every stored neighbour, aligned with ``indices``."""
+        return np.repeat(np.arange(len(self)), np.diff(self.indptr))
+
+    def neighbours(self, position: int) -> np.ndarray:
+        return self.indices[self.indptr[position] : self.indptr[position + 1]]
+
+    def k_ring(self, k: int, include_self: bool = True) -> "CellAdjacency":
+        """Adjacency of the cells within ``k`` steps of each other (``k=1`` is the neighbours)."""
+        count = len(self)
+        rows = np.arange(count) if include_self or k == 0 else np.empty(0, dtype=np.int64)
+        columns = rows.copy()
+        frontier_rows, frontier_columns = np.arange(count), np.arange(count)
+        seen = np.unique(frontier_rows * count + frontier_columns)
+        for _ in range(k):
+            # Step from every frontier cell to its neighbours, keeping the pairs not reached before
+            counts = np.diff(self.indptr)[frontier_columns]
+            starts = np.repeat(self.indptr[frontier_columns] - (np.cumsum(counts) - counts), counts)
+            next_columns = self.indices[starts + np.arange(int(counts.sum()))]
+            next_keys = np.setdiff1d(np.repeat(frontier_rows, counts) * count + next_columns, seen)
+            if not len(next_keys):
+                break
+            seen = np.union1d(seen, next_keys)
+            frontier_rows, frontier_columns = next_keys // count, next_keys % count
+            rows = np.concatenate([rows, frontier_rows])
+            columns = np.concatenate([columns, frontier_columns])
+        return _csr_from_pairs(rows, columns, count)
+
+    def matvec(self, values: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+        """Sparse product ``W @ values`` with ``weights`` aligned with ``indices`` (1 by default)."""
+        products = np.asarray(values, dtype=np.float64)[self.indices]
+        if weights is not None:
+            products = products * weights
+        return np.bincount(self.rows, weights=products, minlength=len(self))
+
+    def lag(self, values: np.ndarray) -> np.ndarray:
+        """Row-standardised spatial lag: the mean of each cell's neighbours, skipping missing values.
+
+        Cells without any neighbour value are NaN.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        present = ~np.isnan(values)
+        totals = self.matvec(np.where(present, values, 0.0))
+        counts = self.matvec(present.astype(np.float64))
+        return np.divide(totals, counts, out=np.full(len(self), np.nan), where=counts > 0)
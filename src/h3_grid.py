@@ -0,0 +1,251 @@
+"""Point-in-cell lookup and hierarchy helpers for the H3 grid polygons.
+
+The app does not depend on the ``h3`` package, so points are located from the cell polygons in
+the grid GeoJSON: a longitude-sorted bounding-box prefilter narrows each cell to nearby points,
+and an even-odd ray-casting test decides which of those fall inside. Parent cells are derived
+from the bit layout of the 64-bit cell index, and parent outlines by dissolving child polygons.
+"""
+
+from __future__ import annotations
+
+from array import array
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def points_in_ring(x: np.ndarray, y: np.ndarray, ring: np.ndarray) -> np.ndarray:
+    """Even-odd test of each ``(x, y)`` point against a closed ring of ``[x, y]`` vertices."""
+    inside = np.zeros(len(x), dtype=bool)
+    for (x1, y1), (x2, y2) in zip(ring[:-1], ring[1:]):
+        crosses = (y1 > y) != (y2 > y)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_cross = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+        inside ^= crosses & (x < x_cross)
+    return inside
+
+
+# H3 cell index layout: 4 mode bits at 59, 4 resolution bits at 52, then 15 three-bit digits
+# (digit r at bit (15 - r) * 3); digits finer than the cell's resolution are all ones.
+_MODE_SHIFT = 59
+_RESOLUTION_SHIFT = 52
+_CELL_MODE = 1
+# Decimal places used to match the shared vertices of neighbouring cell polygons
+_VERTEX_DECIMALS = 9
+
+
+def cell_resolutions(cell_ids: Sequence[str]) -> np.ndarray:
+    """Resolution of every H3 cell id; raises ``ValueError`` for ids that are not H3 cells."""
+    codes = np.array([int(cell_id, 16) for cell_id in cell_ids], dtype=np.uint64)
+    modes = (codes >> np.uint64(_MODE_SHIFT)) & np.uint64(0xF)
+    if np.any(modes != _CELL_MODE):
+        raise ValueError("not H3 cell indexes")
+    return ((codes >> np.uint64(_RESOLUTION_SHIFT)) & np.uint64(0xF)).astype(np.int8)
+
+
+def cell_parents(cell_ids: Sequence[str], resolution: int) -> List[str]:
+    """Parent of every H3 cell id at the coarser ``resolution``."""
+    if np.any(cell_resolutions(cell_ids) < resolution):
+        raise ValueError(f"cells are coarser than resolution {resolution}")
+    codes = np.array([int(cell_id, 16) for cell_id in cell_ids], dtype=np.uint64)
+    unused_digits = np.uint64((1 << ((15 - resolution) * 3)) - 1)
+    codes = codes & ~np.uint64(0xF << _RESOLUTION_SHIFT) | np.uint64(resolution << _RESOLUTION_SHIFT) | unused_digits
+    return [f"{code:x}" for code in codes.tolist()]
+
+
+def ring_area(ring: np.ndarray) -> float:
+    """Signed shoelace area of a closed ring in squared degrees (positive when counter-clockwise)."""
+    x, y = ring[:, 0], ring[:, 1]
+    return float(np.sum(x[:-1] * y[1:] - x[1:] * y[:-1]) / 2.0)
+
+
+def vertex_keys(vertices: np.ndarray) -> np.ndarray:
+    """Vertex coordinates rounded so that the shared vertices of neighbouring cells compare equal."""
+    return np.round(vertices, _VERTEX_DECIMALS)
+
+
+def dissolve_rings(rings: Sequence[np.ndarray]) -> List[List[np.ndarray]]:
+    """Union of edge-adjacent polygons given as consistently oriented closed rings.
+
+    Edges shared by two input rings run in opposite directions and cancel; the remaining edges
+    are chained back into rings. Returns one ``[outer, *holes]`` list per disjoint part.
+    """
+    edges: Dict[Tuple[Tuple[float, float], Tuple[float, float]], int] = {}
+    for ring in rings:
+        keys = [tuple(point) for point in vertex_keys(ring[:, :2]).tolist()]
+        for start, end in zip(keys[:-1], keys[1:]):
+            if (end, start) in edges:
+                del edges[(end, start)]
+            else:
+                edges[(start, end)] = 1
+    following: Dict[Tuple[float, float], List[Tuple[float, float]]] = defaultdict(list)
+    for start, end in edges:
+        following[start].append(end)
+    boundaries: List[np.ndarray] = []
+    while following:
+        start = next(iter(following))
+        points = [start]
+        current = start
+        while True:
+            ends = following[current]
+            end = ends.pop()
+            if not ends:
+                del following[current]
+            points.append(end)
+            if end == start or end not in following:
+                break
+            current = end
+        boundaries.append(np.asarray(points, dtype=np.float64))
+    orientation = np.sign(sum(ring_area(ring) for ring in rings)) or 1.0
+    outers = [ring for ring in boundaries if np.sign(ring_area(ring)) == orientation]
+    parts: List[List[np.ndarray]] = [[outer] for outer in outers]
+    for hole in (ring for ring in boundaries if np.sign(ring_area(ring)) != orientation):
+        for part in parts:
+            if points_in_ring(hole[:1, 0], hole[:1, 1], part[0])[0]:
+                part.append(hole)
+                break
+    return parts
+
+
+class GridCells:
+    """Cell ids and outer rings of a polygon grid, with vectorised point location.
+
+    Ring vertices live in one flat ``(V, 2)`` array with per-cell ``offsets`` rather than one array
+    per cell, which keeps fine grids (res 7 has ~49x the cells of res 5) compact.
+    """
+
+    def __init__(self, cell_ids: List[str], vertices: np.ndarray, offsets: np.ndarray) -> None:
+        self.cell_ids = cell_ids
+        self.vertices = vertices
+        self.offsets = offsets
+        if cell_ids:
+            starts = offsets[:-1]
+            self.bounds = np.hstack(
+                [np.minimum.reduceat(vertices, starts, axis=0), np.maximum.reduceat(vertices, starts, axis=0)]
+            )
+        else:
+            self.bounds = np.empty((0, 4))
+        self._centroids: Optional[np.ndarray] = None
+        self._centroid_order: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_features(cls, features: Iterable[Dict[str, Any]], id_field: str = "h3_05") -> "GridCells":
+        """Build from Polygon cell features (holes are ignored; H3 cells have none).
+
+        ``features`` may be a stream such as :func:`src.geojson_stream.iter_features`; only the flat
+        vertex arrays are kept.
+        """
+        cell_ids: List[str] = []
+        x = array("d")
+        y = array("d")
+        offsets = array("q", [0])
+        for feature in features:
+            geom = feature.get("geometry") or {}
+            if geom.get("type") != "Polygon" or not geom.get("coordinates"):
+                continue
+            cell_ids.append(feature["properties"][id_field])
+            for point in geom["coordinates"][0]:
+                x.append(point[0])
+                y.append(point[1])
+            offsets.append(len(x))
+        vertices = np.column_stack([np.frombuffer(x, dtype=np.float64), np.frombuffer(y, dtype=np.float64)])
+        return cls(cell_ids, vertices, np.frombuffer(offsets, dtype=np.int64))
+
+    @classmethod
+    def from_geojson(cls, geometry: Dict[str, Any], id_field: str = "h3_05") -> "GridCells":
+        """Build from a FeatureCollection of Polygon cells."""
+        return cls.from_features(geometry.get("features", []), id_field)
+
+    def __len__(self) -> int:
+        return len(self.cell_ids)
+
+    def ring(self, position: int) -> np.ndarray:
+        """Closed outer ring of the cell at ``position`` as an ``(n, 2)`` view."""
+        return self.vertices[self.offsets[position] : self.offsets[position + 1]]
+
+    @property
+    def rings(self) -> List[np.ndarray]:
+        return [self.ring(position) for position in range(len(self))]
+
+    @property
+    def centroids(self) -> np.ndarray:
+        """Vertex mean of every cell ring as ``(n, 2)`` lon/lat, computed on first use."""
+        if self._centroids is None:
+            if not self.cell_ids:
+                self._centroids = np.empty((0, 2))
+            else:
+                # Each ring repeats its first vertex at the end; leave the repeat out of the mean
+                sums = np.add.reduceat(self.vertices, self.offsets[:-1], axis=0) - self.vertices[self.offsets[1:] - 1]
+                self._centroids = sums / (np.diff(self.offsets) - 1)[:, None]
+            self._centroid_order = np.argsort(self._centroids[:, 0], kind="stable")
+        return self._centroids
+
+    def within(self, polygon: Sequence[np.ndarray]) -> np.ndarray:
+        """Positions, ascending, of the cells whose centroid lies in ``polygon`` (``[outer, *holes]``).
+
+        Centroids are kept sorted by longitude, so only those within the polygon's longitude span
+        are tested against its rings.
+        """
+        centroids = self.centroids
+        rings = [np.asarray(ring, dtype=np.float64)[:, :2] for ring in polygon]
+        outer = rings[0]
+        order = self._centroid_order
+        sorted_x = centroids[order, 0]
+        start = int(np.searchsorted(sorted_x, outer[:, 0].min(), side="left"))
+        stop = int(np.searchsorted(sorted_x, outer[:, 0].max(), side="right"))
+        candidates = order[start:stop]
+        y = centroids[candidates, 1]
+        candidates = candidates[(y >= outer[:, 1].min()) & (y <= outer[:, 1].max())]
+        x, y = centroids[candidates, 0], centroids[candidates, 1]
+        inside = points_in_ring(x, y, outer)
+        for hole in rings[1:]:
+            inside &= ~points_in_ring(x, y, hole)
+        return np.sort(candidates[inside])
+
+    def intersecting(self, west: float, south: float, east: float, north: float) -> np.ndarray:
+        """Positions of the cells whose bounding box intersects the given box."""
+        bounds = self.bounds
+        mask = (bounds[:, 0] <= east) & (bounds[:, 2] >= west) & (bounds[:, 1] <= north) & (bounds[:, 3] >= south)
+        return np.flatnonzero(mask)
+
+    def to_geojson(
+        self, id_field: str = "h3_05", positions: Optional[Sequence[int]] = None, decimals: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """FeatureCollection of the cells at ``positions`` (all by default), optionally rounded."""
+        if positions is None:
+            positions = range(len(self))
+        features = []
+        for position in positions:
+            ring = self.ring(int(position))
+            if decimals is not None:
+                ring = np.round(ring, decimals)
+            features.append(
+                {
+                    "type": "Feature",
+                    "properties": {id_field: self.cell_ids[int(position)]},
+                    "geometry": {"type": "Polygon", "coordinates": [ring.tolist()]},
+                }
+            )
+        return {"type": "FeatureCollection", "features": features}
+
+    def locate(self, lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+        """Position in ``cell_ids`` of the cell containing each point, or ``-1`` outside the grid."""
+        lon = np.asarray(lon, dtype=np.float64)
+        lat = np.asarray(lat, dtype=np.float64)
+        result = np.full(len(lon), -1, dtype=np.int32)
+        order = np.argsort(lon, kind="stable")
+        sorted_lon = lon[order]
+        for position in range(len(self)):
+            xmin, ymin, xmax, ymax = self.bounds[position]
+            start = int(np.searchsorted(sorted_lon, xmin, side="left"))
+            stop = int(np.searchsorted(sorted_lon, xmax, side="right"))
+            if start == stop:
+                continue
+            candidates = order[start:stop]
+            candidates = candidates[(lat[candidates] >= ymin) & (lat[candidates] <= ymax) & (result[candidates] < 0)]
+            if not candidates.size:
+                continue
+            inside = points_in_ring(lon[candidates], lat[candidates], self.ring(position))
+            result[candidates[inside]] = position
+        return result
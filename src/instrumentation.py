@@ -0,0 +1,212 @@
+"""Lightweight timing and memory instrumentation for the page-render path.
+
+Spans record wall time, the change in process RSS and optional fields such as payload bytes.
+Every finished span is written as a structured ``perf`` log line. The spans of the current rerun
+are also kept per script thread, so the developer panel can show where that rerun spent its time.
+
+Opt-in switches (environment variables, any non-empty value other than ``0``):
+
+* ``APP_PERF_LOG`` attaches a stderr handler, so the ``perf`` log lines are visible without any
+  other logging configuration;
+* ``APP_PERF_PANEL`` renders the developer panel at the bottom of every page.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def _flag(name: str) -> bool:
+    return os.getenv(name, "").strip() not in ("", "0")
+
+
+PERF_LOG_ENABLED = _flag("APP_PERF_LOG")
+PERF_PANEL_ENABLED = _flag("APP_PERF_PANEL")
+
+if PERF_LOG_ENABLED and not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 0
+
+
+def rss_bytes() -> Optional[int]:
+    """Current resident set size of this process, or ``None`` where ``/proc`` is unavailable."""
+    if not _PAGE_SIZE:
+        return None
+    try:
+        with open("/proc/self/statm", "rb") as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+@dataclass
+class SpanRecord:
+    """One timed section of a rerun."""
+
+    name: str
+    depth: int
+    started: float = 0.0
+    seconds: float = 0.0
+    rss_delta_bytes: Optional[int] = None
+    cache: Optional[str] = None
+    fields: Dict[str, Any] = field(default_factory=dict)
+
+    def log_line(self) -> str:
+        parts = [f"span={self.name}", f"seconds={self.seconds:.4f}"]
+        if self.cache is not None:
+            parts.append(f"cache={self.cache}")
+        if self.rss_delta_bytes is not None:
+            parts.append(f"rss_delta_bytes={self.rss_delta_bytes}")
+        parts.extend(f"{key}={_log_value(value)}" for key, value in self.fields.items())
+        return "perf " + " ".join(parts)
+
+
+def _log_value(value: Any) -> str:
+    # Quote values containing whitespace so every line stays parseable as key=value pairs.
+    text = str(value)
+    return json.dumps(text) if not text or any(char.isspace() for char in text) else text
+
+
+class _RunState(threading.local):
+    def __init__(self) -> None:
+        self.records: List[SpanRecord] = []
+        self.stack: List[SpanRecord] = []
+
+
+# Streamlit executes each rerun of a session on one script thread, so thread-local state is the
+# rerun's own; loaders called outside a rerun (benchmarks, tests) simply record into their thread.
+_run_state = _RunState()
+
+# Called with every finished span, from the thread that ran it
+_listeners: List[Callable[[SpanRecord], None]] = []
+
+
+def add_listener(listener: Callable[[SpanRecord], None]) -> None:
+    """Call ``listener`` with every finished span record (once per listener)."""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def start_run() -> None:
+    """Forget the spans of the previous rerun on this thread."""
+    _run_state.records = []
+    _run_state.stack = []
+
+
+def current_records() -> List[SpanRecord]:
+    """Spans finished so far in the current rerun, in completion order."""
+    return list(_run_state.records)
+
+
+@contextlib.contextmanager
+def span(name: str, **fields: Any) -> Iterator[SpanRecord]:
+    """Time the enclosed block as span ``name``; extra ``fields`` are logged with it.
+
+    The yielded record can be updated inside the block, e.g. to add ``payload_bytes`` once known.
+    """
+    record = SpanRecord(name=name, depth=len(_run_state.stack), fields=dict(fields))
+    _run_state.stack.append(record)
+    rss_before = rss_bytes()
+    record.started = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record.seconds = time.perf_counter() - record.started
+        rss_after = rss_bytes()
+        if rss_before is not None and rss_after is not None:
+            record.rss_delta_bytes = rss_after - rss_before
+        _run_state.stack.pop()
+        _run_state.records.append(record)
+        logger.info(record.log_line())
+        for listener in _listeners:
+            listener(record)
+
+
+def timed_cache(
+    name: str, cache_decorator: Callable[[Callable[..., Any]], Callable[..., Any]]
+) -> Callable[[F], F]:
+    """Apply ``cache_decorator`` (e.g. ``st.cache_data(ttl=3600)``), timing calls as span ``name``.
+
+    The span's ``cache`` field is ``"miss"`` when the function body ran during the call and
+    ``"hit"`` otherwise; positional arguments are logged as ``args``. The returned function keeps
+    the cache's ``clear`` method and exposes the undecorated function as ``__wrapped__``.
+    """
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def compute(*args: Any, **kwargs: Any) -> Any:
+            if _run_state.stack:
+                _run_state.stack[-1].cache = "miss"
+            return func(*args, **kwargs)
+
+        cached = cache_decorator(compute)
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            fields = {"args": ",".join(map(str, args))} if args else {}
+            with span(name, **fields) as record:
+                record.cache = "hit"
+                return cached(*args, **kwargs)
+
+        wrapper.clear = cached.clear  # type: ignore[attr-defined]
+        wrapper.__wrapped__ = func  # type: ignore[attr-defined]
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def _format_bytes(value: Optional[int]) -> str:
+    if value is None:
+        return ""
+    sign = "-" if value < 0 else ""
+    value = abs(value)
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if value < 1024 or unit == "GiB":
+            return f"{sign}{value:.0f} {unit}" if unit == "B" else f"{sign}{value:.1f} {unit}"
+        value /= 1024
+    return ""
+
+
+def render_panel() -> None:
+    """Show the spans of the current rerun in a collapsed expander, if ``APP_PERF_PANEL`` is set."""
+    if not PERF_PANEL_ENABLED:
+        return
+    records = current_records()
+    with st.expander("Developer: performance of this rerun", expanded=False):
+        if not records:
+            st.caption("No instrumented sections ran in this rerun.")
+            return
+        rows = [
+            {
+                "section": "\u2003" * record.depth + record.name,
+                "ms": round(record.seconds * 1000, 1),
+                "cache": record.cache or "",
+                "payload": _format_bytes(record.fields.get("payload_bytes")),
+                "RSS change": _format_bytes(record.rss_delta_bytes),
+            }
+            for record in sorted(records, key=lambda record: record.started)
+        ]
+        st.table(rows)
+        st.caption(f"Process RSS: {_format_bytes(rss_bytes()) or 'unavailable'}")
+
@@ -0,0 +1,239 @@
+"""Process metrics in the Prometheus text exposition format.
+
+Counters and histograms are fed from the spans recorded by :mod:`src.instrumentation`:
+
+* ``app_loader_duration_seconds{loader}``: wall time of each cached loader call, hits included;
+* ``app_cache_requests_total{function,result}``: cache hits and misses per cached function;
+* ``app_payload_bytes{component}``: component argument bytes sent per render;
+* ``app_rerun_duration_seconds{page}``: page render time per entry of ``PAGES_MAP``;
+* ``app_active_sessions``: sessions connected to this Streamlit server.
+
+Nothing is collected unless an export is configured. The two exports can be combined:
+
+* ``APP_METRICS_PORT`` serves ``/metrics`` over HTTP on that port, from a background thread;
+* ``APP_METRICS_FILE`` rewrites that file (atomically) at most every ``APP_METRICS_FILE_INTERVAL``
+  seconds, default 15, for node_exporter's textfile collector.
+"""
+
+from __future__ import annotations
+
+import bisect
+import logging
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src import instrumentation
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTE_BUCKETS = (1e2, 1e3, 1e4, 1e5, 1e6, 1e7, 1e8)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic counter with a fixed set of label names."""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.label_names, label_values)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative histogram with fixed upper bounds and a fixed set of label names."""
+
+    def __init__(
+        self, name: str, documentation: str, label_names: Sequence[str], buckets: Sequence[float]
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets) + (math.inf,)
+        # label values -> (per-bucket counts, sum)
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            counts, total = self._series.setdefault(label_values, ([0] * len(self.buckets), [0.0]))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            total[0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    bucket = _labels(self.label_names, label_values, f'le="{_number(bound)}"')
+                    lines.append(f"{self.name}_bucket{bucket} {cumulative}")
+                labels = _labels(self.label_names, label_values)
+                lines.append(f"{self.name}_sum{labels} {_number(total[0])}")
+                lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+LOADER_SECONDS = Histogram(
+    "app_loader_duration_seconds", "Wall time of cached loader calls, hits included.", ("loader",), DURATION_BUCKETS
+)
+CACHE_REQUESTS = Counter(
+    "app_cache_requests_total", "Cached function calls by outcome.", ("function", "result")
+)
+PAYLOAD_BYTES = Histogram(
+    "app_payload_bytes", "Component argument bytes sent per render.", ("component",), BYTE_BUCKETS
+)
+RERUN_SECONDS = Histogram(
+    "app_rerun_duration_seconds", "Wall time of a page render.", ("page",), DURATION_BUCKETS
+)
+
+# Spans whose ``payload_bytes`` field is what a render ships to the browser, by component name
+_EMIT_SPANS = {"emit_component": "site_selector_v2"}
+
+
+def _active_sessions() -> Optional[int]:
+    try:
+        from streamlit import runtime
+
+        if not runtime.exists():
+            return None
+        # Not public API; the session manager is the only place Streamlit tracks connected sessions.
+        return runtime.get_instance()._session_mgr.num_active_sessions()
+    except Exception:  # noqa: BLE001 - a missing gauge must never break a scrape
+        return None
+
+
+def render() -> str:
+    """Return every metric in the Prometheus text exposition format."""
+    lines: List[str] = []
+    for metric in (LOADER_SECONDS, CACHE_REQUESTS, PAYLOAD_BYTES, RERUN_SECONDS):
+        lines.extend(metric.render())
+    sessions = _active_sessions()
+    if sessions is not None:
+        lines += [
+            "# HELP app_active_sessions Sessions connected to this Streamlit server.",
+            "# TYPE app_active_sessions gauge",
+            f"app_active_sessions {sessions}",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+class _FileExporter:
+    def __init__(self, path: Path, interval: float) -> None:
+        self.path = path
+        self.interval = interval
+        self._last_write = 0.0
+        self._lock = threading.Lock()
+
+    def maybe_write(self) -> None:
+        now = time.monotonic()
+        if now - self._last_write < self.interval or not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._last_write = now
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            partial = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+            partial.write_text(render(), encoding="utf-8")
+            os.replace(partial, self.path)
+        except OSError:
+            logger.exception("metrics_file_write_failed path=%s", self.path)
+        finally:
+            self._lock.release()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:  # noqa: N802 - http.server naming
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002 - http.server signature
+        pass
+
+
+_install_lock = threading.Lock()
+_installed = False
+_file_exporter: Optional[_FileExporter] = None
+
+
+def _observe(record: instrumentation.SpanRecord) -> None:
+    if record.cache is not None:
+        LOADER_SECONDS.observe(record.seconds, record.name)
+        CACHE_REQUESTS.inc(record.name, record.cache)
+    elif record.name == "rerun":
+        RERUN_SECONDS.observe(record.seconds, str(record.fields.get("page", "")))
+        if _file_exporter is not None:
+            _file_exporter.maybe_write()
+    elif record.name in _EMIT_SPANS and "payload_bytes" in record.fields:
+        PAYLOAD_BYTES.observe(float(record.fields["payload_bytes"]), _EMIT_SPANS[record.name])
+
+
+def install() -> None:
+    """Start the exports configured through the environment; safe to call on every rerun."""
+    global _installed, _file_exporter
+    if _installed:
+        return
+    with _install_lock:
+        if _installed:
+            return
+        _installed = True
+        port = os.getenv("APP_METRICS_PORT", "").strip()
+        path = os.getenv("APP_METRICS_FILE", "").strip()
+        if not port and not path:
+            return
+        if path:
+            _file_exporter = _FileExporter(Path(path), float(os.getenv("APP_METRICS_FILE_INTERVAL", "15")))
+        if port:
+            try:
+                server = ThreadingHTTPServer(("", int(port)), _MetricsHandler)
+            except OSError:
+                # Another process (e.g. a second replica on this host) already serves the port.
+                logger.exception("metrics_server_failed port=%s", port)
+            else:
+                threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+                logger.info("metrics_server_started port=%s", port)
+        instrumentation.add_listener(_observe)
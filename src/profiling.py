@@ -0,0 +1,149 @@
+"""On-demand profiling of a single rerun.
+
+Profiling is off unless the ``APP_PROFILE_DIR`` environment variable names a directory. When it
+does, an authenticated user can add ``?profile=cprofile`` (or ``?profile=1``) or ``?profile=sample``
+to the URL. The next rerun of the page is profiled, the result is written to a timestamped file in
+that directory, and the parameter is removed so later reruns run normally.
+
+* ``cprofile`` writes a ``.prof`` file (``pstats`` format), readable by ``python -m pstats``,
+  snakeviz, or flameprof for a flame graph.
+* ``sample`` samples the script thread's stack every few milliseconds. It writes a ``.folded``
+  file of collapsed stacks that flamegraph.pl and speedscope read directly. It adds almost no
+  overhead, so the timings stay realistic.
+"""
+
+from __future__ import annotations
+
+import collections
+import contextlib
+import cProfile
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from types import FrameType
+from typing import Counter, Iterator, List, Optional
+
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR_ENV = "APP_PROFILE_DIR"
+QUERY_PARAM = "profile"
+SAMPLE_INTERVAL_SECONDS = 0.005
+
+_MODES = {"1": "cprofile", "cprofile": "cprofile", "sample": "sample"}
+
+
+def profile_dir() -> Optional[Path]:
+    """Directory profiles are written to, or ``None`` when profiling is disabled."""
+    value = os.getenv(PROFILE_DIR_ENV, "").strip()
+    return Path(value) if value else None
+
+
+def requested_mode() -> Optional[str]:
+    """Profiling mode requested through the query string, if profiling is enabled."""
+    if profile_dir() is None:
+        return None
+    return _MODES.get(st.query_params.get(QUERY_PARAM, "").strip().lower())
+
+
+def _output_path(directory: Path, label: str, suffix: str) -> Path:
+    stamp = datetime.now().strftime("%Y%m%dT%H%M%S-%f")[:-3]
+    slug = re.sub(r"[^a-z0-9]+", "-", label.lower()).strip("-") or "page"
+    return directory / f"{stamp}-{slug}{suffix}"
+
+
+class _FunctionProfiler:
+    """Deterministic ``cProfile`` profile of the calling thread, written in ``pstats`` format."""
+
+    suffix = ".prof"
+
+    def __init__(self) -> None:
+        self._profile = cProfile.Profile()
+
+    def start(self) -> None:
+        self._profile.enable()
+
+    def stop(self) -> None:
+        self._profile.disable()
+
+    def write(self, path: Path) -> None:
+        self._profile.dump_stats(str(path))
+
+
+class _StackSampler:
+    """Sample one thread's Python stack at a fixed interval and count collapsed stacks."""
+
+    suffix = ".folded"
+
+    def __init__(self, thread_id: int, interval: float) -> None:
+        self._thread_id = thread_id
+        self._interval = interval
+        self._stop = threading.Event()
+        self._worker = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self.stacks: Counter[str] = collections.Counter()
+
+    @staticmethod
+    def _collapse(frame: Optional[FrameType]) -> str:
+        names: List[str] = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                self.stacks[self._collapse(frame)] += 1
+
+    def start(self) -> None:
+        self._worker.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._worker.join()
+
+    def write(self, path: Path) -> None:
+        with path.open("w", encoding="utf-8") as handle:
+            for stack, count in self.stacks.most_common():
+                handle.write(f"{stack} {count}\n")
+
+
+@contextlib.contextmanager
+def maybe_profile(label: str) -> Iterator[None]:
+    """Profile the enclosed block if this rerun was requested with ``?profile=...``.
+
+    ``label`` (normally the page name) becomes part of the file name.
+    """
+    mode = requested_mode()
+    directory = profile_dir()
+    if mode is None or directory is None:
+        yield
+        return
+
+    # Only this rerun is profiled; dropping the parameter keeps the next rerun unprofiled.
+    del st.query_params[QUERY_PARAM]
+    directory.mkdir(parents=True, exist_ok=True)
+    profiler = (
+        _FunctionProfiler()
+        if mode == "cprofile"
+        else _StackSampler(threading.get_ident(), SAMPLE_INTERVAL_SECONDS)
+    )
+    path = _output_path(directory, label, profiler.suffix)
+    started = time.perf_counter()
+    profiler.start()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        profiler.write(path)
+        elapsed = time.perf_counter() - started
+        logger.info("profile_written mode=%s path=%s seconds=%.4f", mode, path, elapsed)
+    st.toast(f"Profile ({mode}, {elapsed:.2f} s) written to {path}")
@@ -0,0 +1,12 @@
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture(autouse=True)
+def project_root(monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Run every test from the repository root, where the app's relative ``data/`` paths resolve."""
+    monkeypatch.chdir(PROJECT_ROOT)
+    return PROJECT_ROOT
@@ -0,0 +1,78 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from src.geojson_stream import iter_features, iter_point_features
+
+CHUNK_SIZES = (1, 2, 3, 7, 1000)
+
+
+def _write(tmp_path: Path, text: str) -> Path:
+    path = tmp_path / "doc.geojson"
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def _point(lon: float, lat: float, **properties) -> dict:
+    return {"type": "Feature", "properties": properties, "geometry": {"type": "Point", "coordinates": [lon, lat]}}
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_matches_json_load(tmp_path: Path, chunk_size: int):
+    document = {
+        "type": "FeatureCollection",
+        "name": "sample",
+        "crs": {"type": "name", "properties": {"name": "urn:ogc:def:crs:OGC:1.3:CRS84"}},
+        "features": [
+            _point(44.123456789, 15.987654321, name="مدرسة", count=1234567890123, share=-0.000125),
+            _point(43.5, 13.25, name='quote " and \\ backslash', flag=True, missing=None),
+            {"type": "Feature", "properties": {"nested": {"a": [1, 2.5e-3, "x"]}}, "geometry": None},
+        ],
+        "bbox": [43.5, 13.25, 44.2, 16.0],
+    }
+    path = _write(tmp_path, json.dumps(document, ensure_ascii=False, indent=1))
+    assert list(iter_features(path, chunk_size)) == document["features"]
+
+
+@pytest.mark.parametrize("chunk_size", (2, 3, 4, 5))
+def test_number_split_across_chunks(tmp_path: Path, chunk_size: int):
+    # Bare numbers at the end of a buffer may be truncated; they must only be accepted once complete.
+    text = '{"features": [12345.6789, 7, -0.5e+10]}'
+    path = _write(tmp_path, text)
+    assert list(iter_features(path, chunk_size)) == [12345.6789, 7, -0.5e10]
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_empty_features(tmp_path: Path, chunk_size: int):
+    path = _write(tmp_path, '{"type": "FeatureCollection", "features": [ ]}')
+    assert list(iter_features(path, chunk_size)) == []
+
+
+@pytest.mark.parametrize("text", ['{"type": "FeatureCollection", "name": "x"}', "{}"])
+def test_missing_features_member(tmp_path: Path, text: str):
+    with pytest.raises(ValueError, match="no features member"):
+        list(iter_features(_write(tmp_path, text), 3))
+
+
+def test_truncated_document(tmp_path: Path):
+    with pytest.raises(ValueError):
+        list(iter_features(_write(tmp_path, '{"features": [{"type": "Feature"'), 4))
+
+
+def test_real_site_file_at_small_chunks():
+    path = Path("data/site_data/education_facilities.geojson")
+    with path.open("r", encoding="utf-8") as handle:
+        expected = json.load(handle)["features"]
+    assert list(iter_features(path, 7)) == expected
+
+
+def test_iter_point_features_skips_other_geometries(tmp_path: Path):
+    features = [
+        _point(44.0, 15.0, id="a"),
+        {"type": "Feature", "properties": {"id": "b"}, "geometry": None},
+        {"type": "Feature", "properties": {"id": "c"}, "geometry": {"type": "LineString", "coordinates": [[0, 0], [1, 1]]}},
+        {"type": "Feature", "properties": None, "geometry": {"type": "Point", "coordinates": [45.0, 16.0]}},
+    ]
+    path = _write(tmp_path, json.dumps({"features": features}))
+    assert list(iter_point_features(path)) == [(44.0, 15.0, {"id": "a"}), (45.0, 16.0, {})]
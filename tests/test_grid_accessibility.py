@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from src.grid_accessibility import band_weights, e2sfca
+from src.grid_catchments import METRES_PER_DEGREE, CentroidIndex
+
+
+def test_band_weights():
+    weights = band_weights(np.array([0.0, 10_000.0, 10_001.0, 25_000.0, 30_000.0, 30_001.0]))
+    assert weights.tolist() == [1.0, 1.0, 0.68, 0.22, 0.22, 0.0]
+
+
+def test_e2sfca_shares_supply_among_competing_cells():
+    # Three cells on the equator, 5 km and 15 km east of the first
+    step = 5_000.0 / METRES_PER_DEGREE
+    index = CentroidIndex(np.array([0.0, step, 3 * step]), np.zeros(3), np.zeros(3))
+    population = np.array([100.0, 300.0, np.nan])
+    access = e2sfca(index, population, [0.0], [0.0], supply=[2.0])
+    # The facility serves 100 + 300 people at full weight; the empty cell still sees it, at 0.68
+    assert access.tolist() == pytest.approx([2.0 / 400, 2.0 / 400, 0.68 * 2.0 / 400])
+
+
+def test_e2sfca_conserves_supply():
+    rng = np.random.default_rng(3)
+    index = CentroidIndex(rng.uniform(43.0, 45.0, 800), rng.uniform(13.0, 15.0, 800), np.zeros(800), 0.2)
+    population = rng.gamma(0.5, 1_000.0, 800)
+    access = e2sfca(index, population, rng.uniform(43.2, 44.8, 30), rng.uniform(13.2, 14.8, 30))
+    # Each facility's supply is spread over the population within reach
+    assert np.sum(access * population) == pytest.approx(30.0)
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.grid_aggregation import aggregate, aggregation_for, zonal_statistics
+
+
+def test_aggregation_for():
+    assert aggregation_for("worldpop2023_sum") == "sum"
+    assert aggregation_for("health_number_of_sites") == "sum"
+    assert aggregation_for("health_distance_to_nearest_site_m") == "min"
+    assert aggregation_for("ipc3_pct") == "mean"
+    assert aggregation_for("climate_score") == "mean"
+    assert aggregation_for("num_schools_per_1000_children") == "mean"
+    assert aggregation_for("pop_total", {"pop_total": "max"}) == "max"
+
+
+@pytest.mark.parametrize(
+    "operator, expected",
+    [("sum", [3.0, 4.0, np.nan]), ("min", [1.0, 4.0, np.nan]), ("max", [2.0, 4.0, np.nan]), ("mean", [1.75, 4.0, np.nan])],
+)
+def test_aggregate(operator, expected):
+    values = np.array([1.0, 2.0, 4.0, np.nan, 9.0])
+    groups = np.array([0, 0, 1, 2, -1])
+    weights = np.array([1.0, 3.0, 0.0, 1.0, 1.0])
+    result = aggregate(values, groups, 3, operator, weights)
+    np.testing.assert_allclose(result, expected)
+
+
+def test_zonal_statistics():
+    frames = {"layer": pd.DataFrame({"people_sum": [1.0, 2.0, 4.0], "share_pct": [0.5, 1.0, np.nan]})}
+    result = zonal_statistics(frames, np.array([0, 1]), weights=np.array([1.0, 3.0, 5.0]))
+    assert result == {"layer": {"people_sum": 3.0, "share_pct": 0.875}}
+    assert zonal_statistics(frames, np.array([2]))["layer"]["share_pct"] is None
@@ -0,0 +1,58 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.grid_catchments import CentroidIndex, catchment_statistics, disk_overlap_share, haversine_m
+
+
+def test_haversine_m():
+    assert haversine_m(44.0, 15.0, 44.0, 15.0) == 0.0
+    # One degree of latitude is about 111.2 km
+    assert haversine_m(44.0, 15.0, 44.0, 16.0) == pytest.approx(111_195, rel=1e-3)
+
+
+@pytest.mark.parametrize(
+    "distance, cell_radius, radius, expected",
+    [(0.0, 1.0, 5.0, 1.0), (10.0, 1.0, 5.0, 0.0), (100.0, 1.0, 100.0, 0.5), (0.0, 2.0, 1.0, 0.25), (3.0, 0.0, 5.0, 1.0)],
+)
+def test_disk_overlap_share(distance, cell_radius, radius, expected):
+    share = disk_overlap_share(np.array([distance]), np.array([cell_radius]), radius)
+    assert share[0] == pytest.approx(expected, abs=0.02)
+
+
+def _random_index(count=2_000, seed=0):
+    rng = np.random.default_rng(seed)
+    lon = rng.uniform(42.5, 53.0, count)
+    lat = rng.uniform(12.0, 19.0, count)
+    return CentroidIndex(lon, lat, np.full(count, 4_000.0), bin_degrees=0.2)
+
+
+@pytest.mark.parametrize("partial", [False, True])
+def test_query_matches_brute_force(partial):
+    index = _random_index()
+    points_lon, points_lat = np.array([44.2, 48.0, 52.9]), np.array([15.3, 16.1, 12.1])
+    queries, cells, shares, _ = index.query(points_lon, points_lat, 25_000.0, partial)
+    for query in range(len(points_lon)):
+        distances = haversine_m(points_lon[query], points_lat[query], index.lon, index.lat)
+        if partial:
+            expected = disk_overlap_share(distances, index.radius_m, 25_000.0)
+        else:
+            expected = (distances <= 25_000.0).astype(float)
+        found = np.zeros(len(index))
+        found[cells[queries == query]] = shares[queries == query]
+        np.testing.assert_allclose(found, expected)
+
+
+def test_catchment_statistics():
+    index = CentroidIndex(np.array([44.0, 44.05, 45.0]), np.array([15.0, 15.0, 15.0]), np.zeros(3))
+    frames = {"layer": pd.DataFrame({"pop": [10.0, 20.0, 40.0], "ipc3_pct": [0.2, 0.6, 1.0]})}
+    result = catchment_statistics(
+        index, frames, [44.0, 45.0, 50.0], [15.0, 15.0, 15.0], 10_000.0, weights=np.array([1.0, 3.0, 1.0])
+    )
+    assert result["cells"]["cells"].tolist() == [2.0, 1.0, 0.0]
+    layer = result["layer"]
+    assert layer["pop"].tolist()[:2] == [30.0, 40.0]
+    assert layer["ipc3_pct"].tolist()[:2] == pytest.approx([0.5, 1.0])
+    assert math.isnan(layer["pop"].iloc[2])
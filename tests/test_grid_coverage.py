@@ -0,0 +1,58 @@
+import numpy as np
+
+from src.grid_catchments import CentroidIndex
+from src.grid_coverage import coverage_matrix, coverage_sweep, greedy_max_coverage, optimize_coverage
+
+
+def _naive_greedy(indptr, indices, weights, k, covered):
+    covered = covered.copy()
+    chosen = []
+    rows = [indices[start:stop] for start, stop in zip(indptr[:-1], indptr[1:])]
+    for _ in range(k):
+        gains = [weights[cells][~covered[cells]].sum() for cells in rows]
+        row = int(np.argmax(gains))
+        if gains[row] <= 0:
+            break
+        chosen.append(row)
+        covered[rows[row]] = True
+    return chosen
+
+
+def _random_grid(count=1_500, seed=1):
+    rng = np.random.default_rng(seed)
+    index = CentroidIndex(rng.uniform(43.0, 46.0, count), rng.uniform(13.0, 16.0, count), np.zeros(count), 0.2)
+    return index, rng.gamma(0.5, 1_000.0, count)
+
+
+def test_greedy_max_coverage_small():
+    # Rows cover {0, 1}, {1, 2, 3} and {3}; cell 3 is already covered
+    indptr = np.array([0, 2, 5, 6])
+    indices = np.array([0, 1, 1, 2, 3, 3])
+    weights = np.array([5.0, 1.0, 2.0, 10.0])
+    chosen, gains = greedy_max_coverage(indptr, indices, weights, 3, np.array([False, False, False, True]))
+    assert chosen.tolist() == [0, 1]
+    assert gains.tolist() == [6.0, 2.0]
+
+
+def test_lazy_greedy_matches_naive_greedy():
+    index, weights = _random_grid()
+    indptr, indices = coverage_matrix(index, index.lon, index.lat, 15_000.0)
+    covered = np.zeros(len(index), dtype=bool)
+    covered[:100] = True
+    chosen, gains = greedy_max_coverage(indptr, indices, weights, 25, covered)
+    assert chosen.tolist() == _naive_greedy(indptr, indices, weights, 25, covered)
+    assert np.all(np.diff(gains) <= 1e-9)
+
+
+def test_existing_sites_and_sweep():
+    index, weights = _random_grid()
+    existing = (np.array([44.0, 45.5]), np.array([14.0, 15.5]))
+    chosen, gains, covered = optimize_coverage(index, index.lon, index.lat, weights, 20_000.0, 10, *existing)
+    distances_to_existing = np.hypot(index.lon[chosen, None] - existing[0], index.lat[chosen, None] - existing[1])
+    assert covered > 0 and len(chosen) == 10
+    assert np.all(distances_to_existing > 0.1)
+    serial = coverage_sweep(index, index.lon, index.lat, weights, [10_000.0, 20_000.0], 10, *existing)
+    parallel = coverage_sweep(index, index.lon, index.lat, weights, [10_000.0, 20_000.0], 10, *existing, processes=2)
+    assert serial[20_000.0][0].tolist() == chosen.tolist()
+    for radius in serial:
+        assert serial[radius][0].tolist() == parallel[radius][0].tolist()
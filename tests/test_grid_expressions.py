@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.grid_expressions import ExpressionError, compile_expression
+
+
+def _frames():
+    return {
+        "climate": pd.DataFrame({"population": [100.0, 0.0, 50.0], "flood": [10.0, 5.0, np.nan]}),
+        "access": pd.DataFrame({"population": [90.0, 10.0, 40.0], "distance_km": [1.0, 12.0, 30.0]}),
+    }
+
+
+def test_arithmetic_and_functions():
+    result = compile_expression("climate.flood / climate.population * 100").evaluate(_frames())
+    np.testing.assert_allclose(result, [10.0, np.nan, np.nan])
+    result = compile_expression("max(distance_km, 10) - sqrt(access.population) ** 2").evaluate(_frames())
+    np.testing.assert_allclose(result, [-80.0, 2.0, -10.0])
+    result = compile_expression("fillna(flood, 0) + log10(100)").evaluate(_frames())
+    np.testing.assert_allclose(result, [12.0, 7.0, 2.0])
+
+
+def test_constant_expression_covers_every_cell():
+    np.testing.assert_allclose(compile_expression("2 * 3").evaluate(_frames()), [6.0, 6.0, 6.0])
+
+
+def test_conditionals_and_comparisons():
+    result = compile_expression("1 if 5 <= distance_km < 20 else 0").evaluate(_frames())
+    np.testing.assert_allclose(result, [0.0, 1.0, 0.0])
+    result = compile_expression("where((distance_km > 10) & (climate.population > 0), 1, 0)").evaluate(_frames())
+    np.testing.assert_allclose(result, [0.0, 0.0, 1.0])
+    result = compile_expression("not distance_km > 10 or flood > 8").evaluate(_frames())
+    np.testing.assert_allclose(result, [1.0, 0.0, 0.0])
+
+
+def test_column_resolution():
+    expression = compile_expression("flood + access.population")
+    assert expression.references == frozenset({("", "flood"), ("access", "population")})
+    with pytest.raises(ExpressionError, match="several layers"):
+        compile_expression("population * 2").evaluate(_frames())
+    with pytest.raises(ExpressionError, match="unknown column"):
+        compile_expression("rainfall + 1").evaluate(_frames())
+    with pytest.raises(ExpressionError, match="unknown column climate.distance_km"):
+        compile_expression("climate.distance_km").evaluate(_frames())
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "__import__('os').system('true')",
+        "flood.real.imag",
+        "flood[0]",
+        "(lambda x: x)(1)",
+        "'text'",
+        "True + 1",
+        "open('file')",
+        "sqrt(flood, 2)",
+        "flood +",
+        "",
+        "1" + " + 1" * 300,
+    ],
+)
+def test_rejects_invalid_expressions(text):
+    with pytest.raises(ExpressionError):
+        compile_expression(text)
+
+
+def test_rejects_numbers_beyond_float_range():
+    with pytest.raises(ExpressionError, match="number out of range"):
+        compile_expression("1" + "0" * 400)
+
+
+def test_compiled_once_per_text():
+    assert compile_expression("flood * 2") is compile_expression("flood * 2")
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from src.grid_hotspots import gi_star, gi_star_pseudo_p
+from src.grid_neighbours import CellAdjacency
+
+
+def _chain(count):
+    """Cells in a line, each adjacent to the next, with 1-ring weights including the cell."""
+    rows = np.concatenate([np.arange(count - 1), np.arange(1, count)])
+    columns = np.concatenate([np.arange(1, count), np.arange(count - 1)])
+    keys = np.unique(rows * count + columns)
+    adjacency = CellAdjacency(np.searchsorted(keys // count, np.arange(count + 1)), keys % count)
+    return adjacency.k_ring(1)
+
+
+def test_gi_star_matches_formula():
+    weights = _chain(30)
+    values = np.random.default_rng(0).normal(size=30)
+    values[4] = np.nan
+    z = gi_star(weights, values)
+    valid = ~np.isnan(values)
+    n, mean, spread = valid.sum(), values[valid].mean(), values[valid].std()
+    for cell in (0, 3, 10):
+        neighbours = [j for j in weights.neighbours(cell) if valid[j]]
+        count = len(neighbours)
+        expected = (values[neighbours].sum() - mean * count) / (spread * np.sqrt((n * count - count**2) / (n - 1)))
+        assert z[cell] == pytest.approx(expected)
+    assert np.isnan(z[4])
+
+
+def test_pseudo_p_flags_clusters_only():
+    weights = _chain(200)
+    rng = np.random.default_rng(1)
+    values = rng.normal(size=200)
+    values[100:106] += 8.0
+    p = gi_star_pseudo_p(weights, values, permutations=499)
+    assert np.all(p[101:105] <= 0.01)
+    # Away from the cluster p-values are roughly uniform
+    assert np.mean(p[:90] < 0.05) < 0.15
+    assert p.min() >= 1 / 500 and p.max() <= 1.0
+
+
+def test_pseudo_p_ties_are_not_significant():
+    weights = _chain(50)
+    values = np.zeros(50)
+    values[::10] = 1.0
+    p = gi_star_pseudo_p(weights, values, permutations=199)
+    # A run of zeros among mostly-zero cells: every random sum ties or exceeds it
+    assert p[25] > 0.5
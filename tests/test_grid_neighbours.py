@@ -0,0 +1,53 @@
+import math
+
+import numpy as np
+
+from src.grid_neighbours import CellAdjacency
+from src.h3_grid import GridCells
+
+
+def _hex_grid(radius):
+    """Pointy-top unit hexagons at the axial coordinates within ``radius`` of the origin."""
+    coords = [
+        (q, r) for q in range(-radius, radius + 1) for r in range(-radius, radius + 1) if abs(q + r) <= radius
+    ]
+    rings = []
+    for q, r in coords:
+        x, y = math.sqrt(3) * (q + r / 2), 1.5 * r
+        angles = np.radians(30 + 60 * np.arange(7))
+        rings.append(np.column_stack([x + np.cos(angles), y + np.sin(angles)]))
+    cells = GridCells([f"{q},{r}" for q, r in coords], np.vstack(rings), np.arange(len(coords) + 1) * 7)
+    return cells, coords
+
+
+def _hex_distance(a, b):
+    dq, dr = a[0] - b[0], a[1] - b[1]
+    return max(abs(dq), abs(dr), abs(dq + dr))
+
+
+def test_adjacency_matches_hex_distance():
+    cells, coords = _hex_grid(3)
+    adjacency = CellAdjacency.from_cells(cells)
+    for k in (1, 2):
+        ring = adjacency.k_ring(k, include_self=k == 2)
+        for position, coord in enumerate(coords):
+            expected = [
+                other
+                for other, neighbour in enumerate(coords)
+                if 0 < _hex_distance(coord, neighbour) <= k or (k == 2 and other == position)
+            ]
+            assert ring.neighbours(position).tolist() == expected
+    centre = coords.index((0, 0))
+    assert adjacency.neighbours(centre).size == 6
+
+
+def test_lag_skips_missing_values():
+    cells, coords = _hex_grid(1)
+    adjacency = CellAdjacency.from_cells(cells)
+    values = np.array([np.nan if coord == (1, 0) else 1.0 for coord in coords])
+    values[coords.index((0, 0))] = 100.0
+    lag = adjacency.lag(values)
+    assert lag[coords.index((0, 0))] == 1.0
+    # (0, 1) borders the centre, (-1, 1) and the missing (1, 0)
+    assert lag[coords.index((0, 1))] == (100.0 + 1.0) / 2
+    assert np.allclose(adjacency.matvec(np.ones(len(coords))), np.diff(adjacency.indptr))
@@ -0,0 +1,77 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.h3_grid import (
+    GridCells,
+    cell_parents,
+    cell_resolutions,
+    dissolve_rings,
+    points_in_ring,
+    ring_area,
+    vertex_keys,
+)
+
+GRID_PATH = Path("data/boundaries_h3/h3_grid_res5.geojson")
+
+
+@pytest.fixture
+def cells() -> GridCells:
+    with GRID_PATH.open("r", encoding="utf-8") as handle:
+        return GridCells.from_geojson(json.load(handle))
+
+
+def test_points_in_ring_unit_square():
+    ring = np.array([[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]], dtype=float)
+    inside = points_in_ring(np.array([0.5, 1.5, 0.25]), np.array([0.5, 0.5, 0.9]), ring)
+    assert inside.tolist() == [True, False, True]
+
+
+def test_locate_cell_centres(cells: GridCells):
+    centres = np.array([ring[:-1].mean(axis=0) for ring in cells.rings[:50]])
+    assert cells.locate(centres[:, 0], centres[:, 1]).tolist() == list(range(50))
+
+
+def test_locate_outside_grid(cells: GridCells):
+    assert cells.locate(np.array([0.0]), np.array([0.0])).tolist() == [-1]
+
+
+def test_cell_parents():
+    assert cell_resolutions(["8552086bfffffff"]).tolist() == [5]
+    assert cell_parents(["8552086bfffffff"], 4) == ["8452087ffffffff"]
+    assert cell_parents(["8552086bfffffff"], 2) == cell_parents(["8452087ffffffff"], 2) == ["82520ffffffffff"]
+
+
+def test_cell_parents_rejects_other_ids():
+    with pytest.raises(ValueError):
+        cell_parents(["000000000000001"], 4)
+    with pytest.raises(ValueError):
+        cell_parents(["8452087ffffffff"], 5)
+
+
+def test_dissolve_adjacent_squares():
+    left = np.array([[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]], dtype=float)
+    parts = dissolve_rings([left, left + [1, 0], left + [5, 0]])
+    assert sorted(ring_area(part[0]) for part in parts) == [1.0, 2.0]
+    assert all(len(part) == 1 for part in parts)
+
+
+def test_within_polygon_with_hole(cells: GridCells):
+    centres = cells.centroids
+    west, south = centres.min(axis=0)
+    east, north = centres.max(axis=0)
+    everything = [
+        [west - 1, south - 1], [east + 1, south - 1], [east + 1, north + 1], [west - 1, north + 1], [west - 1, south - 1]
+    ]
+    assert cells.within([everything]).tolist() == list(range(len(cells)))
+    x, y = centres[0]
+    hole = [[x - 0.01, y - 0.01], [x + 0.01, y - 0.01], [x + 0.01, y + 0.01], [x - 0.01, y + 0.01], [x - 0.01, y - 0.01]]
+    assert 0 not in cells.within([everything, hole]).tolist()
+    assert cells.within([hole]).tolist() == [0]
+
+
+def test_vertex_keys_match_shared_vertices():
+    keys = vertex_keys(np.array([[44.1234567891, 15.0], [44.1234567889, 15.0], [44.12345679, 15.0]]))
+    assert (keys[0] == keys[1]).all() and not (keys[0] == keys[2]).all()
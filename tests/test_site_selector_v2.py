@@ -0,0 +1,214 @@
+import json
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import _synthetic_cell_id
+from src.components import site_selector_v2 as selector
+from src.h3_grid import GridCells
+
+# A health facility and the res-5 cell it lies in
+KNOWN_SITE = {"dataset": "health", "id": "6937218341"}
+KNOWN_CELL = "85521c07fffffff"
+
+
+def test_site_details_known_site_cell():
+    details = selector._site_details(KNOWN_SITE)
+    assert details is not None
+    assert details["properties"]["osm_id"] == 6937218341
+    assert details["gridContext"]["cell"] == KNOWN_CELL
+    assert details["gridContext"]["values"]["health_access"]["health_number_of_sites"] == 5.0
+    catchments = details["catchments"]
+    assert list(catchments) == [str(radius) for radius in selector.CATCHMENT_RADII_KM]
+    populations = [catchments[radius]["values"]["climate"]["worldpop2023_sum"] for radius in catchments]
+    assert populations == sorted(populations) and populations[0] > 0
+
+
+def test_site_details_unknown_id():
+    assert selector._site_details({"dataset": "health", "id": "not-a-site"}) is None
+
+
+def test_site_details_unknown_dataset():
+    assert selector._site_details({"dataset": "missing", "id": "1"}) is None
+
+
+def test_repeated_ids_stay_unique(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    ids = ["SPEMPS", "SPEMPS#2", "SPEMPS", "SPEMPS"]
+    features = [
+        {"type": "Feature", "properties": {"Subproject_ID": site_id}, "geometry": {"type": "Point", "coordinates": [44.0, 15.0]}}
+        for site_id in ids
+    ]
+    path = tmp_path / "sites.geojson"
+    path.write_text(json.dumps({"type": "FeatureCollection", "features": features}), encoding="utf-8")
+    monkeypatch.setitem(selector.SITE_DATASETS, "duplicates", {"path": path, "id_field": "Subproject_ID"})
+
+    columns = selector._load_dataset_features.__wrapped__("duplicates")
+    assert columns["ids"] == ["SPEMPS", "SPEMPS#2", "SPEMPS#3", "SPEMPS#4"]
+
+
+def _square(west: float, south: float, size: float = 0.1) -> list:
+    return [[west, south], [west + size, south], [west + size, south + size], [west, south + size], [west, south]]
+
+
+@pytest.fixture
+def fine_grid(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """A four-cell stand-in for a res-6 grid, two of its cells in the health CSV."""
+    cells = {f"cell{index}": _square(44.0 + 0.1 * index, 15.0) for index in range(3)}
+    cells["far"] = _square(50.0, 15.0)
+    features = [
+        {"type": "Feature", "properties": {"h3_06": cell_id}, "geometry": {"type": "Polygon", "coordinates": [ring]}}
+        for cell_id, ring in cells.items()
+    ]
+    geometry = tmp_path / "grid_res6.geojson"
+    geometry.write_text(json.dumps({"type": "FeatureCollection", "features": features}), encoding="utf-8")
+    (tmp_path / "h3_health.csv").write_text(
+        ",h3_06,geometry,health_number_of_sites\n0,cell0,POLYGON EMPTY,2\n1,cell2,POLYGON EMPTY,\n2,cell0,POLYGON EMPTY,9\n",
+        encoding="utf-8",
+    )
+    monkeypatch.setitem(
+        selector.GRID_RESOLUTIONS,
+        6,
+        {**selector.GRID_RESOLUTIONS[6], "geometry": geometry, "data_dir": tmp_path},
+    )
+    monkeypatch.setattr(selector, "GRID_CSV_CHUNK_ROWS", 1)
+
+
+def test_load_fine_resolution(fine_grid):
+    meta, frames, cells = selector._load_grid_datasets.__wrapped__(6)
+    assert list(meta["feature_sets"]) == ["health_access"]
+    assert cells.cell_ids == ["cell0", "cell1", "cell2", "far"]
+    column = frames["health_access"]["health_number_of_sites"]
+    assert column.dtype == "float32"
+    # The first row of a repeated cell wins; cells without a value are NaN
+    assert column.fillna(-1).tolist() == [2.0, -1.0, -1.0, -1.0]
+
+
+def test_grid_viewport_snaps_to_tiles(fine_grid):
+    view = {"showGrid": True, "zoom": 9, "bounds": [15.02, 44.02, 15.08, 44.18]}
+    viewport = selector._grid_viewport(view)
+    assert viewport["resolution"] == 6
+    assert viewport["bounds"] == [15.0, 43.0, 16.0, 45.0]
+    assert viewport["cellIds"] == ["cell0", "cell1", "cell2"]
+    assert [feature["properties"]["h3_06"] for feature in viewport["geometry"]["features"]] == viewport["cellIds"]
+    assert selector._grid_viewport({**view, "zoom": 8}) is None
+    assert selector._grid_viewport({**view, "showGrid": False}) is None
+
+
+def test_grid_zonal_statistics_around_known_cell():
+    cells = selector._grid_context_index()["cells"]
+    position = cells.cell_ids.index(KNOWN_CELL)
+    ring = cells.ring(position).tolist()
+    result = selector.grid_zonal_statistics({"type": "Polygon", "coordinates": [ring]})
+    assert result["cells"] == 1
+    assert result["values"]["health_access"]["health_number_of_sites"] == 5.0
+    with pytest.raises(ValueError):
+        selector.grid_zonal_statistics({"type": "Point", "coordinates": [44.0, 15.0]})
+
+
+def test_grid_levels_roll_up_h3_cells_only():
+    grid = selector._grid_context_index()
+    cells, frames = grid["cells"], grid["values"]
+    levels = selector._grid_levels(frames, cells)
+    counts = [len(level["cellIds"]) for level in levels]
+    assert [level["resolution"] for level in levels] == [level["resolution"] for level in selector.GRID_LEVELS]
+    # Each H3 parent holds about seven children
+    assert all(coarse * 3 < fine for fine, coarse in zip(counts, counts[1:])) and counts[-1] > 1
+    synthetic = GridCells([_synthetic_cell_id(index) for index in range(len(cells))], cells.vertices, cells.offsets)
+    levels = selector._grid_levels(frames, synthetic)
+    assert len(levels) == 1 and levels[0]["minZoom"] == 0
+
+
+def test_district_figures_are_not_multiplied_by_cell_count():
+    frame = selector._grid_context_index()["values"]["pti_indicators"]
+    district_columns = list(selector.GRID_FEATURE_CONFIG["pti_indicators"]["aggregations"])
+    # Cells of one district repeat its figures
+    sizes = frame.groupby(district_columns, dropna=True).size()
+    key = sizes[sizes > 1].index[0]
+    district = frame[(frame[district_columns] == key).all(axis=1)]
+    overrides = selector.GRID_FEATURE_CONFIG["pti_indicators"]["aggregations"]
+    rolled = selector.aggregate_frame(district, np.zeros(len(district), dtype=np.int64), 1, overrides)
+    assert len(district) > 1
+    for column, value in zip(district_columns, key):
+        assert rolled[column].iloc[0] == pytest.approx(value)
+
+
+def test_suggest_new_sites():
+    result = selector.suggest_new_sites.__wrapped__(5, 10.0)
+    sites = result["sites"]
+    assert len(sites) == 5
+    assert sites["population"].is_monotonic_decreasing
+    assert 0 < result["existing"] + sites["cumulative"].iloc[-1] <= result["total"]
+    with pytest.raises(ValueError):
+        selector.suggest_new_sites.__wrapped__(5, 10.0, "not-a-population")
+    clamped = selector.suggest_new_sites.__wrapped__(10_000, 1e9)
+    assert len(clamped["sites"]) <= selector.COVERAGE_MAX_SITES
+    assert clamped["radius_km"] == max(selector.CATCHMENT_RADII_KM)
+
+
+@pytest.mark.parametrize(
+    "request_",
+    [
+        {"k": "abc", "radiusKm": 10, "population": "worldpop2023_sum"},
+        {"k": 5, "radiusKm": None, "population": "worldpop2023_sum"},
+        {"k": 5, "radiusKm": "nan", "population": "worldpop2023_sum"},
+        {"k": 5, "radiusKm": 10, "population": "pop_total"},
+    ],
+)
+def test_coverage_suggestions_report_invalid_requests(request_):
+    result = selector._coverage_suggestions(request_)
+    assert result["request"] == request_ and result["error"]
+
+
+def test_grid_spatial_lag():
+    grid = selector._grid_context_index()
+    position = grid["cells"].cell_ids.index(KNOWN_CELL)
+    neighbours = grid["adjacency"].neighbours(position)
+    values = grid["values"]["health_access"]["health_number_of_sites"].to_numpy()
+    lag = selector.grid_spatial_lag("health_access", "health_number_of_sites")
+    assert len(neighbours) == 6
+    assert lag[KNOWN_CELL] == pytest.approx(np.nanmean(values[neighbours]))
+
+
+def test_grid_hotspots():
+    table = selector.grid_hotspots.__wrapped__("pti_indicators", "conflict_fatalities", 1, 99)
+    assert list(table.columns) == ["gi_z", "p_value"]
+    assert table.index.equals(selector._grid_context_index()["values"]["pti_indicators"].index)
+    assert table["p_value"].dropna().between(0.01, 1.0).all()
+    with pytest.raises(ValueError):
+        selector.grid_hotspots.__wrapped__("pti_indicators", "not_a_column")
+    error = selector._derived_grid_column({"kind": "hotspot", "layerId": "climate", "variableId": "x", "rings": 1})
+    assert "unknown grid variable" in error["error"]
+
+
+def test_grid_expression():
+    frames = selector._grid_context_index()["values"]
+    climate = frames["climate"]
+    values = selector.grid_expression.__wrapped__("climate.worldpop2023_sum / 1000")
+    assert values.index.equals(climate.index)
+    np.testing.assert_allclose(values.to_numpy(), climate["worldpop2023_sum"].to_numpy() / 1000, rtol=1e-6)
+    column = selector._derived_grid_column({"kind": "expression", "expression": "climate.worldpop2023_sum * 2"})
+    assert set(column["columns"]) == {"value"}
+    error = selector._derived_grid_column({"kind": "expression", "expression": "import os"})
+    assert "invalid expression" in error["error"]
+    hotspots = selector.grid_hotspots.__wrapped__(selector.GRID_EXPRESSION_LAYER, "climate.worldpop2023_sum * 2", 1, 0)
+    np.testing.assert_allclose(
+        hotspots["gi_z"].to_numpy(),
+        selector.grid_hotspots.__wrapped__("climate", "worldpop2023_sum", 1, 0)["gi_z"].to_numpy(),
+        rtol=1e-6,
+    )
+
+
+def test_request_results_are_sent_once():
+    requests = []
+
+    def respond(request):
+        requests.append(request)
+        return {"value": 1}
+
+    first = selector._request_result("detail", {"id": "1"}, {}, respond)
+    assert first["result"] == {"value": 1}
+    confirmed = selector._request_result("detail", {"id": "1"}, {"detail": first["key"]}, respond)
+    assert confirmed == {"key": first["key"]}
+    assert selector._request_result("detail", {"id": "2"}, {"detail": first["key"]}, respond)["key"] != first["key"]
+    assert requests == [{"id": "1"}, {"id": "2"}]
+    assert selector._request_result("detail", None, {}, respond) is None